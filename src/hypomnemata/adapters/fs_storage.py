@@ -1,3 +1,6 @@
+import contextlib
+import os
+from collections.abc import Iterator
 from pathlib import Path
 
 from ..core.ports import StorageStrategy
@@ -6,6 +9,7 @@ from ..core.ports import StorageStrategy
 class FsStorage(StorageStrategy):
     def __init__(self, root: Path):
         self.root = root
+        self._root_str = os.fspath(root)
 
     def _path(self, id: str) -> Path:
         return self.root / f"{id}.md"
@@ -15,15 +19,39 @@ class FsStorage(StorageStrategy):
         return p.read_text(encoding="utf-8") if p.exists() else None
 
     def write_raw(self, id: str, contents: str) -> None:
-        self.root.mkdir(parents=True, exist_ok=True)
-        self._path(id).write_text(contents, encoding="utf-8")
+        # Write a sibling temp file and rename it over the note, so readers
+        # (and the watcher) never see a half-written file.
+        path = os.path.join(self._root_str, f"{id}.md")
+        tmp_path = path + ".tmp"
+        try:
+            f = open(tmp_path, "w", encoding="utf-8")
+        except FileNotFoundError:
+            # Only touch the directory when it is actually missing
+            self.root.mkdir(parents=True, exist_ok=True)
+            f = open(tmp_path, "w", encoding="utf-8")
+        try:
+            with f:
+                f.write(contents)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
 
     def delete_raw(self, id: str) -> None:
         p = self._path(id)
         if p.exists():
             p.unlink()
 
-    def list_all_ids(self) -> list[str]:
-        if not self.root.exists():
-            return []
-        return [p.stem for p in self.root.glob("*.md")]
+    def list_all_ids(self) -> Iterator[str]:
+        # scandir yields names with their d_type, so no Path objects are built
+        # and is_file() only needs a stat() for symlinks.
+        try:
+            it = os.scandir(self.root)
+        except FileNotFoundError:
+            return
+        with it:
+            for entry in it:
+                name = entry.name
+                if name.endswith(".md") and entry.is_file():
+                    yield name[:-3]
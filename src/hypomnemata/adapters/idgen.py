@@ -1,11 +1,48 @@
+import os
 import secrets
+import threading
 
 from ..core.ports import IdGenerator
 
 
+class RandomPool:
+    """
+    Hand out CSPRNG bytes from a refillable buffer.
+
+    One ``getrandom`` call fills ``size`` bytes, so generating many ids costs
+    one syscall per buffer rather than one per id. The buffer is discarded
+    after a fork so parent and child never hand out the same bytes, and a
+    lock keeps concurrent callers from being handed the same slice.
+    """
+
+    def __init__(self, size: int = 4096):
+        self.size = size
+        self._buf = b""
+        self._pos = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def take(self, n: int) -> bytes:
+        if n > self.size:
+            return secrets.token_bytes(n)
+        pid = os.getpid()
+        if pid != self._pid:
+            # A fork can copy the lock while another thread holds it
+            self._lock = threading.Lock()
+        with self._lock:
+            if pid != self._pid or self._pos + n > len(self._buf):
+                self._buf = secrets.token_bytes(self.size)
+                self._pos = 0
+                self._pid = pid
+            start = self._pos
+            self._pos = start + n
+            return self._buf[start : self._pos]
+
+
 class HexId(IdGenerator):
     def __init__(self, nbytes: int = 4):  # 4 bytes -> 8 hex chars
         self.nbytes = nbytes
+        self._pool = RandomPool()
 
     def new_id(self) -> str:
-        return secrets.token_hex(self.nbytes)[:7]
+        return self._pool.take(self.nbytes).hex()[:7]
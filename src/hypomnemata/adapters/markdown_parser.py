@@ -1,4 +1,5 @@
 import re
+from functools import cache, lru_cache
 
 from ..core.model import (
     Anchor,
@@ -13,128 +14,154 @@ from ..core.model import (
 from ..core.ports import ParserStrategy
 from ..core.utils import slugify
 
-LINK_RE = re.compile(r"\[\[(.*?)\]\]")
-TRANS_RE = re.compile(r"!\[\[(.*?)\]\]")
-HEADING_RE = re.compile(r"^(#{1,6})\s+(.+)$")
-FENCE_START_RE = re.compile(r"^```(.*)$")
 
+# Patterns are compiled on first use rather than at import, so commands that
+# never parse Markdown don't pay for them.
+@cache
+def _heading_re() -> re.Pattern[str]:
+    return re.compile(r"^(#{1,6})\s+(.+)$")
 
+
+@cache
+def _link_re() -> re.Pattern[str]:
+    # Starts with a literal so the regex engine can skip ahead to each "[[";
+    # a leading "!" is checked by hand. ``.`` excludes newlines, so a link
+    # never crosses a line boundary.
+    return re.compile(r"\[\[(.*?)\]\]")
+
+
+@cache
+def _line_re() -> re.Pattern[str]:
+    # Fence and heading markers only; links are scanned separately
+    return re.compile(r"^(?:(?P<fence>```)|#)", re.MULTILINE)
+
+
+@lru_cache(maxsize=4096)
 def _parse_target(spec: str) -> LinkTarget:
     # Handles: id | id#Slug | id#^label | rel:foo|id|Text (rel/text ignored for resolution)
-    # We only resolve by id + optional anchor.
+    # We only resolve by id + optional anchor. Specs repeat heavily across a
+    # vault and LinkTarget is frozen, so results are cached and shared.
     core = spec
-    parts = spec.split("|")
-    if len(parts) == 2:
-        core, _title = parts
-    elif len(parts) == 3:
-        # possibly rel:foo|id|title
-        if parts[0].startswith("rel:"):
-            core = parts[1]
-    if "#^" in core:
-        id_, label = core.split("#^", 1)
+    p1 = spec.find("|")
+    if p1 != -1:
+        p2 = spec.find("|", p1 + 1)
+        if p2 == -1:
+            # id|title
+            core = spec[:p1]
+        elif spec.find("|", p2 + 1) == -1 and spec.startswith("rel:"):
+            # rel:foo|id|title
+            core = spec[p1 + 1 : p2]
+    h = core.find("#^")
+    if h != -1:
         return LinkTarget(
-            id=id_.strip(), anchor=Anchor(kind="block", value=label.strip())
+            id=core[:h].strip(), anchor=Anchor(kind="block", value=core[h + 2 :].strip())
         )
-    elif "#" in core:
-        id_, slug = core.split("#", 1)
+    h = core.find("#")
+    if h != -1:
         return LinkTarget(
-            id=id_.strip(), anchor=Anchor(kind="heading", value=slug.strip())
+            id=core[:h].strip(), anchor=Anchor(kind="heading", value=core[h + 1 :].strip())
         )
+    return LinkTarget(id=core.strip())
+
+
+def _fence_block(start: int, end: int, fence_info: str) -> Block:
+    # Extract label from fence_info (e.g., "python ^label")
+    label = None
+    if "^" in fence_info:
+        for part in fence_info.split():
+            if part.startswith("^") and len(part) > 1:
+                label = BlockLabel(name=part[1:])
+                break
+    return Block(
+        kind="fence",
+        range=Range(start, end),
+        fence_info=fence_info,
+        label=label,
+    )
+
+
+def _heading_block(start: int, end: int, line: str) -> Block | None:
+    heading_match = _heading_re().match(line)
+    if not heading_match:
+        return None
+    heading_text = heading_match.group(2).strip()
+    level = len(heading_match.group(1))
+
+    # Check for label at end of heading
+    label = None
+    words = heading_text.split()
+    if words and words[-1].startswith("^") and len(words[-1]) > 1:
+        label = BlockLabel(name=words[-1][1:])
+        # Remove label from heading_text for slug generation
+        heading_text_for_slug = " ".join(words[:-1])
     else:
-        return LinkTarget(id=core.strip())
+        heading_text_for_slug = heading_text
+
+    slug = slugify(heading_text_for_slug) if heading_text_for_slug else ""
+
+    return Block(
+        kind="heading",
+        range=Range(start, end),
+        heading_text=heading_text,
+        heading_level=level,
+        heading_slug=slug,
+        label=label,
+    )
 
 
 class MarkdownParser(ParserStrategy):
     def parse(self, text: str, id: str) -> NoteBody:
+        """
+        Extract blocks, links and transclusions from ``text``.
+
+        Links are found with a literal-prefixed pattern the regex engine can
+        search quickly; fence and heading markers with a second, line-anchored
+        pass. A link preceded by ``!`` is also recorded as a transclusion.
+        """
         body = NoteBody(raw=text)
-        
-        # Parse blocks (headings, fences, etc.)
-        lines = text.splitlines(keepends=True)
-        offset = 0
+        blocks = body.blocks
+        links = body.links
+        transclusions = body.transclusions
+
+        # Links and line markers never overlap (a link cannot span a line
+        # start), so they are scanned in two independent passes.
+        for m in _link_re().finditer(text):
+            start, end = m.span()
+            target = _parse_target(m.group(1))
+            links.append(Link(source=id, target=target, range=Range(start, end)))
+            if start and text[start - 1] == "!":
+                transclusions.append(Transclusion(target=target, range=Range(start - 1, end)))
+
+        if "#" not in text and "```" not in text:
+            return body
+
         in_fence = False
         fence_start = 0
         fence_info = ""
-        
-        for _i, ln in enumerate(lines):
-            line_stripped = ln.rstrip('\n\r')
-            
-            # Check for fence start/end
-            if line_stripped.startswith("```"):
+
+        for m in _line_re().finditer(text):
+            # Fence or heading marker at the start of a line
+            offset = m.start()
+            eol = text.find("\n", offset)
+            line_end = len(text) if eol == -1 else eol
+            next_offset = len(text) if eol == -1 else eol + 1
+
+            if m.lastgroup == "fence":
                 if not in_fence:
                     # Starting a fence
                     in_fence = True
                     fence_start = offset
-                    fence_match = FENCE_START_RE.match(line_stripped)
-                    fence_info = fence_match.group(1).strip() if fence_match else ""
+                    fence_info = text[m.end() : line_end].strip()
                 else:
                     # Ending a fence
                     in_fence = False
-                    fence_end = offset + len(ln)
-                    
-                    # Extract label from fence_info (e.g., "python ^label")
-                    label = None
-                    if "^" in fence_info:
-                        parts = fence_info.split()
-                        for part in parts:
-                            if part.startswith("^") and len(part) > 1:
-                                label = BlockLabel(name=part[1:])
-                                break
-                    
-                    body.blocks.append(
-                        Block(
-                            kind="fence",
-                            range=Range(fence_start, fence_end),
-                            fence_info=fence_info,
-                            label=label,
-                        )
-                    )
+                    blocks.append(_fence_block(fence_start, next_offset, fence_info))
                     fence_info = ""
-            
-            # Check for heading (only if not in fence)
             elif not in_fence:
-                heading_match = HEADING_RE.match(line_stripped)
-                if heading_match:
-                    hashes = heading_match.group(1)
-                    heading_text = heading_match.group(2).strip()
-                    level = len(hashes)
-                    
-                    # Check for label at end of heading
-                    label = None
-                    words = heading_text.split()
-                    if words and words[-1].startswith("^") and len(words[-1]) > 1:
-                        label = BlockLabel(name=words[-1][1:])
-                        # Remove label from heading_text for slug generation
-                        heading_text_for_slug = " ".join(words[:-1])
-                    else:
-                        heading_text_for_slug = heading_text
-                    
-                    slug = slugify(heading_text_for_slug) if heading_text_for_slug else ""
-                    
-                    body.blocks.append(
-                        Block(
-                            kind="heading",
-                            range=Range(offset, offset + len(ln)),
-                            heading_text=heading_text,
-                            heading_level=level,
-                            heading_slug=slug,
-                            label=label,
-                        )
-                    )
-            
-            offset += len(ln)
-        
-        # Parse links
-        for m in LINK_RE.finditer(text):
-            target = _parse_target(m.group(1))
-            body.links.append(
-                Link(source=id, target=target, range=Range(m.start(), m.end()))
-            )
-        
-        # Parse transclusions
-        for m in TRANS_RE.finditer(text):
-            target = _parse_target(m.group(1))
-            body.transclusions.append(
-                Transclusion(target=target, range=Range(m.start(), m.end()))
-            )
-        
+                block = _heading_block(
+                    offset, next_offset, text[offset:line_end].rstrip("\r")
+                )
+                if block is not None:
+                    blocks.append(block)
+
         return body
@@ -1,28 +1,57 @@
 from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 from ..core.model import Block, Link, LinkTarget, NoteId
 from ..core.ports import Index, LinkResolver
-from ..core.slicer import find_heading_by_slug, find_label
 from ..core.vault import Vault
 
 
 class DefaultResolver(LinkResolver):
     def __init__(self, vault: Vault):
         self.vault = vault
+        # note id -> (block labels, heading slugs), or None if the note doesn't
+        # load; filled on first lookup so each target is read once
+        self._anchors: dict[NoteId, tuple[frozenset[str], frozenset[str]] | None] = {}
+
+    def _target_anchors(self, id: NoteId) -> tuple[frozenset[str], frozenset[str]] | None:
+        if id in self._anchors:
+            return self._anchors[id]
+        note = self.vault.get(id)
+        anchors = _anchor_sets(note.body.blocks) if note else None
+        self._anchors[id] = anchors
+        return anchors
 
     def exists(self, target: LinkTarget) -> bool:
-        return self.vault.get(target.id) is not None
+        return self._target_anchors(target.id) is not None
 
     def anchor_ok(self, target: LinkTarget) -> bool:
         if target.anchor is None:
             return True
-        note = self.vault.get(target.id)
-        if not note:
+        anchors = self._target_anchors(target.id)
+        if anchors is None:
             return False
+        labels, slugs = anchors
         if target.anchor.kind == "block":
-            return find_label(note, target.anchor.value) is not None
+            return target.anchor.value in labels
         # heading anchor
-        return find_heading_by_slug(note, target.anchor.value) is not None
+        return target.anchor.value in slugs
+
+    def invalidate(self, id: NoteId | None = None) -> None:
+        """Drop cached lookups for ``id`` (or all notes) after the vault changes."""
+        if id is None:
+            self._anchors.clear()
+        else:
+            self._anchors.pop(id, None)
+
+
+def _anchor_sets(blocks: list[Block]) -> tuple[frozenset[str], frozenset[str]]:
+    labels = frozenset(b.label.name for b in blocks if b.label)
+    slugs = frozenset(
+        b.heading_slug for b in blocks if b.kind == "heading" and b.heading_slug is not None
+    )
+    return labels, slugs
 
 
 class InMemoryIndex(Index):
@@ -31,19 +60,28 @@ class InMemoryIndex(Index):
         self._links_out: dict[str, list[Link]] = defaultdict(list)
         self._links_in: dict[str, list[Link]] = defaultdict(list)
         self._blocks: dict[str, list[Block]] = defaultdict(list)
+        # Lower-cased note bodies captured by rebuild(); None until then.
+        self._lower_bodies: dict[str, str] | None = None
 
     def rebuild(self, full: bool = False, use_hash: bool = False) -> None:
         self._links_out.clear()
         self._links_in.clear()
         self._blocks.clear()
-        for nid in self.vault.list_ids():
-            note = self.vault.get(nid)
+        lower_bodies: dict[str, str] = {}
+        # Load notes on a thread pool so file reads overlap; the index itself
+        # is filled serially, in list_ids() order.
+        with ThreadPoolExecutor() as ex:
+            notes = list(ex.map(self.vault.get, self.vault.list_ids()))
+        for note in notes:
             if not note:
                 continue
+            nid = note.id
+            lower_bodies[nid] = note.body.raw.lower()
             self._links_out[nid] = note.body.links
             for link in note.body.links:
                 self._links_in[link.target.id].append(link)
             self._blocks[nid] = note.body.blocks
+        self._lower_bodies = lower_bodies
 
     def links_out(self, id: str) -> list[Link]:
         return self._links_out[id]
@@ -54,13 +92,22 @@ class InMemoryIndex(Index):
     def blocks(self, id: str) -> list[Block]:
         return self._blocks[id]
 
-    def search(self, query: str, limit: int = 50) -> list[NoteId]:
+    def iter_search(self, query: str) -> Iterator[NoteId]:
+        """Lazily yield ids of notes containing ``query`` (case-insensitive)."""
         q = query.lower()
-        hits = []
+        if self._lower_bodies is not None:
+            # Built index: scan the cached bodies without touching storage
+            for nid, body in self._lower_bodies.items():
+                if q in body:
+                    yield nid
+            return
         for nid in self.vault.list_ids():
             n = self.vault.get(nid)
             if not n:
                 continue
             if q in n.body.raw.lower():
-                hits.append(nid)
-        return hits[:limit]
+                yield nid
+
+    def search(self, query: str, limit: int = 50) -> list[NoteId]:
+        # Stop reading notes as soon as ``limit`` hits are found
+        return list(islice(self.iter_search(query), limit))
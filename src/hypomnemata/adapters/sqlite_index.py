@@ -1,17 +1,282 @@
 """SQLite-based durable index with FTS5 search and incremental updates."""
 
 import hashlib
-import re
+import os
+import pickle
+import queue
 import sqlite3
+import sys
+import threading
 import time
-from dataclasses import dataclass
+from collections.abc import Iterator
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
-from ..core.model import Block, Link, NoteId
+from ..core.model import Anchor, Block, BlockLabel, Link, LinkTarget, NoteId, Range
 from ..core.ports import Index
 from ..core.vault import Vault
 
+# Notes written per transaction during rebuild/update_notes
+_BATCH_SIZE = 1000
+
+# Ids bound per "IN (?, ...)" lookup, under SQLite's host-parameter limit
+_IN_CHUNK = 500
+
+# WAL pages before SQLite checkpoints on its own (suspended during rebuild)
+_WAL_AUTOCHECKPOINT = 2000
+
+# Dirty notes needed before rebuild parses in worker processes; below this,
+# starting the workers costs more than it saves
+_PARALLEL_MIN_NOTES = 2000
+_PARALLEL_CHUNKSIZE = 32
+
+# Seconds the writer thread waits for more queued updates to commit together
+_WRITER_WINDOW = 0.05
+
+# (changed ids, deleted ids, future for the counts) queued for the writer
+_WriterItem = tuple[set[str], set[str], Future[dict[str, int]]]
+
+SCHEMA_VERSION = "5"
+
+# The rowid is declared explicitly so VACUUM can't renumber it; fts refers to
+# notes rows by rowid.
+_NOTES_DDL = """
+    CREATE TABLE IF NOT EXISTS notes (
+        rowid INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        mtime_ns INTEGER NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        hash TEXT,
+        title TEXT,
+        has_math INTEGER NOT NULL DEFAULT 0,
+        body TEXT NOT NULL DEFAULT ''
+    )
+"""
+
+# External-content FTS5: only the inverted index is stored, the text is read
+# from notes, and the triggers below keep the two in step.
+_FTS_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5(
+        body,
+        title,
+        content = 'notes',
+        content_rowid = 'rowid',
+        tokenize = "unicode61 remove_diacritics 2"
+    )
+"""
+_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO fts (rowid, body, title) VALUES (NEW.rowid, NEW.body, NEW.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO fts (fts, rowid, body, title)
+        VALUES ('delete', OLD.rowid, OLD.body, OLD.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+        INSERT INTO fts (fts, rowid, body, title)
+        VALUES ('delete', OLD.rowid, OLD.body, OLD.title);
+        INSERT INTO fts (rowid, body, title) VALUES (NEW.rowid, NEW.body, NEW.title);
+    END
+    """,
+)
+
+# kv's rowid is explicit for the same reason: alias_fts refers to it
+_KV_DDL = """
+    CREATE TABLE IF NOT EXISTS kv (
+        rowid INTEGER PRIMARY KEY,
+        note_id TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT,
+        FOREIGN KEY (note_id) REFERENCES notes(id) ON DELETE CASCADE
+    )
+"""
+
+# Contentless FTS5 over alias values, so alias lookups match tokens through
+# an index instead of scanning kv with LIKE '%...%'. Rows are kv rowids.
+_ALIAS_FTS_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS alias_fts USING fts5(
+        value,
+        content = '',
+        tokenize = "unicode61 remove_diacritics 2"
+    )
+"""
+_ALIAS_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS kv_ai AFTER INSERT ON kv
+    WHEN NEW.key = 'core/alias' BEGIN
+        INSERT INTO alias_fts (rowid, value) VALUES (NEW.rowid, NEW.value);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS kv_ad AFTER DELETE ON kv
+    WHEN OLD.key = 'core/alias' BEGIN
+        INSERT INTO alias_fts (alias_fts, rowid, value) VALUES ('delete', OLD.rowid, OLD.value);
+    END
+    """,
+)
+
+# A parsed note ready to write: (notes row, block rows, link rows, kv rows)
+_NoteRows = tuple[
+    tuple[Any, ...], list[tuple[Any, ...]], list[tuple[Any, ...]], list[tuple[Any, ...]]
+]
+
+# Secondary indexes a full rebuild drops and builds once after its inserts,
+# rather than updating them row by row in random key order. The kv (note_id,
+# key) index stays: the cascade from each note's delete looks rows up by it.
+_REBUILD_INDEXES = {
+    "links_dst_idx": "links(dst)",
+    "links_src_idx": "links(src)",
+    "blocks_label_idx": "blocks(note_id, label)",
+    "blocks_slug_idx": "blocks(note_id, slug)",
+    "kv_key_value_idx": "kv(key, value)",
+}
+
+# Per-note write statements, shared so sqlite3's statement cache can reuse
+# the prepared forms across notes
+_DELETE_NOTE = "DELETE FROM notes WHERE id = ?"
+_INSERT_NOTE = """
+    INSERT INTO notes (id, mtime_ns, size_bytes, hash, title, has_math, body)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_INSERT_BLOCK = """
+    INSERT INTO blocks (note_id, kind, start, end, level, slug, label)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_INSERT_LINK = """
+    INSERT INTO links (src, dst, start, end, rel, anchor_kind, anchor_value)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_INSERT_KV = "INSERT INTO kv (note_id, key, value) VALUES (?, ?, ?)"
+
+# Search statements; the snippet query runs once per hit, so its prepared form
+# is reused from the connection's statement cache
+_SEARCH_SQL = """
+    SELECT notes.id FROM fts
+    JOIN notes ON notes.rowid = fts.rowid
+    WHERE fts MATCH ?
+    ORDER BY fts.rank
+    LIMIT ?
+"""
+_SEARCH_SNIPPETS_SQL = """
+    SELECT notes.id, snippet(fts, 0, '<b>', '</b>', ' … ', 64)
+    FROM fts
+    JOIN notes ON notes.rowid = fts.rowid
+    WHERE fts MATCH ?
+    ORDER BY fts.rank
+    LIMIT ?
+"""
+# FTS hits in rank order, then notes with a matching alias that the FTS
+# match didn't already return
+_SEARCH_ALIASES_SQL = """
+    WITH hits AS (
+        SELECT notes.id AS id, fts.rank AS rank FROM fts
+        JOIN notes ON notes.rowid = fts.rowid
+        WHERE fts MATCH ?
+        ORDER BY fts.rank
+        LIMIT ?
+    )
+    SELECT id FROM (
+        SELECT id, 0 AS grp, rank AS ord FROM hits
+        UNION ALL
+        SELECT kv.note_id, 1, MIN(kv.value) FROM alias_fts
+        JOIN kv ON kv.rowid = alias_fts.rowid
+        WHERE alias_fts MATCH ? AND kv.note_id NOT IN (SELECT id FROM hits)
+        GROUP BY kv.note_id
+    )
+    ORDER BY grp, ord
+"""
+_MATCH_TITLES_SQL = """
+    SELECT notes.id, notes.title FROM fts
+    JOIN notes ON notes.rowid = fts.rowid
+    WHERE fts MATCH ?
+    ORDER BY fts.rank
+    LIMIT ?
+"""
+_MATCH_ALIASES_SQL = """
+    SELECT kv.note_id, kv.value FROM alias_fts
+    JOIN kv ON kv.rowid = alias_fts.rowid
+    WHERE alias_fts MATCH ?
+    ORDER BY alias_fts.rank
+    LIMIT ?
+"""
+_SNIPPET_SQL = """
+    SELECT snippet(fts, 0, '<b>', '</b>', ' … ', 64)
+    FROM fts
+    WHERE fts.rowid = (SELECT rowid FROM notes WHERE id = ?) AND fts MATCH ?
+"""
+
+
+# Notes with no outgoing or incoming links; each NOT EXISTS is a probe of
+# links_src_idx / links_dst_idx rather than a scan of links
+_ORPHAN_WHERE = """
+    NOT EXISTS (SELECT 1 FROM links WHERE links.src = notes.id)
+    AND NOT EXISTS (SELECT 1 FROM links WHERE links.dst = notes.id)
+"""
+_COUNTS_SQL = f"""
+    SELECT
+        (SELECT COUNT(*) FROM notes),
+        (SELECT COUNT(*) FROM links),
+        (SELECT COUNT(*) FROM notes WHERE {_ORPHAN_WHERE})
+"""
+
+
+# Links to notes that aren't indexed ('dead') or whose anchor matches no
+# block label / heading slug in the target ('anchor'), in note order
+_LINK_PROBLEMS_SQL = """
+    SELECT links.src, links.start, links.end, links.dst,
+           CASE WHEN notes.id IS NULL THEN 'dead' ELSE 'anchor' END
+    FROM links
+    LEFT JOIN notes ON notes.id = links.dst
+    WHERE notes.id IS NULL
+       OR (links.anchor_kind = 'block' AND NOT EXISTS (
+            SELECT 1 FROM blocks
+            WHERE blocks.note_id = links.dst AND blocks.label = links.anchor_value))
+       OR (links.anchor_kind != 'block' AND NOT EXISTS (
+            SELECT 1 FROM blocks
+            WHERE blocks.note_id = links.dst AND blocks.kind = 'heading'
+              AND blocks.slug = links.anchor_value))
+    ORDER BY links.src, links.start
+"""
+
+
+def _prefix_phrase(text: str) -> str:
+    """Quote text as an FTS5 phrase whose last token matches as a prefix."""
+    return '"' + text.replace('"', '""') + '"*'
+
+
+# Index used by a rebuild worker process to parse notes (set by _init_worker)
+_worker_index: "SQLiteIndex | None" = None
+
+
+def _init_worker(db_path: Path, vault_path: Path, vault: Vault) -> None:
+    global _worker_index
+    _worker_index = SQLiteIndex(db_path=db_path, vault_path=vault_path, vault=vault)
+
+
+def _prepare_in_worker(
+    job: tuple[str, bool, tuple[int, int] | None, str | None],
+) -> _NoteRows | None:
+    assert _worker_index is not None
+    return _worker_index._prepare_note(*job)
+
+
+def _sha256_file(path: str) -> str:
+    """Hex SHA256 of a file, streamed rather than read into one bytes object."""
+    with open(path, "rb") as f:
+        if sys.version_info >= (3, 11):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+        return h.hexdigest()
+
 
 @dataclass
 class SQLiteIndex(Index):
@@ -24,15 +289,81 @@ class SQLiteIndex(Index):
     db_path: Path
     vault_path: Path
     vault: Vault
+    _cached_conn: sqlite3.Connection | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Background writer for update_notes/submit_updates, started on first use
+    _writer: threading.Thread | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _writer_queue: queue.Queue[_WriterItem | None] = field(
+        default_factory=queue.Queue, init=False, repr=False, compare=False
+    )
+    _writer_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+    # note id -> (mtime_ns, size_bytes, sha256) for the rebuild in progress
+    _hash_cache: dict[str, tuple[int, int, str]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # vault_path as a plain string, for os.path.join in per-note file access
+    _vault_root: str = field(default="", init=False, repr=False, compare=False)
+    # Set when the cached connection opens; keeps graph_version() values from
+    # repeating across connections (and processes)
+    _conn_epoch: str = field(default="", init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        self._vault_root = os.fspath(self.vault_path)
     
     def _conn(self) -> sqlite3.Connection:
-        """Get a connection to the SQLite database."""
+        """Open a new connection to the SQLite database (caller closes it)."""
         conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        # Both only apply to a new database and must precede the WAL switch
+        # (page_size first); an existing one adopts auto_vacuum on VACUUM
+        conn.execute("PRAGMA page_size=8192")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
         conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("PRAGMA synchronous=NORMAL")
         conn.execute("PRAGMA temp_store=MEMORY")
+        # Read-mostly workload: keep hot pages in a 64 MiB cache and map up to
+        # 256 MiB of the file instead of copying pages through read()
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute(f"PRAGMA wal_autocheckpoint={_WAL_AUTOCHECKPOINT}")
+        # Off by default in SQLite; deleting a notes row relies on the
+        # cascades to blocks/links/kv (and the notes_ad trigger for FTS)
+        conn.execute("PRAGMA foreign_keys=ON")
         return conn
     
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get the index's own connection, opened and configured on first use."""
+        if self._cached_conn is None:
+            conn = self._conn() if self.db_path.exists() else None
+            # Queries assume the current schema: a missing, older or unreadable
+            # DB is created, migrated or replaced before the first one runs
+            if conn is None or self._stored_schema_version(conn) != SCHEMA_VERSION:
+                if conn is not None:
+                    conn.close()
+                self._ensure_schema()
+                conn = self._conn()
+            conn.execute("PRAGMA busy_timeout=3000")
+            self._cached_conn = conn
+            self._conn_epoch = f"{time.time_ns():x}"
+        return self._cached_conn
+    
+    def close(self) -> None:
+        """Stop the writer thread and close the cached connection, if open."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                # Queued updates ahead of the sentinel are still written
+                self._writer_queue.put(None)
+        if writer is not None:
+            writer.join()
+        if self._cached_conn is not None:
+            self._cached_conn.close()
+            self._cached_conn = None
+    
     def _init_schema(self) -> None:
         """Create tables if they don't exist."""
         conn = self._conn()
@@ -46,16 +377,7 @@ class SQLiteIndex(Index):
             """)
             
             # Notes table
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS notes (
-                    id TEXT PRIMARY KEY,
-                    mtime_ns INTEGER NOT NULL,
-                    size_bytes INTEGER NOT NULL,
-                    hash TEXT,
-                    title TEXT,
-                    has_math INTEGER NOT NULL DEFAULT 0
-                )
-            """)
+            conn.execute(_NOTES_DDL)
             
             # Blocks table
             conn.execute("""
@@ -88,14 +410,7 @@ class SQLiteIndex(Index):
             """)
             
             # KV table for metadata
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS kv (
-                    note_id TEXT NOT NULL,
-                    key TEXT NOT NULL,
-                    value TEXT,
-                    FOREIGN KEY (note_id) REFERENCES notes(id) ON DELETE CASCADE
-                )
-            """)
+            conn.execute(_KV_DDL)
             
             # Create index for kv lookups
             conn.execute("""
@@ -105,15 +420,9 @@ class SQLiteIndex(Index):
                 CREATE INDEX IF NOT EXISTS kv_key_value_idx ON kv(key, value)
             """)
             
-            # FTS5 virtual table
-            conn.execute("""
-                CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5(
-                    id UNINDEXED,
-                    body,
-                    title,
-                    tokenize = "unicode61 remove_diacritics 2"
-                )
-            """)
+            # FTS5 index over notes.body/title (external content)
+            conn.execute(_FTS_DDL)
+            conn.execute(_ALIAS_FTS_DDL)
             
             # Create indexes
             conn.execute("CREATE INDEX IF NOT EXISTS links_dst_idx ON links(dst)")
@@ -121,16 +430,33 @@ class SQLiteIndex(Index):
             conn.execute("CREATE INDEX IF NOT EXISTS blocks_label_idx ON blocks(note_id, label)")
             conn.execute("CREATE INDEX IF NOT EXISTS blocks_slug_idx ON blocks(note_id, slug)")
             
+            # FTS rows aren't foreign-key children; triggers keep them in step
+            for trigger in (*_FTS_TRIGGERS, *_ALIAS_FTS_TRIGGERS):
+                conn.execute(trigger)
+            
             # Set schema version
-            conn.execute("""
-                INSERT INTO meta(key, value) VALUES('schema_version', '2')
+            conn.execute(
+                """
+                INSERT INTO meta(key, value) VALUES('schema_version', ?)
                 ON CONFLICT(key) DO UPDATE SET value=excluded.value
-            """)
+                """,
+                (SCHEMA_VERSION,),
+            )
             
             conn.commit()
         finally:
             conn.close()
     
+    def _stored_schema_version(self, conn: sqlite3.Connection) -> str | None:
+        """The DB's recorded schema version, or None if it has none or can't be read."""
+        try:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'"
+            ).fetchone()
+        except sqlite3.DatabaseError:
+            return None
+        return str(row[0]) if row else None
+    
     def _migrate_schema(self, conn: sqlite3.Connection) -> None:
         """Migrate schema from older versions."""
         # Get current schema version
@@ -175,6 +501,137 @@ class SQLiteIndex(Index):
                 conn.commit()
             except Exception as e:
                 print(f"Warning: Schema migration failed: {e}")
+        
+        # Migrate from v2 to v3: note bodies move into notes and fts becomes an
+        # external-content index over them
+        if current_version < 3:
+            try:
+                self._migrate_to_v3(conn)
+            except Exception as e:
+                conn.rollback()
+                print(f"Warning: Schema migration failed: {e}")
+        
+        # Migrate from v3 to v4: kv gets a stable rowid and alias_fts indexes
+        # the alias values by it
+        if current_version < 4:
+            try:
+                self._migrate_to_v4(conn)
+            except Exception as e:
+                conn.rollback()
+                print(f"Warning: Schema migration failed: {e}")
+        
+        # Migrate from v4 to v5: kv also records frontmatter ids
+        if current_version < 5:
+            try:
+                self._migrate_to_v5(conn)
+            except Exception as e:
+                conn.rollback()
+                print(f"Warning: Schema migration failed: {e}")
+    
+    def _migrate_to_v3(self, conn: sqlite3.Connection) -> None:
+        """Rebuild notes with a body column and re-create fts over it."""
+        has_notes = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes'"
+        ).fetchone()
+        if not has_notes:
+            # Fresh database; _init_schema creates everything
+            return
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(notes)")}
+        
+        # Dropping notes must not cascade into the child tables
+        conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if "body" not in columns:
+                # Bodies were only stored in the old fts table
+                conn.execute("DROP TRIGGER IF EXISTS notes_ad")
+                conn.execute("""
+                    CREATE TEMP TABLE old_notes AS
+                    SELECT n.id, n.mtime_ns, n.size_bytes, n.hash, n.title, n.has_math,
+                           COALESCE(f.body, '') AS body
+                    FROM notes n LEFT JOIN fts f ON f.id = n.id
+                """)
+                conn.execute("DROP TABLE notes")
+                conn.execute("DROP TABLE IF EXISTS fts")
+                conn.execute(_NOTES_DDL)
+                conn.execute("""
+                    INSERT INTO notes (id, mtime_ns, size_bytes, hash, title, has_math, body)
+                    SELECT id, mtime_ns, size_bytes, hash, title, has_math, body FROM old_notes
+                """)
+                conn.execute("DROP TABLE old_notes")
+                conn.execute(_FTS_DDL)
+                conn.execute("INSERT INTO fts(fts) VALUES('rebuild')")
+                for trigger in _FTS_TRIGGERS:
+                    conn.execute(trigger)
+            
+            # Cascades weren't enforced before v3, so rows for removed notes
+            # may have been left behind
+            conn.execute("DELETE FROM blocks WHERE note_id NOT IN (SELECT id FROM notes)")
+            conn.execute("DELETE FROM links WHERE src NOT IN (SELECT id FROM notes)")
+            conn.execute("DELETE FROM kv WHERE note_id NOT IN (SELECT id FROM notes)")
+            conn.execute("""
+                INSERT INTO meta(key, value) VALUES('schema_version', '3')
+                ON CONFLICT(key) DO UPDATE SET value=excluded.value
+            """)
+            conn.commit()
+        finally:
+            conn.execute("PRAGMA foreign_keys=ON")
+    
+    def _migrate_to_v4(self, conn: sqlite3.Connection) -> None:
+        """Rebuild kv with an explicit rowid and index its aliases in alias_fts."""
+        has_kv = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'kv'"
+        ).fetchone()
+        if not has_kv:
+            # Fresh database; _init_schema creates everything
+            return
+        
+        conn.execute("PRAGMA foreign_keys=OFF")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("ALTER TABLE kv RENAME TO old_kv")
+            conn.execute(_KV_DDL)
+            conn.execute(
+                "INSERT INTO kv (note_id, key, value) SELECT note_id, key, value FROM old_kv"
+            )
+            conn.execute("DROP TABLE old_kv")
+            conn.execute("CREATE INDEX IF NOT EXISTS kv_note_key_idx ON kv(note_id, key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS kv_key_value_idx ON kv(key, value)")
+            conn.execute("DROP TABLE IF EXISTS alias_fts")
+            conn.execute(_ALIAS_FTS_DDL)
+            conn.execute("""
+                INSERT INTO alias_fts (rowid, value)
+                SELECT rowid, value FROM kv WHERE key = 'core/alias'
+            """)
+            for trigger in _ALIAS_FTS_TRIGGERS:
+                conn.execute(trigger)
+            conn.execute("""
+                INSERT INTO meta(key, value) VALUES('schema_version', '4')
+                ON CONFLICT(key) DO UPDATE SET value=excluded.value
+            """)
+            conn.commit()
+        finally:
+            conn.execute("PRAGMA foreign_keys=ON")
+    
+    def _migrate_to_v5(self, conn: sqlite3.Connection) -> None:
+        """Mark every note dirty so the next rebuild stores frontmatter ids in kv."""
+        has_notes = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes'"
+        ).fetchone()
+        if not has_notes:
+            # Fresh database; _init_schema creates everything
+            return
+        
+        # A zero mtime never matches the file, so _is_dirty re-parses the note
+        conn.execute("UPDATE notes SET mtime_ns = 0")
+        conn.execute(
+            """
+            INSERT INTO meta(key, value) VALUES('schema_version', ?)
+            ON CONFLICT(key) DO UPDATE SET value=excluded.value
+            """,
+            (SCHEMA_VERSION,),
+        )
+        conn.commit()
     
     def _ensure_schema(self) -> None:
         """Ensure DB exists and schema is initialized."""
@@ -193,6 +650,7 @@ class SQLiteIndex(Index):
                 conn.close()
             except sqlite3.DatabaseError:
                 # DB is corrupt, backup and recreate
+                self.close()
                 timestamp = int(time.time())
                 backup_path = self.db_path.with_suffix(f".bad-{timestamp}.sqlite")
                 self.db_path.rename(backup_path)
@@ -202,47 +660,80 @@ class SQLiteIndex(Index):
     
     def _get_file_stats(self, note_id: str) -> tuple[int, int] | None:
         """Get mtime_ns and size_bytes for a note file, or None if not found."""
-        file_path = self.vault_path / f"{note_id}.md"
-        if not file_path.exists():
+        try:
+            stat = os.stat(os.path.join(self._vault_root, note_id + ".md"))
+        except FileNotFoundError:
             return None
-        stat = file_path.stat()
         return (stat.st_mtime_ns, stat.st_size)
     
-    def _compute_hash(self, note_id: str) -> str | None:
-        """Compute SHA256 hash of a note file."""
-        file_path = self.vault_path / f"{note_id}.md"
-        if not file_path.exists():
+    def _compute_hash(
+        self, note_id: str, stats: tuple[int, int] | None = None
+    ) -> str | None:
+        """
+        Compute SHA256 hash of a note file.
+        
+        Digests are remembered against the file's (mtime_ns, size) for the
+        current rebuild, so a note that is checked and then indexed is only
+        read and hashed once.
+        """
+        if stats is None:
+            stats = self._get_file_stats(note_id)
+            if stats is None:
+                return None
+        cached = self._hash_cache.get(note_id)
+        if cached is not None and cached[:2] == stats:
+            return cached[2]
+        try:
+            digest = _sha256_file(os.path.join(self._vault_root, note_id + ".md"))
+        except FileNotFoundError:
             return None
-        return hashlib.sha256(file_path.read_bytes()).hexdigest()
+        self._hash_cache[note_id] = (stats[0], stats[1], digest)
+        return digest
+    
+    def _scan_file_stats(self) -> dict[str, tuple[int, int]]:
+        """Get (mtime_ns, size_bytes) for every note file in one directory pass."""
+        stats: dict[str, tuple[int, int]] = {}
+        try:
+            with os.scandir(self._vault_root) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.endswith(".md") and entry.is_file():
+                        st = entry.stat()
+                        stats[name[:-3]] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            pass
+        return stats
     
-    def _is_dirty(self, note_id: str, use_hash: bool, conn: sqlite3.Connection) -> bool:
-        """Check if a note needs reindexing."""
-        stats = self._get_file_stats(note_id)
+    def _is_dirty(
+        self,
+        note_id: str,
+        use_hash: bool,
+        stats: tuple[int, int] | None,
+        record: tuple[int, int, str | None] | None,
+    ) -> bool:
+        """
+        Check if a note needs reindexing.
+        
+        ``stats`` is the file's (mtime_ns, size_bytes) and ``record`` the
+        note's (mtime_ns, size_bytes, hash) row from the DB, if any.
+        """
         if stats is None:
             # File doesn't exist, not dirty (will be handled as removed)
             return False
         
-        mtime_ns, size_bytes = stats
-        
-        # Check DB for existing record
-        row = conn.execute(
-            "SELECT mtime_ns, size_bytes, hash FROM notes WHERE id = ?",
-            (note_id,)
-        ).fetchone()
-        
-        if row is None:
+        if record is None:
             # Not in DB, definitely dirty
             return True
         
-        db_mtime, db_size, db_hash = row
+        db_mtime, db_size, db_hash = record
         
         # Quick check: mtime or size changed
-        if db_mtime != mtime_ns or db_size != size_bytes:
+        if (db_mtime, db_size) != stats:
             return True
         
         # Optional hash check for certainty
         if use_hash:
-            current_hash = self._compute_hash(note_id)
+            current_hash = self._compute_hash(note_id, stats)
             if current_hash != db_hash:
                 return True
         
@@ -263,146 +754,202 @@ class SQLiteIndex(Index):
             if block.kind == "heading" and block.heading_text:
                 return str(block.heading_text)
         
-        # Try first non-empty line
-        for line in note.body.raw.splitlines():
-            stripped = line.strip()
-            if stripped and not stripped.startswith("---"):
-                return str(stripped)
+        # Try first non-empty line, scanning only as far as needed
+        raw: str = note.body.raw
+        n = len(raw)
+        i = 0
+        while i < n:
+            j = raw.find("\n", i)
+            if j == -1:
+                j = n
+            # splitlines() so other line boundaries (\r, \x0b, ...) still count
+            for line in raw[i:j].splitlines():
+                stripped = line.strip()
+                if stripped and not stripped.startswith("---"):
+                    return stripped
+            i = j + 1
         
         return ""
     
     def _detect_math(self, body_raw: str) -> bool:
         """Detect if note contains math expressions."""
-        if "$" not in body_raw:
-            return False
         # Simple check for unescaped $ signs
-        return bool(re.search(r'(?<!\\)\$', body_raw))
+        i = body_raw.find("$")
+        while i != -1:
+            if i == 0 or body_raw[i - 1] != "\\":
+                return True
+            i = body_raw.find("$", i + 1)
+        return False
     
-    def _index_note(self, note_id: str, use_hash: bool, conn: sqlite3.Connection) -> bool:
+    def _index_note(
+        self,
+        note_id: str,
+        use_hash: bool,
+        conn: sqlite3.Connection,
+        stats: tuple[int, int] | None = None,
+    ) -> bool:
         """Index a single note. Returns True on success, False on error."""
+        rows = self._prepare_note(note_id, use_hash, stats)
+        return rows is not None and self._write_note(conn, note_id, rows)
+    
+    def _prepare_note(
+        self,
+        note_id: str,
+        use_hash: bool,
+        stats: tuple[int, int] | None = None,
+        file_hash: str | None = None,
+    ) -> _NoteRows | None:
+        """
+        Load and parse a note into the rows ``_write_note`` inserts.
+        
+        Touches no database state, so rebuild can run it in worker processes.
+        Returns None if the note can't be loaded.
+        """
         try:
             # Load note
             note = self.vault.get(note_id)
             if note is None:
-                return False
+                return None
             
-            # Get file stats
-            stats = self._get_file_stats(note_id)
+            # Get file stats, unless the caller already has them
             if stats is None:
-                return False
+                stats = self._get_file_stats(note_id)
+                if stats is None:
+                    return None
             mtime_ns, size_bytes = stats
             
             # Compute hash if requested
-            file_hash = self._compute_hash(note_id) if use_hash else None
+            if use_hash and file_hash is None:
+                file_hash = self._compute_hash(note_id, stats)
             
             # Extract title and detect math
             title = self._extract_title(note)
             has_math = 1 if self._detect_math(note.body.raw) else 0
             
-            # Begin transaction
-            conn.execute("BEGIN IMMEDIATE")
-            
-            try:
-                # Upsert into notes table
-                conn.execute("""
-                    INSERT INTO notes (id, mtime_ns, size_bytes, hash, title, has_math)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(id) DO UPDATE SET
-                        mtime_ns = excluded.mtime_ns,
-                        size_bytes = excluded.size_bytes,
-                        hash = excluded.hash,
-                        title = excluded.title,
-                        has_math = excluded.has_math
-                """, (note_id, mtime_ns, size_bytes, file_hash, title, has_math))
-                
-                # Delete existing blocks and links
-                conn.execute("DELETE FROM blocks WHERE note_id = ?", (note_id,))
-                conn.execute("DELETE FROM links WHERE src = ?", (note_id,))
-                conn.execute("DELETE FROM kv WHERE note_id = ?", (note_id,))
-                
-                # Insert blocks
-                for block in note.body.blocks:
-                    label_name = block.label.name if block.label else None
-                    conn.execute("""
-                        INSERT INTO blocks (note_id, kind, start, end, level, slug, label)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        note_id,
-                        block.kind,
-                        block.range.start,
-                        block.range.end,
-                        block.heading_level,
-                        block.heading_slug,
-                        label_name
-                    ))
-                
-                # Insert links
-                for link in note.body.links:
-                    anchor_kind = link.target.anchor.kind if link.target.anchor else None
-                    anchor_value = link.target.anchor.value if link.target.anchor else None
-                    link_start = link.range.start if link.range else 0
-                    link_end = link.range.end if link.range else 0
-                    
-                    conn.execute("""
-                        INSERT INTO links (src, dst, start, end, rel, anchor_kind, anchor_value)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        note_id,
-                        link.target.id,
-                        link_start,
-                        link_end,
-                        link.target.rel,
-                        anchor_kind,
-                        anchor_value
-                    ))
-                
-                # Extract and insert aliases from core/aliases metadata
-                if "core/aliases" in note.meta:
-                    aliases = note.meta["core/aliases"]
-                    if isinstance(aliases, list):
-                        for alias in aliases:
-                            if isinstance(alias, str):
-                                conn.execute("""
-                                    INSERT INTO kv (note_id, key, value)
-                                    VALUES (?, ?, ?)
-                                """, (note_id, "core/alias", alias))
-                
-                # Update FTS
-                # Delete old entry
-                conn.execute("DELETE FROM fts WHERE id = ?", (note_id,))
-                # Insert new entry
-                conn.execute(
-                    "INSERT INTO fts (id, body, title) VALUES (?, ?, ?)",
-                    (note_id, note.body.raw, title)
+            note_row = (note_id, mtime_ns, size_bytes, file_hash, title, has_math, note.body.raw)
+            block_rows = [
+                (
+                    note_id,
+                    block.kind,
+                    block.range.start,
+                    block.range.end,
+                    block.heading_level,
+                    block.heading_slug,
+                    block.label.name if block.label else None,
                 )
-                
-                # Commit transaction
-                conn.commit()
-                return True
-                
-            except Exception as e:
-                conn.rollback()
-                print(f"Warning: Failed to index {note_id}: {e}")
-                return False
-                
+                for block in note.body.blocks
+            ]
+            link_rows = [
+                (
+                    note_id,
+                    link.target.id,
+                    link.range.start if link.range else 0,
+                    link.range.end if link.range else 0,
+                    link.target.rel,
+                    link.target.anchor.kind if link.target.anchor else None,
+                    link.target.anchor.value if link.target.anchor else None,
+                )
+                for link in note.body.links
+            ]
+            
+            # Aliases from core/aliases metadata
+            kv_rows: list[tuple[Any, ...]] = []
+            if "core/aliases" in note.meta:
+                aliases = note.meta["core/aliases"]
+                if isinstance(aliases, list):
+                    kv_rows = [
+                        (note_id, "core/alias", alias)
+                        for alias in aliases
+                        if isinstance(alias, str)
+                    ]
+            # Frontmatter id, so lint can compare it with the filename in SQL
+            if "id" in note.meta:
+                kv_rows.append((note_id, "id", str(note.meta["id"])))
+            
+            return note_row, block_rows, link_rows, kv_rows
+            
         except Exception as e:
             print(f"Warning: Failed to load {note_id}: {e}")
+            return None
+    
+    def _write_note(self, conn: sqlite3.Connection, note_id: str, rows: _NoteRows) -> bool:
+        """Write a prepared note's rows. Returns True on success, False on error."""
+        note_row, block_rows, link_rows, kv_rows = rows
+        
+        # The caller owns the transaction; a savepoint keeps one bad note
+        # from rolling back the rest of the batch.
+        conn.execute("SAVEPOINT index_note")
+        
+        try:
+            # Replace the notes row; the delete cascades to the note's
+            # blocks, links and kv rows, and the triggers reindex FTS
+            conn.execute(_DELETE_NOTE, (note_id,))
+            conn.execute(_INSERT_NOTE, note_row)
+            
+            # Insert blocks, links and aliases, one executemany per table
+            conn.executemany(_INSERT_BLOCK, block_rows)
+            conn.executemany(_INSERT_LINK, link_rows)
+            conn.executemany(_INSERT_KV, kv_rows)
+            
+            conn.execute("RELEASE index_note")
+            return True
+            
+        except Exception as e:
+            conn.execute("ROLLBACK TO index_note")
+            conn.execute("RELEASE index_note")
+            print(f"Warning: Failed to index {note_id}: {e}")
             return False
     
-    def rebuild(self, full: bool = False, use_hash: bool = False) -> dict[str, int]:
+    def _prepare_notes(
+        self, jobs: list[tuple[str, bool, tuple[int, int] | None, str | None]]
+    ) -> Iterator[_NoteRows | None]:
+        """
+        Prepare ``_prepare_note`` argument tuples in order.
+        
+        Large batches are parsed in worker processes; SQLite writes stay with
+        the caller.
+        """
+        if len(jobs) >= _PARALLEL_MIN_NOTES and (os.cpu_count() or 1) > 1:
+            try:
+                pickle.dumps(self.vault)
+            except Exception:
+                # Custom storage/parser/codec that can't be sent to a worker
+                pass
+            else:
+                # Imported here: multiprocessing (and subprocess with it) is
+                # only worth loading once a batch is big enough to fan out
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                
+                # spawn, not fork: the index may be running a writer thread
+                with ProcessPoolExecutor(
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.db_path, self.vault_path, self.vault),
+                ) as pool:
+                    yield from pool.map(_prepare_in_worker, jobs, chunksize=_PARALLEL_CHUNKSIZE)
+                return
+        for job in jobs:
+            yield self._prepare_note(*job)
+    
+    def rebuild(
+        self, full: bool = False, use_hash: bool = False, vacuum: bool = False
+    ) -> dict[str, int]:
         """
         Rebuild or update the index.
         
         Args:
             full: If True, force full rebuild. Otherwise incremental.
             use_hash: If True, use SHA256 hash for change detection.
+            vacuum: If True (and full), VACUUM the database afterwards.
         
         Returns:
             Dictionary with counts: scanned, dirty, inserted, updated, removed, failed
         """
         self._ensure_schema()
         
-        conn = self._conn()
+        conn = self._get_conn()
+        self._hash_cache.clear()
         
         try:
             counts = {
@@ -418,51 +965,97 @@ class SQLiteIndex(Index):
             file_ids = set(self.vault.list_ids())
             counts["scanned"] = len(file_ids)
             
-            # Get all note IDs from DB
-            db_ids = set(
-                row[0] for row in conn.execute("SELECT id FROM notes").fetchall()
-            )
+            # One directory pass for file stats and one query for what the DB
+            # recorded, instead of a stat and a SELECT per note
+            file_stats = self._scan_file_stats()
+            db_meta: dict[str, tuple[int, int, str | None]] = {
+                row[0]: (row[1], row[2], row[3])
+                for row in conn.execute("SELECT id, mtime_ns, size_bytes, hash FROM notes")
+            }
+            db_ids = db_meta.keys()
+            
+            # Writes are batched: one transaction per _BATCH_SIZE notes. Auto-
+            # checkpoints are suspended so they don't stall a commit mid-way;
+            # the WAL is checkpointed between batches and truncated at the end.
+            conn.execute("PRAGMA wal_autocheckpoint=0")
+            conn.execute("BEGIN IMMEDIATE")
+            if full:
+                for name in _REBUILD_INDEXES:
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
             
             # Find notes to remove (in DB but not on filesystem)
             removed_ids = db_ids - file_ids
-            for note_id in removed_ids:
-                conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
-                conn.execute("DELETE FROM fts WHERE id = ?", (note_id,))
-                counts["removed"] += 1
-            conn.commit()
+            self._delete_notes(conn, removed_ids)
+            counts["removed"] += len(removed_ids)
             
-            # Process each file
+            # Collect the notes to (re)index, then parse and write them in order
+            jobs: list[tuple[str, bool, tuple[int, int] | None, str | None]] = []
             for note_id in file_ids:
-                is_new = note_id not in db_ids
+                stats = file_stats.get(note_id) or self._get_file_stats(note_id)
                 
                 # Check if dirty (or full rebuild)
-                if full or self._is_dirty(note_id, use_hash, conn):
-                    counts["dirty"] += 1
-                    
-                    # Index the note
-                    success = self._index_note(note_id, use_hash, conn)
-                    if success:
-                        if is_new:
-                            counts["inserted"] += 1
-                        else:
-                            counts["updated"] += 1
+                if full or self._is_dirty(note_id, use_hash, stats, db_meta.get(note_id)):
+                    # A digest taken by the dirty check is passed along
+                    cached = self._hash_cache.get(note_id) if use_hash else None
+                    file_hash = cached[2] if cached and cached[:2] == stats else None
+                    jobs.append((note_id, use_hash, stats, file_hash))
+            counts["dirty"] = len(jobs)
+            
+            pending = 0
+            for job, rows in zip(jobs, self._prepare_notes(jobs), strict=True):
+                note_id = job[0]
+                if rows is not None and self._write_note(conn, note_id, rows):
+                    if note_id in db_ids:
+                        counts["updated"] += 1
                     else:
-                        counts["failed"] += 1
+                        counts["inserted"] += 1
+                else:
+                    counts["failed"] += 1
+                
+                pending += 1
+                if pending >= _BATCH_SIZE:
+                    conn.commit()
+                    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                    conn.execute("BEGIN IMMEDIATE")
+                    pending = 0
+            if full:
+                self._create_rebuild_indexes(conn)
+            conn.commit()
             
-            # Vacuum and analyze after full rebuild
+            # VACUUM rewrites the whole file, so it only runs on request;
+            # freed pages are otherwise returned incrementally
             if full:
-                conn.execute("VACUUM")
-                conn.execute("ANALYZE")
+                if vacuum:
+                    conn.execute("VACUUM")
+                else:
+                    conn.execute("PRAGMA incremental_vacuum")
+            conn.execute("PRAGMA optimize")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
             
             return counts
             
         finally:
-            conn.close()
+            self._hash_cache.clear()
+            # Only reached with an open transaction if indexing raised
+            if conn.in_transaction:
+                conn.rollback()
+            # Batches committed before a failure left the indexes dropped
+            if full:
+                self._create_rebuild_indexes(conn)
+            conn.execute(f"PRAGMA wal_autocheckpoint={_WAL_AUTOCHECKPOINT}")
+    
+    def _create_rebuild_indexes(self, conn: sqlite3.Connection) -> None:
+        """Create any of the indexes a full rebuild drops that are missing."""
+        for name, columns in _REBUILD_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
     
     def update_notes(self, changed: set[str], deleted: set[str]) -> dict[str, int]:
         """
         Incrementally update specific notes in the index.
         
+        The write runs on the index's writer thread (see ``submit_updates``);
+        this call blocks until it has been committed.
+        
         Args:
             changed: Set of note IDs that were created or modified
             deleted: Set of note IDs that were deleted
@@ -470,205 +1063,357 @@ class SQLiteIndex(Index):
         Returns:
             Dictionary with counts: updated, inserted, removed
         """
-        self._ensure_schema()
+        return self.submit_updates(changed, deleted).result()
+    
+    def submit_updates(self, changed: set[str], deleted: set[str]) -> Future[dict[str, int]]:
+        """
+        Queue an incremental update for the writer thread and return at once.
         
+        The writer owns its own connection, so readers on other threads keep
+        using WAL snapshots while it works. Updates queued within
+        ``_WRITER_WINDOW`` of each other are committed together. The future
+        resolves to the same counts ``update_notes`` returns.
+        """
+        future: Future[dict[str, int]] = Future()
+        if self._writer is None:
+            # Once, before the writer starts and outside the lock: replacing a
+            # corrupt DB goes through close(), which joins the writer
+            self._ensure_schema()
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer_queue = queue.Queue()
+                self._writer = threading.Thread(
+                    target=self._writer_loop,
+                    args=(self._writer_queue,),
+                    name="hypo-index-writer",
+                    daemon=True,
+                )
+                self._writer.start()
+            self._writer_queue.put((set(changed), set(deleted), future))
+        return future
+    
+    def _writer_loop(self, q: queue.Queue[_WriterItem | None]) -> None:
+        """Drain queued updates, one transaction per batch, until told to stop."""
         conn = self._conn()
         conn.execute("PRAGMA busy_timeout=3000")
-        
         try:
-            counts = {
-                "updated": 0,
-                "inserted": 0,
-                "removed": 0,
-            }
-            
-            # Handle deletions
-            for note_id in deleted:
-                # Delete note and cascading data
-                conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
-                conn.execute("DELETE FROM fts WHERE id = ?", (note_id,))
-                counts["removed"] += 1
-            conn.commit()
-            
-            # Get existing note IDs
-            db_ids = set(
-                row[0] for row in conn.execute(
-                    "SELECT id FROM notes WHERE id IN ({})".format(
-                        ",".join("?" * len(changed))
-                    ),
-                    tuple(changed)
-                ).fetchall()
-            ) if changed else set()
-            
-            # Handle changed notes
-            for note_id in changed:
-                is_new = note_id not in db_ids
-                
-                # Index the note (use_hash=False for speed)
-                success = self._index_note(note_id, False, conn)
-                if success:
-                    if is_new:
-                        counts["inserted"] += 1
-                    else:
-                        counts["updated"] += 1
-            
-            return counts
-            
+            stop = False
+            while not stop:
+                item = q.get()
+                if item is None:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + _WRITER_WINDOW
+                while True:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = q.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                self._write_batch(conn, batch)
         finally:
             conn.close()
     
-    def links_out(self, id: NoteId) -> list[Link]:
-        """Get all outgoing links from a note."""
-        conn = self._conn()
+    def _write_batch(self, conn: sqlite3.Connection, batch: list[_WriterItem]) -> None:
+        """Apply queued updates in one transaction and resolve their futures."""
         try:
-            rows = conn.execute("""
-                SELECT dst, start, end, rel, anchor_kind, anchor_value
-                FROM links
-                WHERE src = ?
-                ORDER BY start
-            """, (id,)).fetchall()
-            
-            from ..core.model import Anchor, LinkTarget, Range
-            
-            links = []
-            for row in rows:
-                dst, start, end, rel, anchor_kind, anchor_value = row
-                
-                anchor = None
-                if anchor_kind and anchor_value:
-                    anchor = Anchor(kind=anchor_kind, value=anchor_value)
-                
-                target = LinkTarget(id=dst, anchor=anchor, rel=rel)
-                links.append(Link(source=id, target=target, range=Range(start, end)))
+            conn.execute("BEGIN IMMEDIATE")
+            results = [
+                self._apply_updates(conn, changed, deleted) for changed, deleted, _ in batch
+            ]
+            conn.commit()
+            # Passive: watch mode writes often and must not wait on readers
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, _, future), counts in zip(batch, results, strict=True):
+            future.set_result(counts)
+    
+    def _delete_notes(self, conn: sqlite3.Connection, note_ids: set[str]) -> None:
+        """Delete notes (and, by cascade, their rows) with one statement."""
+        if not note_ids:
+            return
+        if len(note_ids) == 1:
+            conn.execute(_DELETE_NOTE, tuple(note_ids))
+            return
+        # Ids are staged in a per-connection temp table, which is kept (and
+        # emptied) rather than dropped so prepared statements stay valid
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS to_delete (id TEXT PRIMARY KEY)")
+        conn.executemany(
+            "INSERT OR IGNORE INTO temp.to_delete (id) VALUES (?)",
+            [(note_id,) for note_id in note_ids],
+        )
+        conn.execute("DELETE FROM notes WHERE id IN (SELECT id FROM temp.to_delete)")
+        conn.execute("DELETE FROM temp.to_delete")
+    
+    def _apply_updates(
+        self, conn: sqlite3.Connection, changed: set[str], deleted: set[str]
+    ) -> dict[str, int]:
+        """Write one update inside the writer's open transaction."""
+        counts = {
+            "updated": 0,
+            "inserted": 0,
+            "removed": 0,
+        }
+        
+        # Handle deletions
+        self._delete_notes(conn, deleted)
+        counts["removed"] += len(deleted)
+        
+        # Get existing note IDs
+        db_ids = set(
+            row[0] for row in conn.execute(
+                "SELECT id FROM notes WHERE id IN ({})".format(
+                    ",".join("?" * len(changed))
+                ),
+                tuple(changed)
+            ).fetchall()
+        ) if changed else set()
+        
+        # Handle changed notes
+        for note_id in changed:
+            is_new = note_id not in db_ids
             
-            return links
-        finally:
-            conn.close()
+            # Index the note (use_hash=False for speed)
+            success = self._index_note(note_id, False, conn)
+            if success:
+                if is_new:
+                    counts["inserted"] += 1
+                else:
+                    counts["updated"] += 1
+        
+        return counts
+    
+    def links_out(self, id: NoteId) -> list[Link]:
+        """Get all outgoing links from a note."""
+        conn = self._get_conn()
+        rows = conn.execute("""
+            SELECT dst, start, end, rel, anchor_kind, anchor_value
+            FROM links
+            WHERE src = ?
+            ORDER BY start
+        """, (id,)).fetchall()
+        
+        return [
+            Link(
+                source=id,
+                target=LinkTarget(
+                    id=dst,
+                    anchor=(
+                        Anchor(kind=anchor_kind, value=anchor_value)
+                        if anchor_kind and anchor_value
+                        else None
+                    ),
+                    rel=rel,
+                ),
+                range=Range(start, end),
+            )
+            for dst, start, end, rel, anchor_kind, anchor_value in rows
+        ]
     
     def links_in(self, id: NoteId) -> list[Link]:
         """Get all incoming links to a note."""
-        conn = self._conn()
-        try:
-            rows = conn.execute("""
-                SELECT src, start, end, rel, anchor_kind, anchor_value
-                FROM links
-                WHERE dst = ?
-                ORDER BY src, start
-            """, (id,)).fetchall()
-            
-            from ..core.model import Anchor, LinkTarget, Range
-            
-            links = []
-            for row in rows:
-                src, start, end, rel, anchor_kind, anchor_value = row
-                
-                anchor = None
-                if anchor_kind and anchor_value:
-                    anchor = Anchor(kind=anchor_kind, value=anchor_value)
-                
-                target = LinkTarget(id=id, anchor=anchor, rel=rel)
-                links.append(Link(source=src, target=target, range=Range(start, end)))
-            
-            return links
-        finally:
-            conn.close()
+        conn = self._get_conn()
+        rows = conn.execute("""
+            SELECT src, start, end, rel, anchor_kind, anchor_value
+            FROM links
+            WHERE dst = ?
+            ORDER BY src, start
+        """, (id,)).fetchall()
+        
+        return [
+            Link(
+                source=src,
+                target=LinkTarget(
+                    id=id,
+                    anchor=(
+                        Anchor(kind=anchor_kind, value=anchor_value)
+                        if anchor_kind and anchor_value
+                        else None
+                    ),
+                    rel=rel,
+                ),
+                range=Range(start, end),
+            )
+            for src, start, end, rel, anchor_kind, anchor_value in rows
+        ]
     
     def blocks(self, id: NoteId) -> list[Block]:
         """Get all blocks for a note."""
-        conn = self._conn()
-        try:
-            rows = conn.execute("""
-                SELECT kind, start, end, level, slug, label
-                FROM blocks
-                WHERE note_id = ?
-                ORDER BY start
-            """, (id,)).fetchall()
-            
-            from ..core.model import BlockLabel, Range
-            
-            blocks = []
-            for row in rows:
-                kind, start, end, level, slug, label_name = row
-                
-                label = BlockLabel(name=label_name) if label_name else None
-                
-                block = Block(
-                    kind=kind,
-                    range=Range(start, end),
-                    label=label,
-                    heading_level=level,
-                    heading_slug=slug,
-                )
-                blocks.append(block)
-            
-            return blocks
-        finally:
-            conn.close()
+        conn = self._get_conn()
+        rows = conn.execute("""
+            SELECT kind, start, end, level, slug, label
+            FROM blocks
+            WHERE note_id = ?
+            ORDER BY start
+        """, (id,)).fetchall()
+        
+        return [
+            Block(
+                kind=kind,
+                range=Range(start, end),
+                label=BlockLabel(name=label_name) if label_name else None,
+                heading_level=level,
+                heading_slug=slug,
+            )
+            for kind, start, end, level, slug, label_name in rows
+        ]
     
     def search(self, query: str, limit: int = 50) -> list[NoteId]:
         """Search using FTS5."""
-        conn = self._conn()
-        try:
-            # Check if FTS has any data
-            count = conn.execute("SELECT COUNT(*) FROM fts").fetchone()[0]
-            if count == 0:
-                print("Index is empty or stale. Run: hypo reindex")
-                return []
-            
-            rows = conn.execute("""
-                SELECT id FROM fts
-                WHERE fts MATCH ?
-                ORDER BY rank
-                LIMIT ?
-            """, (query, limit)).fetchall()
-            
-            return [row[0] for row in rows]
-        finally:
-            conn.close()
+        conn = self._get_conn()
+        # Check if FTS has any data; stops at the first row instead of counting
+        if conn.execute("SELECT 1 FROM notes LIMIT 1").fetchone() is None:
+            print("Index is empty or stale. Run: hypo reindex")
+            return []
+        
+        rows = conn.execute(_SEARCH_SQL, (query, limit)).fetchall()
+        
+        return [row[0] for row in rows]
+    
+    def search_with_snippets(
+        self, query: str, limit: int = 50
+    ) -> list[tuple[NoteId, str]]:
+        """Search using FTS5, returning (id, snippet) pairs from a single match."""
+        conn = self._get_conn()
+        if conn.execute("SELECT 1 FROM notes LIMIT 1").fetchone() is None:
+            print("Index is empty or stale. Run: hypo reindex")
+            return []
+        
+        return conn.execute(_SEARCH_SNIPPETS_SQL, (query, limit)).fetchall()
+    
+    def search_with_aliases(self, query: str, limit: int = 50) -> list[NoteId]:
+        """Search using FTS5 plus notes whose alias contains the query, in one statement."""
+        conn = self._get_conn()
+        if conn.execute("SELECT 1 FROM notes LIMIT 1").fetchone() is None:
+            print("Index is empty or stale. Run: hypo reindex")
+            return []
+        
+        rows = conn.execute(
+            _SEARCH_ALIASES_SQL, (query, limit, _prefix_phrase(query))
+        ).fetchall()
+        
+        return [row[0] for row in rows]
+    
+    def match_titles(self, text: str, limit: int = 10) -> list[tuple[NoteId, str]]:
+        """Find (id, title) pairs whose title contains text as a token prefix."""
+        conn = self._get_conn()
+        query = f"title : {_prefix_phrase(text)}"
+        return conn.execute(_MATCH_TITLES_SQL, (query, limit)).fetchall()
+    
+    def match_aliases(self, text: str, limit: int = 10) -> list[tuple[NoteId, str]]:
+        """Find (id, alias) pairs whose alias contains text as a token prefix."""
+        conn = self._get_conn()
+        return conn.execute(_MATCH_ALIASES_SQL, (_prefix_phrase(text), limit)).fetchall()
+    
+    def titles(self, ids: list[NoteId]) -> dict[NoteId, str]:
+        """Map note ids to titles in one query per _IN_CHUNK ids; unknown ids are absent."""
+        conn = self._get_conn()
+        titles: dict[NoteId, str] = {}
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT id, title FROM notes WHERE id IN ({placeholders})", chunk
+            ).fetchall()
+            titles.update((note_id, title or "") for note_id, title in rows)
+        return titles
+    
+    def ids_by_title(self, titles: list[str]) -> dict[str, list[NoteId]]:
+        """Map exact titles to the ids of notes that have them; unmatched titles are absent."""
+        return self._ids_matching(
+            "SELECT title, id FROM notes WHERE title IN ({})", titles
+        )
+    
+    def ids_by_alias(self, aliases: list[str]) -> dict[str, list[NoteId]]:
+        """Map exact aliases to the ids of notes that declare them, one entry per kv row."""
+        return self._ids_matching(
+            "SELECT value, note_id FROM kv WHERE key = 'core/alias' AND value IN ({})", aliases
+        )
+    
+    def _ids_matching(self, sql: str, values: list[str]) -> dict[str, list[NoteId]]:
+        """Group (value, id) rows of ``sql`` by value, one query per _IN_CHUNK values."""
+        conn = self._get_conn()
+        matches: dict[str, list[NoteId]] = {}
+        for i in range(0, len(values), _IN_CHUNK):
+            chunk = values[i:i + _IN_CHUNK]
+            rows = conn.execute(sql.format(",".join("?" * len(chunk))), chunk)
+            for value, note_id in rows:
+                matches.setdefault(value, []).append(note_id)
+        return matches
+    
+    def iter_titles(self) -> Iterator[tuple[NoteId, str]]:
+        """Yield (id, title) for every indexed note in id order, row by row."""
+        conn = self._get_conn()
+        yield from conn.execute("SELECT id, COALESCE(title, '') FROM notes ORDER BY id")
     
     def snippet(self, id: NoteId, query: str) -> str | None:
         """Get a snippet with highlighted matches."""
-        conn = self._conn()
-        try:
-            row = conn.execute("""
-                SELECT snippet(fts, 1, '<b>', '</b>', ' … ', 64)
-                FROM fts
-                WHERE id = ? AND fts MATCH ?
-            """, (id, query)).fetchone()
-            
-            return row[0] if row else None
-        finally:
-            conn.close()
+        conn = self._get_conn()
+        row = conn.execute(_SNIPPET_SQL, (id, query)).fetchone()
+        
+        return row[0] if row else None
     
     def orphans(self) -> list[NoteId]:
         """Find notes with no incoming or outgoing links."""
-        conn = self._conn()
-        try:
-            rows = conn.execute("""
-                SELECT id FROM notes
-                WHERE id NOT IN (SELECT src FROM links)
-                  AND id NOT IN (SELECT dst FROM links)
-                ORDER BY id
-            """).fetchall()
-            
-            return [row[0] for row in rows]
-        finally:
-            conn.close()
+        conn = self._get_conn()
+        rows = conn.execute(f"SELECT id FROM notes WHERE {_ORPHAN_WHERE} ORDER BY id").fetchall()
+        
+        return [row[0] for row in rows]
+    
+    def link_problems(self) -> list[tuple[NoteId, int, int, NoteId, str]]:
+        """
+        Find links whose target note or anchor doesn't exist.
+        
+        Returns (source, start, end, target, problem) rows ordered by source
+        and position, where problem is "dead" or "anchor".
+        """
+        conn = self._get_conn()
+        return conn.execute(_LINK_PROBLEMS_SQL).fetchall()
+    
+    def id_mismatches(self) -> list[tuple[NoteId, str]]:
+        """Find (note id, frontmatter id) pairs where the two differ."""
+        conn = self._get_conn()
+        return conn.execute(
+            "SELECT note_id, value FROM kv WHERE key = 'id' AND value != note_id ORDER BY note_id"
+        ).fetchall()
+    
+    def counts(self) -> dict[str, int]:
+        """Count notes, links and orphans in a single statement."""
+        conn = self._get_conn()
+        notes, links, orphans = conn.execute(_COUNTS_SQL).fetchone()
+        return {"notes": notes, "links": links, "orphans": orphans}
+    
+    def graph_version(self) -> str:
+        """
+        Cheap token that changes whenever the index may have changed.
+        
+        ``data_version`` moves on commits from other connections (the writer
+        thread, other processes), ``total_changes`` on writes through the
+        cached connection itself.
+        """
+        conn = self._get_conn()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return f"{self._conn_epoch}.{data_version}.{conn.total_changes}"
+    
+    def iter_edges(self) -> Iterator[tuple[NoteId, NoteId]]:
+        """Yield each distinct (source, target) link pair in order, row by row."""
+        conn = self._get_conn()
+        yield from conn.execute("SELECT DISTINCT src, dst FROM links ORDER BY src, dst")
     
     def graph_data(self) -> dict[str, Any]:
         """Export graph data for visualization."""
-        conn = self._conn()
-        try:
-            # Get all notes
-            note_rows = conn.execute("SELECT id, title FROM notes ORDER BY id").fetchall()
-            nodes = [{"id": row[0], "title": row[1] or ""} for row in note_rows]
-            
-            # Get all links (deduplicated)
-            link_rows = conn.execute("""
-                SELECT DISTINCT src, dst FROM links ORDER BY src, dst
-            """).fetchall()
-            edges = [{"source": row[0], "target": row[1]} for row in link_rows]
-            
-            return {"nodes": nodes, "edges": edges}
-        finally:
-            conn.close()
+        nodes = [{"id": nid, "title": title} for nid, title in self.iter_titles()]
+        edges = [{"source": src, "target": dst} for src, dst in self.iter_edges()]
+        
+        return {"nodes": nodes, "edges": edges}
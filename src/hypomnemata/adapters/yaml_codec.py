@@ -1,4 +1,3 @@
-import io
 import re
 from typing import Any
 
@@ -7,24 +6,37 @@ import yaml
 from ..core.model import Note
 from ..core.ports import FrontmatterCodec, NoteCodec
 
+# libyaml-backed loader when PyYAML was built with it; same SafeConstructor,
+# so decoded values are identical, just parsed in C
+try:
+    from yaml import CSafeLoader as _SafeLoader
+
+    LIBYAML_AVAILABLE = True
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader  # type: ignore[assignment]
+
+    LIBYAML_AVAILABLE = False
+
 _FM = re.compile(r"^\s*---\s*\n(.*?)\n---\s*\n?", re.DOTALL)
 
 
 class YamlFrontmatter(FrontmatterCodec):
     def decode(self, text: str) -> tuple[dict[str, Any], str]:
+        # _FM can only match text that opens with "---" or whitespace
+        if not text.startswith("---") and not text[:1].isspace():
+            return {}, text
         m = _FM.match(text)
         if not m:
             return {}, text
-        fm = yaml.safe_load(io.StringIO(m.group(1))) or {}
+        fm = yaml.load(m.group(1), Loader=_SafeLoader) or {}
         body = text[m.end() :]
         return (fm, body)
 
     def encode(self, meta: dict[str, Any]) -> str:
         if not meta:
             return ""
-        buf = io.StringIO()
-        yaml.safe_dump(meta, buf, sort_keys=False, allow_unicode=True)
-        return f"---\n{buf.getvalue()}---\n"
+        dumped = yaml.safe_dump(meta, sort_keys=False, allow_unicode=True)
+        return f"---\n{dumped}---\n"
 
 
 class MarkdownNoteCodec(NoteCodec):
@@ -1,11 +1,16 @@
 """FastAPI application for hypomnemata local JSON API."""
 
+import gzip
+import hashlib
+import os
 import secrets
-from typing import Any
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
 
 try:
-    from fastapi import Depends, FastAPI, HTTPException, Query, Security
+    from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, Security
     from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse
     from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
     FASTAPI_AVAILABLE = True
@@ -30,10 +35,54 @@ except ImportError:
     HTTPAuthorizationCredentials = object
     HTTPBearer = object
     CORSMiddleware = object
+    # Runtime-only placeholders: type checkers always see the FastAPI classes
+    if not TYPE_CHECKING:
+        Request = object
+        Response = object
+        JSONResponse = object
 
 from ..core.model import Anchor
-from ..core.slicer import slice_by_anchor
-from ..locate import locate_note
+from ..core.slicer import slice_by_anchor, strip_fence
+from ..jsonio import dumps_bytes
+from ..locate import LineIndex, locate_note
+
+# Notes whose ETag is remembered, keyed by their file's (mtime_ns, size)
+_ETAG_CACHE_SIZE = 1024
+
+
+class _JSONResponse(JSONResponse):
+    """JSON response encoded by jsonio, i.e. with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header value matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    etag = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    """Whether an Accept-Encoding header value allows a gzip response."""
+    for coding in (accept_encoding or "").lower().split(","):
+        name, _, params = coding.partition(";")
+        if name.strip() == "gzip":
+            # "gzip;q=0" explicitly refuses it
+            key, _, value = params.partition("=")
+            if key.strip() != "q":
+                return True
+            try:
+                return float(value) > 0
+            except ValueError:
+                return False
+    return False
 
 
 def create_app(runtime: Any, token: str | None = None, enable_cors: bool = False) -> Any:
@@ -57,6 +106,8 @@ def create_app(runtime: Any, token: str | None = None, enable_cors: bool = False
         version="0.1.0",
         docs_url="/docs" if token is None else None,
         redoc_url="/redoc" if token is None else None,
+        # orjson encodes responses (the graph especially) much faster
+        default_response_class=_JSONResponse,
     )
 
     # Add CORS middleware if enabled
@@ -77,7 +128,10 @@ def create_app(runtime: Any, token: str | None = None, enable_cors: bool = False
             credentials: HTTPAuthorizationCredentials | None = Security(security_scheme),  # noqa: B008
         ) -> None:
             """Verify bearer token."""
-            if credentials is None or credentials.credentials != token:
+            # Constant-time compare, so response timing can't leak the token
+            if credentials is None or not secrets.compare_digest(
+                credentials.credentials.encode(), token.encode()
+            ):
                 raise HTTPException(status_code=401, detail="Invalid or missing token")
     else:
 
@@ -85,14 +139,58 @@ def create_app(runtime: Any, token: str | None = None, enable_cors: bool = False
             """No-op when auth is disabled."""
             return None
 
+    # note id -> (mtime_ns, size, etag); the etag hashes the file's content, so
+    # a touch without an edit still gets a 304
+    etags: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+
+    def note_etag(note_id: str) -> str | None:
+        """ETag for a note's file, recomputed only when its mtime/size change."""
+        path = runtime.vault.storage._path(note_id)
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        cached = etags.get(note_id)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            etags.move_to_end(note_id)
+            return cached[2]
+        try:
+            content = path.read_bytes()
+        except OSError:
+            return None
+        etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+        etags[note_id] = (st.st_mtime_ns, st.st_size, etag)
+        if len(etags) > _ETAG_CACHE_SIZE:
+            etags.popitem(last=False)
+        return etag
+
+    # Encoded /graph body for one graph_version(): [version, json, gzip or None]
+    graph_cache: list[Any] = [None, b"", None]
+
+    def check_etag(request: Request, response: Response, etag: str | None) -> None:
+        """Set the ETag header, or answer 304 if the client's copy is current."""
+        if etag is None:
+            return
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
     @app.get("/health")  # type: ignore[misc]
     async def health(auth: None = Depends(verify_token)) -> dict[str, Any]:
         """Health check endpoint."""
-        return {"status": "ok", "schema_version": "2"}
+        from ..adapters.sqlite_index import SCHEMA_VERSION
+
+        return {"status": "ok", "schema_version": SCHEMA_VERSION}
 
     @app.get("/notes/{note_id}")  # type: ignore[misc]
-    async def get_note(note_id: str, auth: None = Depends(verify_token)) -> dict[str, Any]:
+    async def get_note(
+        note_id: str,
+        request: Request,
+        response: Response,
+        auth: None = Depends(verify_token),
+    ) -> dict[str, Any]:
         """Get note metadata and body."""
+        check_etag(request, response, note_etag(note_id))
         note = runtime.vault.get(note_id)
         if note is None:
             raise HTTPException(status_code=404, detail=f"Note {note_id} not found")
@@ -105,12 +203,16 @@ def create_app(runtime: Any, token: str | None = None, enable_cors: bool = False
 
     @app.get("/yank")  # type: ignore[misc]
     async def yank(
+        request: Request,
+        response: Response,
         id: str = Query(..., description="Note ID"),
         anchor: str | None = Query(None, description="Anchor (slug or ^label)"),
         plain: bool = Query(False, description="Strip fence markers from code blocks"),
         auth: None = Depends(verify_token),
     ) -> dict[str, Any]:
         """Get a slice of a note."""
+        check_etag(request, response, note_etag(id))
+
         # Get note
         note = runtime.vault.get(id)
         if note is None:
@@ -133,29 +235,22 @@ def create_app(runtime: Any, token: str | None = None, enable_cors: bool = False
         slice_text = note.body.raw[start:end]
 
         # Handle plain flag
-        if plain and slice_text.strip().startswith("```"):
-            lines = slice_text.splitlines(keepends=True)
-            if (
-                len(lines) >= 2
-                and lines[0].strip().startswith("```")
-                and lines[-1].strip() == "```"
-            ):
-                slice_text = "".join(lines[1:-1])
-            elif len(lines) >= 2 and lines[0].strip().startswith("```"):
-                for i in range(len(lines) - 1, 0, -1):
-                    if lines[i].strip() == "```":
-                        slice_text = "".join(lines[1:i])
-                        break
+        if plain:
+            slice_text = strip_fence(slice_text)
 
         return {"text": slice_text}
 
     @app.get("/locate")  # type: ignore[misc]
     async def locate(
+        request: Request,
+        response: Response,
         id: str = Query(..., description="Note ID"),
         anchor: str | None = Query(None, description="Anchor (slug or ^label)"),
         auth: None = Depends(verify_token),
     ) -> dict[str, Any]:
         """Get precise location information for a note or anchor."""
+        check_etag(request, response, note_etag(id))
+
         # Get note
         note = runtime.vault.get(id)
         if note is None:
@@ -195,24 +290,22 @@ def create_app(runtime: Any, token: str | None = None, enable_cors: bool = False
         if not isinstance(runtime.index, SQLiteIndex):
             raise HTTPException(status_code=500, detail="Search requires SQLiteIndex")
 
-        results = list(runtime.index.search(q, limit=limit))
+        # With snippets, ids and snippets come from the same FTS match
+        snips: dict[str, str] = {}
+        if snippets:
+            hits = runtime.index.search_with_snippets(q, limit=limit)
+            results = [note_id for note_id, _ in hits]
+            snips = dict(hits)
+        else:
+            results = list(runtime.index.search(q, limit=limit))
+        titles = runtime.index.titles(results)
 
         output = []
         for note_id in results:
-            # Get title from DB
-            conn = runtime.index._conn()
-            try:
-                row = conn.execute("SELECT title FROM notes WHERE id = ?", (note_id,)).fetchone()
-                title = row[0] if row else ""
-            finally:
-                conn.close()
-
-            item: dict[str, Any] = {"id": note_id, "title": title}
+            item: dict[str, Any] = {"id": note_id, "title": titles.get(note_id, "")}
 
-            if snippets:
-                snippet = runtime.index.snippet(note_id, q)
-                if snippet:
-                    item["snippet"] = snippet
+            if snips.get(note_id):
+                item["snippet"] = snips[note_id]
 
             output.append(item)
 
@@ -227,15 +320,20 @@ def create_app(runtime: Any, token: str | None = None, enable_cors: bool = False
         """Get incoming links with context."""
         incoming = runtime.index.links_in(id)
 
+        # Load the source notes together, then build one line table per note
+        # for all its links
+        notes = runtime.vault.get_many(link.source for link in incoming)
+        line_indexes = {
+            source: LineIndex(note.body.raw) if note else None
+            for source, note in notes.items()
+        }
+
         output = []
         for link in incoming:
-            note = runtime.vault.get(link.source)
-            if note and link.range:
+            line_index = line_indexes[link.source]
+            if line_index and link.range:
                 # Extract context lines around the link
-                lines = note.body.raw[: link.range.start].splitlines()
-                start_line = max(0, len(lines) - context)
-                end_line = len(lines) + context
-                context_lines = note.body.raw.splitlines()[start_line:end_line]
+                context_lines = line_index.context(link.range.start, context)
 
                 output.append(
                     {
@@ -249,14 +347,31 @@ def create_app(runtime: Any, token: str | None = None, enable_cors: bool = False
         return output
 
     @app.get("/graph")  # type: ignore[misc]
-    async def graph(auth: None = Depends(verify_token)) -> dict[str, Any]:
+    async def graph(
+        request: Request, response: Response, auth: None = Depends(verify_token)
+    ) -> Response:
         """Get graph data."""
         from ..adapters.sqlite_index import SQLiteIndex
 
         if not isinstance(runtime.index, SQLiteIndex):
             raise HTTPException(status_code=500, detail="Graph requires SQLiteIndex")
 
-        return runtime.index.graph_data()
+        # Weak: the identity and gzip bodies share it
+        version = runtime.index.graph_version()
+        etag = f'W/"{version}"'
+        check_etag(request, response, etag)
+
+        # Encode once per graph version (skipping FastAPI's validation and
+        # jsonable_encoder pass), and gzip once on the first request for it
+        if graph_cache[0] != version:
+            graph_cache[:] = [version, dumps_bytes(runtime.index.graph_data()), None]
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+        if _accepts_gzip(request.headers.get("accept-encoding")):
+            if graph_cache[2] is None:
+                graph_cache[2] = gzip.compress(graph_cache[1], compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+            return Response(graph_cache[2], media_type="application/json", headers=headers)
+        return Response(graph_cache[1], media_type="application/json", headers=headers)
 
     return app
 
@@ -1,13 +1,23 @@
 """Asset reference scanner for Hypomnemata notes."""
 
 import re
+from collections.abc import Iterator
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
+try:
+    import hyperscan
 
-@dataclass
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+
+@dataclass(slots=True, frozen=True)
 class AssetRef:
-    """A reference to an asset file."""
+    """A reference to an asset file (slotted: large vaults produce many)."""
     
     note_id: str
     asset_path: str  # As written in the note
@@ -17,6 +27,116 @@ class AssetRef:
     range_end: int | None = None
 
 
+_IMAGE_PATTERN = r'(?P<image>!\[[^\]]*\]\((?P<image_path>[^)]+)\))'
+_FILE_PATTERN = r'(?P<file>\[[^\]]+\]\((?P<file_path>[^)]+)\))'
+# Tag and attribute names match case-insensitively via character classes
+# rather than re.IGNORECASE, which would case-fold the whole pattern
+_HTML_PATTERN = (
+    r'(?P<html><[iI][mM][gG][^>]+[sS][rR][cC]=["\'](?P<html_path>[^"\']+)["\'][^>]*>)'
+)
+
+# Markdown images ![alt](path), Markdown file links [text](path) and HTML
+# <img src="path">, matched together; the outer group name is the ref type
+_ASSET_REF = re.compile(
+    _IMAGE_PATTERN + '|(?<!!)' + _FILE_PATTERN + '|' + _HTML_PATTERN
+)
+# Each kind on its own, for notes whose refs overlap
+_KIND_REFS = [re.compile(pattern) for pattern in (_IMAGE_PATTERN, _FILE_PATTERN, _HTML_PATTERN)]
+# Where another ref could start inside a match
+_NESTED_START = re.compile(r'[\[<]')
+# Cheap literal prechecks: Markdown refs all contain "](", HTML refs "<img"
+_HTML_IMG_START = re.compile(r'<[iI][mM][gG]')
+_PATH_GROUPS = {"image": "image_path", "file": "file_path", "html": "html_path"}
+_SKIP_PREFIXES = {
+    "image": ('http://', 'https://', '//'),
+    # Wiki-style links are handled by the link parser
+    "file": ('http://', 'https://', '//', '#', '[['),
+    "html": ('http://', 'https://', '//', 'data:'),
+}
+
+
+def _compile_hs_database() -> Any:
+    """Compile the _ASSET_REF alternatives into a Hyperscan block-mode database."""
+    db = hyperscan.Database()
+    db.compile(
+        # Hyperscan has no lookbehind; the Python confirm step applies (?<!!)
+        expressions=[
+            rb'!\[[^\]]*\]\([^)]+\)',
+            rb'\[[^\]]+\]\([^)]+\)',
+            rb'<img[^>]+src=["\'][^"\']+["\'][^>]*>',
+        ],
+        ids=[0, 1, 2],
+        elements=3,
+        flags=[
+            hyperscan.HS_FLAG_SOM_LEFTMOST,
+            hyperscan.HS_FLAG_SOM_LEFTMOST,
+            hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_CASELESS,
+        ],
+    )
+    return db
+
+
+_HS_DATABASE: Any = _compile_hs_database() if HYPERSCAN_AVAILABLE else None
+
+
+def _hs_asset_matches(note_text: str) -> Iterator[re.Match[str]]:
+    """Yield the matches of ``_ASSET_REF.finditer``, located with Hyperscan.
+    
+    Hyperscan reports candidate (start, end) byte ranges for every
+    alternative, overlapping ones included. Each candidate past the previous
+    match is confirmed with ``_ASSET_REF.search``, which also supplies the
+    groups, so results are identical to the pure-Python scan.
+    """
+    buf = note_text.encode("utf-8")
+    hits: list[tuple[int, int]] = []
+    
+    def on_match(id: int, start: int, end: int, flags: int, context: Any) -> None:
+        hits.append((start, end))
+    
+    _HS_DATABASE.scan(buf, match_event_handler=on_match)
+    if not hits:
+        return
+    hits.sort()
+    
+    # Byte offsets equal character offsets for ASCII notes; otherwise they
+    # are converted incrementally (every candidate starts on an ASCII char)
+    is_ascii = len(buf) == len(note_text)
+    pos_b = pos = 0  # End of the last match, in bytes and in characters
+    for start_b, end_b in hits:
+        if end_b <= pos_b:
+            continue
+        from_b = max(start_b, pos_b)
+        start = from_b if is_ascii else pos + len(buf[pos_b:from_b].decode("utf-8"))
+        match = _ASSET_REF.search(note_text, start)
+        if match is None:
+            return
+        yield match
+        if is_ascii:
+            pos_b = match.end()
+        else:
+            pos_b = from_b + len(note_text[start:match.end()].encode("utf-8"))
+        pos = match.end()
+
+
+def _may_nest(match: re.Match[str]) -> bool:
+    """Whether another ref could start inside ``match`` (past an image's ``![``)."""
+    inner_start = match.start() + (2 if match.lastgroup == "image" else 1)
+    return _NESTED_START.search(match.string, inner_start, match.end()) is not None
+
+
+def _matches_by_kind(note_text: str) -> list[re.Match[str]]:
+    """Match each kind of ref in its own pass, in document order.
+    
+    Refs of different kinds may then overlap, as in the linked image
+    ``[![alt](img.png)](url)``. A file link that is just an image without
+    its ``!`` is dropped.
+    """
+    images, files, html = (list(pattern.finditer(note_text)) for pattern in _KIND_REFS)
+    image_links = {(match.start() + 1, match.end()) for match in images}
+    files = [match for match in files if match.span() not in image_links]
+    return sorted(images + files + html, key=lambda match: match.start())
+
+
 def scan_asset_refs(
     note_id: str,
     note_text: str,
@@ -37,83 +157,39 @@ def scan_asset_refs(
     if assets_dir is None:
         assets_dir = vault_root / "assets"
     
-    refs = []
-    seen_ranges: set[tuple[int, int]] = set()  # Track ranges to avoid duplicates
+    refs: list[AssetRef] = []
     
-    # Extract Markdown images: ![alt](path)
-    img_pattern = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
-    for match in img_pattern.finditer(note_text):
-        path_str = match.group(2).strip()
-        
-        # Skip URLs
-        if path_str.startswith(('http://', 'https://', '//')):
-            continue
-        
-        # Resolve path
-        resolved = _resolve_asset_path(path_str, vault_root, assets_dir)
-        
-        # Mark both the full match and the inner [...] as seen to avoid duplicates
-        seen_ranges.add((match.start(), match.end()))
-        seen_ranges.add((match.start() + 1, match.end()))  # Also mark without the !
-        
-        refs.append(AssetRef(
-            note_id=note_id,
-            asset_path=path_str,
-            resolved_path=resolved,
-            ref_type="image",
-            range_start=match.start(),
-            range_end=match.end(),
-        ))
+    # Most prose notes reference no assets; skip the regex scan for them
+    if '](' not in note_text and _HTML_IMG_START.search(note_text) is None:
+        return refs
     
-    # Extract Markdown file links: [text](path) where path is not http(s)
-    link_pattern = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
-    for match in link_pattern.finditer(note_text):
-        path_str = match.group(2).strip()
-        
-        # Skip URLs and anchors
-        if path_str.startswith(('http://', 'https://', '//', '#')):
-            continue
-        
-        # Skip wiki-style links (already handled by link parser)
-        if path_str.startswith('[['):
-            continue
+    # One pass over the text; an image is consumed whole, so its inner
+    # [alt](path) is never seen again as a file link
+    matches = list(
+        _ASSET_REF.finditer(note_text) if _HS_DATABASE is None else _hs_asset_matches(note_text)
+    )
+    # A match that may contain another ref (say an image inside a link's
+    # text) would hide it from the single pass; scan kind by kind instead
+    if any(_may_nest(match) for match in matches):
+        matches = _matches_by_kind(note_text)
+    for match in matches:
+        ref_type = match.lastgroup
+        assert ref_type is not None
+        path_str = match.group(_PATH_GROUPS[ref_type]).strip()
         
-        # Skip if already seen (from image pattern)
-        range_key = (match.start(), match.end())
-        if range_key in seen_ranges:
+        # Skip URLs (and anchors/data URIs, depending on the kind)
+        if path_str.startswith(_SKIP_PREFIXES[ref_type]):
             continue
         
-        # Check if it looks like a file reference (has extension)
-        if '.' in Path(path_str).name:
-            resolved = _resolve_asset_path(path_str, vault_root, assets_dir)
-            
-            seen_ranges.add(range_key)
-            
-            refs.append(AssetRef(
-                note_id=note_id,
-                asset_path=path_str,
-                resolved_path=resolved,
-                ref_type="file",
-                range_start=match.start(),
-                range_end=match.end(),
-            ))
-    
-    # Extract HTML img tags: <img src="path" ...>
-    html_img_pattern = re.compile(r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
-    for match in html_img_pattern.finditer(note_text):
-        path_str = match.group(1).strip()
-        
-        # Skip URLs
-        if path_str.startswith(('http://', 'https://', '//', 'data:')):
+        # File links must look like a file reference (have an extension)
+        if ref_type == "file" and '.' not in Path(path_str).name:
             continue
         
-        resolved = _resolve_asset_path(path_str, vault_root, assets_dir)
-        
         refs.append(AssetRef(
             note_id=note_id,
             asset_path=path_str,
-            resolved_path=resolved,
-            ref_type="html",
+            resolved_path=_resolve_asset_path(path_str, vault_root, assets_dir),
+            ref_type=ref_type,
             range_start=match.start(),
             range_end=match.end(),
         ))
@@ -136,6 +212,23 @@ def _resolve_asset_path(
     Returns:
         Resolved absolute path, or None if cannot resolve
     """
+    return _resolve_asset_path_cached(path_str, str(vault_root), str(assets_dir))
+
+
+@lru_cache(maxsize=4096)
+def _resolve_asset_path_cached(
+    path_str: str,
+    vault_root_str: str,
+    assets_dir_str: str,
+) -> Path | None:
+    """Memoized body of ``_resolve_asset_path``; shared assets resolve once.
+    
+    Call ``clear_resolve_cache()`` if symlinks under the vault change within
+    one process.
+    """
+    vault_root = Path(vault_root_str)
+    assets_dir = Path(assets_dir_str)
+    
     # Remove any URL fragments or query strings
     path_str = path_str.split('#')[0].split('?')[0]
     
@@ -157,3 +250,8 @@ def _resolve_asset_path(
     
     # Otherwise, assume it's relative to assets directory
     return (assets_dir / path).resolve()
+
+
+def clear_resolve_cache() -> None:
+    """Forget memoized asset path resolutions (e.g. after symlinks change)."""
+    _resolve_asset_path_cached.cache_clear()
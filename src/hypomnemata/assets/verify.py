@@ -1,13 +1,37 @@
 """Asset verification utilities."""
 
 import hashlib
+import mmap
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 
-from .scanner import AssetRef, scan_asset_refs
+from ..jsonio import dumps_bytes
+from .scanner import AssetRef, clear_resolve_cache, scan_asset_refs
 
+try:
+    import blake3
 
-@dataclass
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+HASH_ALGORITHMS = ("sha256", "blake3")
+
+# Read size when a file can't be mapped; large reads keep the hash's C loop
+# busy per call
+_HASH_CHUNK = 4 * 1024 * 1024
+_SIDECAR_SUFFIXES = tuple('.' + name for name in HASH_ALGORITHMS)
+
+# Notes needed before scanning is spread over worker processes; below this,
+# starting the workers costs more than it saves
+_PARALLEL_MIN_NOTES = 256
+
+
+@dataclass(slots=True)
 class AssetReport:
     """Report of asset verification."""
     
@@ -23,6 +47,7 @@ def verify_assets(
     assets_dir: Path | None = None,
     compute_hashes: bool = False,
     write_sidecars: bool = False,
+    algorithm: str = "sha256",
 ) -> AssetReport:
     """Verify asset integrity in a vault.
     
@@ -30,8 +55,9 @@ def verify_assets(
         vault_root: Root directory of the vault
         notes: Dictionary of note_id -> note_text
         assets_dir: Assets directory (default: vault_root/assets)
-        compute_hashes: Compute SHA256 hashes for assets
-        write_sidecars: Write .sha256 sidecar files
+        compute_hashes: Compute hashes for assets
+        write_sidecars: Write .<algorithm> sidecar files
+        algorithm: Hash algorithm, "sha256" or "blake3"
     
     Returns:
         AssetReport with verification results
@@ -41,71 +67,192 @@ def verify_assets(
     
     report = AssetReport()
     
+    # Resolutions are memoized per run, so symlink changes between runs count
+    clear_resolve_cache()
+    
     # Collect all asset references
-    all_refs: list[AssetRef] = []
-    for note_id, note_text in notes.items():
-        refs = scan_asset_refs(note_id, note_text, vault_root, assets_dir)
-        all_refs.extend(refs)
+    all_refs = _scan_notes(list(notes.items()), vault_root, assets_dir)
     
     report.total_refs = len(all_refs)
     
-    # Track which files are referenced
+    # Walk the assets directory once. Its resolved entries answer existence
+    # checks for refs inside it; its files are the dangling candidates.
+    assets_root = assets_dir.resolve()
+    existing: set[Path] = set()
+    asset_files: list[tuple[Path, Path]] = []  # (path as walked, resolved path)
+    for path, resolved, is_file in _walk_assets(assets_dir):
+        existing.add(resolved)
+        if is_file and not path.name.endswith(_SIDECAR_SUFFIXES):
+            asset_files.append((path, resolved))
+    
+    # Track which files are referenced, and which to hash (in first-reference order)
     referenced_files: set[Path] = set()
+    to_hash: dict[Path, None] = {}
     
-    # Check for missing referenced files
+    # Check for missing referenced files. Most refs inside the assets
+    # directory are answered by the walk; the rest, and refs differing only
+    # in letter case on case-insensitive filesystems, need a filesystem check.
     for ref in all_refs:
         if ref.resolved_path:
-            if not ref.resolved_path.exists():
+            found = (
+                ref.resolved_path.is_relative_to(assets_root)
+                and ref.resolved_path in existing
+            ) or ref.resolved_path.exists()
+            if not found:
                 report.missing_refs.append(ref)
             else:
                 referenced_files.add(ref.resolved_path)
                 
-                # Compute hash if requested
-                if compute_hashes and ref.resolved_path not in report.file_hashes:
-                    hash_val = compute_file_hash(ref.resolved_path)
-                    report.file_hashes[ref.resolved_path] = hash_val
-                    
-                    # Write sidecar if requested
-                    if write_sidecars:
-                        sidecar_path = ref.resolved_path.with_suffix(
-                            ref.resolved_path.suffix + '.sha256'
-                        )
-                        _write_sidecar_atomic(sidecar_path, hash_val)
-    
-    # Find dangling files (in assets dir but never referenced)
-    if assets_dir.exists():
-        for asset_file in assets_dir.rglob('*'):
-            if asset_file.is_file() and not asset_file.name.endswith('.sha256'):
-                # Debug: check why this is dangling
-                is_referenced = asset_file in referenced_files
-                if not is_referenced:
-                    # Try to see if it matches any path when resolved
-                    for ref_path in referenced_files:
-                        if asset_file.resolve() == ref_path.resolve():
-                            is_referenced = True
-                            break
-                
-                if not is_referenced:
-                    report.dangling_files.append(asset_file)
+                if compute_hashes:
+                    to_hash[ref.resolved_path] = None
+    
+    # Hash concurrently; hashlib and blake3 release the GIL while hashing
+    if to_hash:
+        paths = list(to_hash)
+        workers = min(32, (os.cpu_count() or 1) * 4, len(paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            hashes = pool.map(
+                lambda path: _hash_with_sidecar(path, algorithm, write_sidecars), paths
+            )
+            report.file_hashes.update(zip(paths, hashes, strict=True))
+    
+    # Find dangling files (in assets dir but never referenced); ref paths are
+    # already resolved, so comparing resolved paths is one set lookup each
+    report.dangling_files = [
+        asset_file
+        for asset_file, resolved in asset_files
+        if resolved not in referenced_files
+    ]
     
     return report
 
 
-def compute_file_hash(file_path: Path) -> str:
-    """Compute SHA256 hash of a file."""
-    sha256 = hashlib.sha256()
+def _walk_assets(assets_dir: Path) -> Iterator[tuple[Path, Path, bool]]:
+    """Yield (path, resolved path, is_file) for each file and directory under assets_dir.
+    
+    Like ``rglob('*')``, symlinked directories are listed but not descended
+    into. ``os.scandir`` entries answer the type checks from the directory
+    listing, and resolved paths are built on the resolved parent, so only
+    symlinks need a ``realpath`` call.
+    """
+    pending = [(os.fspath(assets_dir), os.path.realpath(assets_dir))]
+    while pending:
+        dir_path, dir_resolved = pending.pop()
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
+            continue
+        subdirs = []
+        with it:
+            for entry in it:
+                is_link = entry.is_symlink()
+                if is_link:
+                    resolved = os.path.realpath(entry.path)
+                else:
+                    resolved = os.path.join(dir_resolved, entry.name)
+                if entry.is_file():
+                    yield Path(entry.path), Path(resolved), True
+                elif entry.is_dir():
+                    yield Path(entry.path), Path(resolved), False
+                    if not is_link:
+                        subdirs.append((entry.path, resolved))
+        pending.extend(reversed(subdirs))
+
+
+def _scan_notes(
+    items: list[tuple[str, str]],
+    vault_root: Path,
+    assets_dir: Path,
+) -> list[AssetRef]:
+    """Scan (note_id, note_text) pairs, sharding large sets across processes.
+    
+    Refs come back in note order either way.
+    """
+    workers = os.cpu_count() or 1
+    if len(items) <= _PARALLEL_MIN_NOTES or workers < 2:
+        return _scan_batch(items, vault_root, assets_dir)
+    
+    size = -(-len(items) // workers)
+    batches = [items[i:i + size] for i in range(0, len(items), size)]
+    all_refs: list[AssetRef] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for refs in pool.map(
+            _scan_batch,
+            batches,
+            [vault_root] * len(batches),
+            [assets_dir] * len(batches),
+        ):
+            all_refs.extend(refs)
+    return all_refs
+
+
+def _scan_batch(
+    items: list[tuple[str, str]],
+    vault_root: Path,
+    assets_dir: Path,
+) -> list[AssetRef]:
+    """Scan a batch of notes for asset references (runs in worker processes)."""
+    all_refs: list[AssetRef] = []
+    for note_id, note_text in items:
+        all_refs.extend(scan_asset_refs(note_id, note_text, vault_root, assets_dir))
+    return all_refs
+
+
+def _hash_with_sidecar(file_path: Path, algorithm: str, write_sidecar: bool) -> str:
+    """Hash a file, reusing its sidecar's digest while the file is unchanged.
+    
+    Sidecars hold the hex digest, then the ``<size>:<mtime_ns>`` the file had
+    when it was hashed. A stale or missing sidecar means rehashing, and the
+    sidecar is rewritten only if ``write_sidecar`` is set.
+    """
+    st = os.stat(file_path)
+    stamp = f"{st.st_size}:{st.st_mtime_ns}"
+    sidecar_path = file_path.with_suffix(file_path.suffix + '.' + algorithm)
+    try:
+        lines = sidecar_path.read_text(encoding='utf-8').splitlines()
+    except OSError:
+        lines = []
+    if len(lines) >= 2 and lines[1] == stamp and lines[0]:
+        return lines[0]
+    
+    hash_val = compute_file_hash(file_path, algorithm)
+    if write_sidecar:
+        _write_sidecar_atomic(sidecar_path, hash_val, stamp)
+    return hash_val
+
+
+def compute_file_hash(file_path: Path, algorithm: str = "sha256") -> str:
+    """Compute the hex digest of a file ("sha256", or "blake3" if installed)."""
+    hasher: Any
+    if algorithm == "blake3":
+        if not BLAKE3_AVAILABLE:
+            raise ValueError("blake3 hashing requires the blake3 package")
+        hasher = blake3.blake3()
+    elif algorithm == "sha256":
+        hasher = hashlib.sha256()
+    else:
+        raise ValueError(f"Unknown hash algorithm: {algorithm}")
     with file_path.open('rb') as f:
-        # Read in chunks for large files
-        while chunk := f.read(8192):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            # Hash the mapped file in one update call, without copying it
+            try:
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                    hasher.update(mm)
+            except (OSError, ValueError):
+                # Not mappable (e.g. some network filesystems); read in chunks
+                f.seek(0)
+                while chunk := f.read(_HASH_CHUNK):
+                    hasher.update(chunk)
+    hex_digest: str = hasher.hexdigest()
+    return hex_digest
 
 
-def _write_sidecar_atomic(sidecar_path: Path, hash_val: str) -> None:
-    """Write a sidecar file atomically."""
+def _write_sidecar_atomic(sidecar_path: Path, hash_val: str, stamp: str) -> None:
+    """Write a sidecar file (digest, then size:mtime_ns stamp) atomically."""
     tmp_path = sidecar_path.with_suffix('.tmp')
     try:
-        tmp_path.write_text(hash_val + '\n', encoding='utf-8')
+        tmp_path.write_text(hash_val + '\n' + stamp + '\n', encoding='utf-8')
         tmp_path.replace(sidecar_path)
     except Exception:
         if tmp_path.exists():
@@ -124,8 +271,7 @@ def format_report(report: AssetReport, json_output: bool = False) -> str:
         Formatted report string
     """
     if json_output:
-        import json
-        return json.dumps({
+        return dumps_bytes({
             "total_refs": report.total_refs,
             "missing_count": len(report.missing_refs),
             "missing_refs": [
@@ -139,7 +285,7 @@ def format_report(report: AssetReport, json_output: bool = False) -> str:
             "dangling_count": len(report.dangling_files),
             "dangling_files": [str(f) for f in report.dangling_files],
             "hashes": {str(k): v for k, v in report.file_hashes.items()},
-        }, indent=2)
+        }, indent=True).decode("utf-8")
     else:
         lines = []
         lines.append("Asset Verification Report")
@@ -1,26 +1,28 @@
 """CLI for hypomnemata - a zettelkasten note-taking system."""
 
 import argparse
-import json
+import atexit
 import os
-import platform
-import subprocess
+import re
 import sys
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
 from typing import Any
 
 from . import __version__
-from .core.meta import MetaBag
-from .core.model import Anchor, Note
-from .core.slicer import slice_by_anchor
-from .export.quartz import QuartzAdapter
-from .lint import DeadLinksRule, Finding
-from .locate import cmd_locate
-from .runtime import build_runtime
+
+# Handler dependencies are imported inside each cmd_* so that `hypo --help`
+# and light commands don't pay for the index, export and lint subsystems.
+
+# Number shapes accepted by meta set (floats need a decimal point)
+_INT_RE = re.compile(r"[-+]?\d+")
+_FLOAT_RE = re.compile(r"[-+]?(?:\d+\.\d*|\.\d+)(?:[eE][-+]?\d+)?")
 
 
 def cmd_version(args: argparse.Namespace, rt: Any = None) -> int:
     """Print version information."""
+    import platform
+
     # Get Python version
     py_version = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
 
@@ -37,19 +39,18 @@ def cmd_version(args: argparse.Namespace, rt: Any = None) -> int:
 
 def cmd_reindex(args: argparse.Namespace, rt: Any) -> int:
     """Build or repair SQLite index."""
-    from .adapters.sqlite_index import SQLiteIndex
-
-    if not isinstance(rt.index, SQLiteIndex):
+    if not rt.is_sqlite_index:
         print("Error: Index is not a SQLiteIndex", file=sys.stderr)
         return 1
 
     full = getattr(args, "full", False)
     use_hash = getattr(args, "hash", False)
+    vacuum = getattr(args, "vacuum", False)
 
     if not args.quiet:
         print(f"Reindexing vault... (full={full}, hash={use_hash})")
 
-    counts = rt.index.rebuild(full=full, use_hash=use_hash)
+    counts = rt.index.rebuild(full=full, use_hash=use_hash, vacuum=vacuum)
 
     if not args.quiet:
         print(f"Scanned: {counts['scanned']}")
@@ -63,14 +64,41 @@ def cmd_reindex(args: argparse.Namespace, rt: Any) -> int:
     return 0
 
 
-def cmd_id(args: argparse.Namespace, rt: Any) -> int:
+def cmd_id(args: argparse.Namespace, rt: Any = None) -> int:
     """Print a new random ID."""
+    if rt is None:
+        # Only the configured ID width is needed, not the vault or index
+        from .adapters.idgen import HexId
+        from .config import load_config
+
+        config = load_config(config_path=args.config, vault_path=args.vault)
+        print(HexId(nbytes=config.id.bytes).new_id())
+        return 0
     print(rt.idgen.new_id())
     return 0
 
 
+def _open_in_editor(filepath: Path) -> None:
+    """Run $EDITOR (default vi) on filepath."""
+    editor = os.environ.get("EDITOR", "vi")
+    if os.name == "posix" and sys.stdin.isatty() and sys.stdout.isatty():
+        # Interactive: nothing is left to do afterwards, so the editor replaces
+        # this process instead of keeping the interpreter alive while it runs.
+        # Scripts keep the old subprocess path and its exit status of 0.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execvp(editor, [editor, str(filepath)])
+
+    import subprocess
+
+    subprocess.run([editor, str(filepath)])
+
+
 def cmd_new(args: argparse.Namespace, rt: Any) -> int:
     """Create a new note."""
+    from .core.meta import MetaBag
+    from .core.model import Note
+
     nid = rt.idgen.new_id()
 
     # Build metadata from args
@@ -95,9 +123,7 @@ def cmd_new(args: argparse.Namespace, rt: Any) -> int:
 
     # Open in editor if requested
     if args.edit:
-        editor = os.environ.get("EDITOR", "vi")
-        filepath = rt.vault.storage._path(nid)
-        subprocess.run([editor, str(filepath)])
+        _open_in_editor(rt.vault.storage._path(nid))
 
     return 0
 
@@ -118,242 +144,244 @@ def cmd_edit(args: argparse.Namespace, rt: Any) -> int:
         print(f"Note {args.id} not found", file=sys.stderr)
         return 1
 
-    editor = os.environ.get("EDITOR", "vi")
-    filepath = rt.vault.storage._path(args.id)
-    subprocess.run([editor, str(filepath)])
+    _open_in_editor(rt.vault.storage._path(args.id))
     return 0
 
 
+def _pair_titles(
+    ids: list[str], rows: Iterator[tuple[str, str]]
+) -> Iterator[tuple[str, str]]:
+    """Pair sorted ids with titles from rows sorted by id, walking both once."""
+    row = next(rows, None)
+    for nid in ids:
+        while row is not None and row[0] < nid:
+            row = next(rows, None)
+        yield nid, row[1] if row is not None and row[0] == nid else ""
+
+
+def _write_lines(lines: Iterable[str]) -> None:
+    """Write newline-terminated lines to stdout as one encoded buffer write."""
+    data = "".join(lines).encode(sys.stdout.encoding or "utf-8", sys.stdout.errors or "strict")
+    # Anything print()ed earlier must reach the buffer first
+    sys.stdout.flush()
+    sys.stdout.buffer.write(data)
+
+
+def _print_json_array(rows: Iterable[Any]) -> None:
+    """Print rows as an indented JSON array, encoding (with orjson if installed) row by row."""
+    from .jsonio import write_array
+
+    # Anything print()ed earlier must reach the buffer first
+    sys.stdout.flush()
+    write_array(rows, sys.stdout.buffer)
+    sys.stdout.buffer.write(b"\n")
+
+
 def cmd_ls(args: argparse.Namespace, rt: Any) -> int:
     """List notes with optional filters."""
-    from .adapters.sqlite_index import SQLiteIndex
-
     # Filter for orphans using DB if available
     if args.orphans:
-        if isinstance(rt.index, SQLiteIndex):
+        if rt.is_sqlite_index:
             ids = rt.index.orphans()
         else:
             # Fallback to old method
             rt.index.rebuild()
-            ids = list(rt.vault.list_ids())
-            filtered = []
-            for nid in ids:
-                if not rt.index.links_in(nid) and not rt.index.links_out(nid):
-                    filtered.append(nid)
-            ids = filtered
+            ids = [
+                nid
+                for nid in rt.vault.list_ids()
+                if not rt.index.links_in(nid) and not rt.index.links_out(nid)
+            ]
     else:
-        ids = list(rt.vault.list_ids())
+        ids = rt.vault.list_ids()
 
-        # Filter by grep pattern
+        # Filter by grep pattern; a case-insensitive regex scans each body in
+        # place instead of lower-casing a copy of it
         if args.grep:
-            pattern = args.grep.lower()
-            filtered = []
-            for nid in ids:
-                note = rt.vault.get(nid)
-                if note and pattern in note.body.raw.lower():
-                    filtered.append(nid)
-            ids = filtered
+            regex = re.compile(re.escape(args.grep), re.IGNORECASE)
+            ids = [
+                nid
+                for nid in ids
+                if (note := rt.vault.get(nid)) and regex.search(note.body.raw)
+            ]
 
     # Sort IDs
     ids = sorted(ids)
 
     # Handle different output formats
-    if getattr(args, "format", None) == "json":
-        # JSON output with titles
-        if isinstance(rt.index, SQLiteIndex):
-            conn = rt.index._conn()
-            try:
-                result = []
-                for nid in ids:
-                    row = conn.execute("SELECT title FROM notes WHERE id = ?", (nid,)).fetchone()
-                    title = row[0] if row else ""
-                    result.append({"id": nid, "title": title})
-                print(json.dumps(result, indent=2))
-            finally:
-                conn.close()
-        else:
-            # Fallback without titles
-            result = [{"id": nid, "title": ""} for nid in ids]
-            print(json.dumps(result, indent=2))
-    elif getattr(args, "with_titles", False):
-        # Tab-separated output
-        if isinstance(rt.index, SQLiteIndex):
-            conn = rt.index._conn()
-            try:
-                for nid in ids:
-                    row = conn.execute("SELECT title FROM notes WHERE id = ?", (nid,)).fetchone()
-                    title = row[0] if row else ""
-                    print(f"{nid}\t{title}")
-            finally:
-                conn.close()
+    as_json = getattr(args, "format", None) == "json"
+    if as_json or getattr(args, "with_titles", False):
+        # Titles come from one id-ordered cursor walked alongside the ids;
+        # without a SQLiteIndex they're left empty
+        rows = rt.index.iter_titles() if rt.is_sqlite_index else iter(())
+        titled = _pair_titles(ids, rows)
+        if as_json:
+            _print_json_array({"id": nid, "title": title} for nid, title in titled)
         else:
-            # Fallback without titles
-            for nid in ids:
-                print(f"{nid}\t")
+            _write_lines(f"{nid}\t{title}\n" for nid, title in titled)
     else:
         # Default: just IDs
-        for nid in ids:
-            print(nid)
+        _write_lines(f"{nid}\n" for nid in ids)
 
     return 0
 
 
 def cmd_find(args: argparse.Namespace, rt: Any) -> int:
     """Full-text search."""
-    from .adapters.sqlite_index import SQLiteIndex
-
     limit = getattr(args, "limit", 50)
     snippets = getattr(args, "snippets", False)
     aliases = getattr(args, "aliases", False)
     fields = getattr(args, "fields", None)
 
-    if isinstance(rt.index, SQLiteIndex):
-        results = list(rt.index.search(args.query, limit=limit))
+    if rt.is_sqlite_index:
+        snippet_map: dict[str, str] = {}
+        if snippets and not fields:
+            # Ids and snippets from one FTS match rather than one per hit
+            hits = rt.index.search_with_snippets(args.query, limit=limit)
+            snippet_map = dict(hits)
 
-        # Add alias matches if requested
         if aliases:
-            conn = rt.index._conn()
-            try:
-                alias_rows = conn.execute(
-                    "SELECT DISTINCT note_id FROM kv WHERE key = 'core/alias' AND value LIKE ?",
-                    (f"%{args.query}%",),
-                ).fetchall()
-
-                for row in alias_rows:
-                    if row[0] not in results:
-                        results.append(row[0])
-            finally:
-                conn.close()
+            # FTS hits followed by alias matches, merged in SQL
+            results = rt.index.search_with_aliases(args.query, limit=limit)
+        elif snippets and not fields:
+            results = [nid for nid, _ in hits]
+        else:
+            results = list(rt.index.search(args.query, limit=limit))
 
         # Output with fields
         if fields:
             field_list = [f.strip() for f in fields.split(",")]
-            conn = rt.index._conn()
-            try:
-                for nid in results:
-                    values = []
-                    for field in field_list:
-                        if field == "id":
-                            values.append(nid)
-                        elif field == "title":
-                            row = conn.execute(
-                                "SELECT title FROM notes WHERE id = ?", (nid,)
-                            ).fetchone()
-                            values.append(row[0] if row else "")
-                        else:
-                            values.append("")
-                    print("\t".join(values))
-            finally:
-                conn.close()
-        elif snippets:
+            titles = rt.index.titles(results) if "title" in field_list else {}
+            lines = []
             for nid in results:
-                snippet = rt.index.snippet(nid, args.query)
-                if snippet:
-                    print(f"{nid}\t{snippet}")
-                else:
-                    print(nid)
+                values = []
+                for field in field_list:
+                    if field == "id":
+                        values.append(nid)
+                    elif field == "title":
+                        values.append(titles.get(nid, ""))
+                    else:
+                        values.append("")
+                lines.append("\t".join(values) + "\n")
+            _write_lines(lines)
+        elif snippets:
+            _write_lines(
+                f"{nid}\t{snippet_map[nid]}\n" if snippet_map.get(nid) else f"{nid}\n"
+                for nid in results
+            )
         else:
-            for nid in results:
-                print(nid)
+            _write_lines(f"{nid}\n" for nid in results)
     else:
         # Fallback to old method
         rt.index.rebuild()
         results = rt.index.search(args.query, limit=limit)
-        for nid in sorted(results):
-            print(nid)
+        _write_lines(f"{nid}\n" for nid in sorted(results))
 
     return 0
 
 
 def cmd_backrefs(args: argparse.Namespace, rt: Any) -> int:
     """Show incoming links with context."""
+    from .locate import LineIndex
+
     context = getattr(args, "context", 2)
 
     incoming = rt.index.links_in(args.id)
 
+    # Each source note is loaded and split into lines once, however many of
+    # its links point here
+    notes = rt.vault.get_many(link.source for link in incoming)
+    line_indexes = {
+        source: LineIndex(note.body.raw) if note else None for source, note in notes.items()
+    }
+    hits = [
+        (link, line_index.context(link.range.start, context))
+        for link in incoming
+        if (line_index := line_indexes[link.source]) and link.range
+    ]
+
     if args.json:
-        output = []
-        for link in incoming:
-            note = rt.vault.get(link.source)
-            if note and link.range:
-                # Extract context lines around the link
-                lines = note.body.raw[: link.range.start].splitlines()
-                start_line = max(0, len(lines) - context)
-                end_line = len(lines) + context
-                context_lines = note.body.raw.splitlines()[start_line:end_line]
-                output.append(
-                    {
-                        "source": link.source,
-                        "start": link.range.start,
-                        "end": link.range.end,
-                        "context": "\n".join(context_lines),
-                    }
-                )
-        print(json.dumps(output, indent=2))
+        _print_json_array(
+            {
+                "source": link.source,
+                "start": link.range.start,
+                "end": link.range.end,
+                "context": "\n".join(context_lines),
+            }
+            for link, context_lines in hits
+        )
     else:
-        for link in incoming:
-            note = rt.vault.get(link.source)
-            if note and link.range:
-                lines = note.body.raw[: link.range.start].splitlines()
-                start_line = max(0, len(lines) - context)
-                end_line = len(lines) + context
-                context_lines = note.body.raw.splitlines()[start_line:end_line]
-                if not args.quiet:
-                    print(f"\n{link.source}:")
-                for line in context_lines:
-                    print(f"  {line}")
+        lines = []
+        for link, context_lines in hits:
+            if not args.quiet:
+                lines.append(f"\n{link.source}:\n")
+            lines.extend(f"  {line}\n" for line in context_lines)
+        _write_lines(lines)
 
     return 0
 
 
 def cmd_graph(args: argparse.Namespace, rt: Any) -> int:
     """Export graph data."""
-    from .adapters.sqlite_index import SQLiteIndex
-
-    if not isinstance(rt.index, SQLiteIndex):
+    if not rt.is_sqlite_index:
         print("Error: Graph command requires SQLiteIndex", file=sys.stderr)
         return 1
 
-    graph_data = rt.index.graph_data()
-
     if getattr(args, "dot", False):
-        # Output DOT format
-        print("digraph vault {")
-        print("  rankdir=LR;")
-        print("  node [shape=box];")
-        for node in graph_data["nodes"]:
-            label = node["title"] or node["id"]
-            print(f'  "{node["id"]}" [label="{label}"];')
-        for edge in graph_data["edges"]:
-            print(f'  "{edge["source"]}" -> "{edge["target"]}";')
-        print("}")
+        # Output DOT format, formatted straight from the node and edge cursors
+        lines = ["digraph vault {\n", "  rankdir=LR;\n", "  node [shape=box];\n"]
+        lines.extend(
+            f'  "{nid}" [label="{title or nid}"];\n' for nid, title in rt.index.iter_titles()
+        )
+        lines.extend(f'  "{src}" -> "{dst}";\n' for src, dst in rt.index.iter_edges())
+        lines.append("}\n")
+        _write_lines(lines)
     else:
         # Output JSON format (default)
-        print(json.dumps(graph_data, indent=2))
+        from .jsonio import dumps_bytes
+
+        sys.stdout.flush()
+        sys.stdout.buffer.write(dumps_bytes(rt.index.graph_data(), indent=True) + b"\n")
 
     return 0
 
 
 def cmd_lint(args: argparse.Namespace, rt: Any) -> int:
     """Validate links and frontmatter."""
+    from .core.model import Range
+    from .lint import DeadLinksRule, Finding
+
     rt.index.rebuild()
-    rule = DeadLinksRule()
 
     all_findings: list[tuple[str, Finding]] = []
-    for nid in rt.vault.list_ids():
-        note = rt.vault.get(nid)
-        if note:
-            findings = rule.check(note, rt.resolver, rt.index)
-            for f in findings:
-                all_findings.append((nid, f))
-
-            # Check frontmatter ID mismatch
-            if "id" in note.meta and note.meta["id"] != nid:
-                msg = f"Frontmatter ID '{note.meta['id']}' doesn't match filename '{nid}'"
-                all_findings.append((nid, Finding("error", msg)))
+    if rt.is_sqlite_index:
+        # The rebuilt index answers both checks without loading any note
+        by_note: dict[str, list[Finding]] = {}
+        for src, start, end, dst, problem in rt.index.link_problems():
+            if problem == "dead":
+                finding = Finding("error", f"Unknown note id {dst}", Range(start, end))
+            else:
+                finding = Finding("warn", f"Unknown anchor for {dst}", Range(start, end))
+            by_note.setdefault(src, []).append(finding)
+        for nid, frontmatter_id in rt.index.id_mismatches():
+            msg = f"Frontmatter ID '{frontmatter_id}' doesn't match filename '{nid}'"
+            by_note.setdefault(nid, []).append(Finding("error", msg))
+        all_findings = [(nid, f) for nid in sorted(by_note) for f in by_note[nid]]
+    else:
+        rule = DeadLinksRule()
+        for nid in rt.vault.list_ids():
+            note = rt.vault.get(nid)
+            if note:
+                findings = rule.check(note, rt.resolver, rt.index)
+                for f in findings:
+                    all_findings.append((nid, f))
+
+                # Check frontmatter ID mismatch
+                if "id" in note.meta and note.meta["id"] != nid:
+                    msg = f"Frontmatter ID '{note.meta['id']}' doesn't match filename '{nid}'"
+                    all_findings.append((nid, Finding("error", msg)))
 
     if args.json:
-        output = [
+        _print_json_array(
             {
                 "note_id": nid,
                 "severity": f.severity,
@@ -361,18 +389,17 @@ def cmd_lint(args: argparse.Namespace, rt: Any) -> int:
                 "range": {"start": f.range.start, "end": f.range.end} if f.range else None,
             }
             for nid, f in all_findings
-        ]
-        print(json.dumps(output, indent=2))
-    else:
-        for nid, f in all_findings:
-            if not args.quiet:
-                print(f"{nid}: [{f.severity}] {f.message}")
+        )
+    elif not args.quiet:
+        _write_lines(f"{nid}: [{f.severity}] {f.message}\n" for nid, f in all_findings)
 
     return 1 if any(f.severity == "error" for _, f in all_findings) else 0
 
 
 def cmd_export_quartz(args: argparse.Namespace, rt: Any) -> int:
     """Export to Quartz format with graph.json."""
+    from .export.quartz import QuartzAdapter
+
     outdir = Path(args.outdir)
 
     # Get assets dir if specified
@@ -419,6 +446,9 @@ def cmd_rm(args: argparse.Namespace, rt: Any) -> int:
 
 def cmd_yank(args: argparse.Namespace, rt: Any) -> int:
     """Print a slice of a note based on anchor."""
+    from .core.model import Anchor
+    from .core.slicer import slice_by_anchor, strip_fence
+
     # Parse ref into id and optional anchor
     ref = args.ref
     anchor = None
@@ -455,35 +485,27 @@ def cmd_yank(args: argparse.Namespace, rt: Any) -> int:
     slice_text = note.body.raw[start:end]
 
     # Handle --plain flag for fenced blocks
-    if args.plain and slice_text.strip().startswith("```"):
-        lines = slice_text.splitlines(keepends=True)
-        # Remove first and last lines if they are fence markers
-        if len(lines) >= 2 and lines[0].strip().startswith("```") and lines[-1].strip() == "```":
-            slice_text = "".join(lines[1:-1])
-        elif len(lines) >= 2 and lines[0].strip().startswith("```"):
-            # Handle case where last line might not be just ```
-            for i in range(len(lines) - 1, 0, -1):
-                if lines[i].strip() == "```":
-                    slice_text = "".join(lines[1:i])
-                    break
+    if args.plain:
+        slice_text = strip_fence(slice_text)
 
     # Handle --context flag
     if args.context > 0:
-        # Add N lines before and after
-        all_lines = note.body.raw.splitlines(keepends=True)
-        slice_lines = slice_text.splitlines(keepends=True)
-
-        # Find where slice starts in the full text
-        slice_start_line = 0
-        for i, line in enumerate(all_lines):
-            if slice_lines and line == slice_lines[0]:
-                slice_start_line = i
+        # Add N lines before and after, widening the slice's own offsets
+        # newline by newline rather than splitting the whole body
+        raw = note.body.raw
+        first = raw.rfind("\n", 0, start) + 1
+        for _ in range(args.context):
+            if first == 0:
                 break
+            first = raw.rfind("\n", 0, first - 1) + 1
 
-        start_line = max(0, slice_start_line - args.context)
-        end_line = min(len(all_lines), slice_start_line + len(slice_lines) + args.context)
+        last = end if end == 0 or raw[end - 1] == "\n" else raw.find("\n", end) + 1 or len(raw)
+        for _ in range(args.context):
+            if last >= len(raw):
+                break
+            last = raw.find("\n", last) + 1 or len(raw)
 
-        slice_text = "".join(all_lines[start_line:end_line])
+        slice_text = raw[first:last]
 
     print(slice_text, end="")
     return 0
@@ -491,6 +513,8 @@ def cmd_yank(args: argparse.Namespace, rt: Any) -> int:
 
 def cmd_meta_get(args: argparse.Namespace, rt: Any) -> int:
     """Get metadata values from a note."""
+    import json
+
     note = rt.vault.get(args.id)
     if note is None:
         print(f"Note {args.id} not found", file=sys.stderr)
@@ -518,6 +542,28 @@ def cmd_meta_get(args: argparse.Namespace, rt: Any) -> int:
     return 0
 
 
+def _coerce_meta_value(value_str: str) -> Any:
+    """Parse a meta value as JSON object/array, bool, int or float, else keep the string."""
+    # Check for JSON objects/arrays
+    if value_str.startswith(("{", "[")):
+        import json
+
+        try:
+            return json.loads(value_str)
+        except json.JSONDecodeError:
+            return value_str  # Use as string
+    # Check for boolean
+    lowered = value_str.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    # Check for numbers by shape, so plain strings never raise
+    if _INT_RE.fullmatch(value_str):
+        return int(value_str)
+    if _FLOAT_RE.fullmatch(value_str):
+        return float(value_str)
+    return value_str
+
+
 def cmd_meta_set(args: argparse.Namespace, rt: Any) -> int:
     """Set metadata values in a note."""
     note = rt.vault.get(args.id)
@@ -535,29 +581,7 @@ def cmd_meta_set(args: argparse.Namespace, rt: Any) -> int:
         key = key.strip()
         value_str = value_str.strip()
 
-        # Try to parse value intelligently
-        value: Any = value_str
-
-        # Check for JSON objects/arrays
-        if value_str.startswith("{") or value_str.startswith("["):
-            try:
-                value = json.loads(value_str)
-            except json.JSONDecodeError:
-                pass  # Use as string
-        # Check for boolean
-        elif value_str.lower() in ("true", "false"):
-            value = value_str.lower() == "true"
-        # Check for numbers
-        else:
-            try:
-                if "." in value_str:
-                    value = float(value_str)
-                else:
-                    value = int(value_str)
-            except ValueError:
-                pass  # Use as string
-
-        note.meta[key] = value
+        note.meta[key] = _coerce_meta_value(value_str)
 
     # Save note
     rt.vault.put(note)
@@ -610,86 +634,82 @@ def cmd_meta_show(args: argparse.Namespace, rt: Any) -> int:
 
 def cmd_resolve(args: argparse.Namespace, rt: Any) -> int:
     """Resolve text to note ID via aliases or title."""
-    from .adapters.sqlite_index import SQLiteIndex
-
     text = args.text
 
-    if not isinstance(rt.index, SQLiteIndex):
+    if not rt.is_sqlite_index:
         print("Error: Resolve command requires SQLiteIndex", file=sys.stderr)
         return 1
 
-    conn = rt.index._conn()
-    try:
-        # First, check for exact alias match
-        alias_rows = conn.execute(
-            "SELECT note_id FROM kv WHERE key = 'core/alias' AND value = ?", (text,)
-        ).fetchall()
-
-        if len(alias_rows) == 1:
-            # Exact alias match
-            print(alias_rows[0][0])
-            return 0
-        elif len(alias_rows) > 1:
-            # Multiple aliases match - ambiguous
-            if not args.quiet:
-                print(f"Ambiguous: '{text}' matches multiple notes via aliases:", file=sys.stderr)
-                for row in alias_rows:
-                    note_id = row[0]
-                    title_row = conn.execute(
-                        "SELECT title FROM notes WHERE id = ?", (note_id,)
-                    ).fetchone()
-                    title = title_row[0] if title_row else ""
-                    print(f"  {note_id}\t{title} (alias)", file=sys.stderr)
-            return 2
-
-        # Check for exact title match
-        title_rows = conn.execute("SELECT id FROM notes WHERE title = ?", (text,)).fetchall()
-
-        if len(title_rows) == 1:
-            # Exact title match
-            print(title_rows[0][0])
-            return 0
-        elif len(title_rows) > 1:
-            # Multiple titles match - ambiguous
-            if not args.quiet:
-                print(f"Ambiguous: '{text}' matches multiple notes via title:", file=sys.stderr)
-                for row in title_rows:
-                    print(f"  {row[0]}\t{text}", file=sys.stderr)
-            return 2
+    # The index's cached connection, shared with match_titles/match_aliases
+    conn = rt.index._get_conn()
+
+    # First, check for exact alias match
+    alias_rows = conn.execute(
+        "SELECT note_id FROM kv WHERE key = 'core/alias' AND value = ?", (text,)
+    ).fetchall()
 
-        # No exact match - show candidates
+    if len(alias_rows) == 1:
+        # Exact alias match
+        print(alias_rows[0][0])
+        return 0
+    elif len(alias_rows) > 1:
+        # Multiple aliases match - ambiguous
         if not args.quiet:
-            print(f"No exact match for '{text}'. Candidates:", file=sys.stderr)
+            print(f"Ambiguous: '{text}' matches multiple notes via aliases:", file=sys.stderr)
+            titles = rt.index.titles([row[0] for row in alias_rows])
+            for row in alias_rows:
+                print(f"  {row[0]}\t{titles.get(row[0], '')} (alias)", file=sys.stderr)
+        return 2
+
+    # Check for exact title match
+    title_rows = conn.execute("SELECT id FROM notes WHERE title = ?", (text,)).fetchall()
+
+    if len(title_rows) == 1:
+        # Exact title match
+        print(title_rows[0][0])
+        return 0
+    elif len(title_rows) > 1:
+        # Multiple titles match - ambiguous
+        if not args.quiet:
+            print(f"Ambiguous: '{text}' matches multiple notes via title:", file=sys.stderr)
+            for row in title_rows:
+                print(f"  {row[0]}\t{text}", file=sys.stderr)
+        return 2
+
+    # No exact match - show candidates
+    if not args.quiet:
+        print(f"No exact match for '{text}'. Candidates:", file=sys.stderr)
 
-            # Find similar titles
-            similar_titles = conn.execute(
-                "SELECT id, title FROM notes WHERE title LIKE ? LIMIT 10", (f"%{text}%",)
-            ).fetchall()
+        # Find similar titles and aliases through the FTS indexes
+        for note_id, title in rt.index.match_titles(text, limit=10):
+            print(f"  {note_id}\t{title}", file=sys.stderr)
 
-            for note_id, title in similar_titles:
-                print(f"  {note_id}\t{title}", file=sys.stderr)
+        for note_id, alias in rt.index.match_aliases(text, limit=10):
+            print(f"  {note_id}\t{alias} (alias)", file=sys.stderr)
 
-            # Find similar aliases
-            similar_aliases = conn.execute(
-                "SELECT note_id, value FROM kv WHERE key = 'core/alias' AND value LIKE ? LIMIT 10",
-                (f"%{text}%",),
-            ).fetchall()
+    return 2  # Ambiguous/not found
 
-            for note_id, alias in similar_aliases:
-                print(f"  {note_id}\t{alias} (alias)", file=sys.stderr)
 
-        return 2  # Ambiguous/not found
-    finally:
-        conn.close()
+def _reservoir_sample(items: Iterable[str], k: int) -> list[str]:
+    """Pick up to k items uniformly at random in one pass, without storing the rest."""
+    import random
+
+    sample: list[str] = []
+    for seen, item in enumerate(items):
+        if seen < k:
+            sample.append(item)
+        else:
+            slot = random.randrange(seen + 1)
+            if slot < k:
+                sample[slot] = item
+    return sample
 
 
 def cmd_doctor(args: argparse.Namespace, rt: Any) -> int:
     """Run diagnostics on the vault and index."""
-    import random
+    import platform
     import sqlite3
 
-    from .adapters.sqlite_index import SQLiteIndex
-
     # If --versions flag is set, show version information
     if getattr(args, "versions", False):
         print("Version Information:")
@@ -756,7 +776,7 @@ def cmd_doctor(args: argparse.Namespace, rt: Any) -> int:
             issues.append("vault_not_writable")
 
     # Check DB exists and schema is correct
-    if isinstance(rt.index, SQLiteIndex):
+    if rt.is_sqlite_index:
         db_path = rt.index.db_path
         if not db_path.exists():
             print(f"✗ Database does not exist: {db_path}")
@@ -765,9 +785,8 @@ def cmd_doctor(args: argparse.Namespace, rt: Any) -> int:
             print(f"✓ Database exists: {db_path}")
 
             # Check schema version
-            conn = rt.index._conn()
             try:
-                schema_version = conn.execute(
+                schema_version = rt.index._get_conn().execute(
                     "SELECT value FROM meta WHERE key = 'schema_version'"
                 ).fetchone()
 
@@ -779,16 +798,15 @@ def cmd_doctor(args: argparse.Namespace, rt: Any) -> int:
             except Exception as e:
                 print(f"✗ Failed to check schema: {e}")
                 issues.append("schema_check_failed")
-            finally:
-                conn.close()
     else:
         print("⚠ Not using SQLiteIndex")
 
-    # Sample parse on N random notes
-    all_ids = list(rt.vault.list_ids())
-    if all_ids:
-        sample_size = min(10, len(all_ids))
-        sample_ids = random.sample(all_ids, sample_size)
+    # Sample parse on N random notes, drawn while listing the vault so the
+    # ids are never collected into a list. The vault rather than the index is
+    # sampled: notes that failed to parse are exactly the ones not indexed.
+    sample_ids = _reservoir_sample(rt.vault.list_ids(), 10)
+    if sample_ids:
+        sample_size = len(sample_ids)
 
         parse_errors = 0
         for nid in sample_ids:
@@ -805,25 +823,14 @@ def cmd_doctor(args: argparse.Namespace, rt: Any) -> int:
         print("⚠ No notes found in vault")
 
     # Report counts
-    if isinstance(rt.index, SQLiteIndex):
-        conn = rt.index._conn()
-        try:
-            note_count = conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
-            link_count = conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
-
-            # Count orphans (notes with no incoming or outgoing links)
-            orphan_count = conn.execute("""
-                SELECT COUNT(*) FROM notes
-                WHERE id NOT IN (SELECT DISTINCT src FROM links)
-                  AND id NOT IN (SELECT DISTINCT dst FROM links)
-            """).fetchone()[0]
-
-            print("\nCounts:")
-            print(f"  Notes: {note_count}")
-            print(f"  Links: {link_count}")
-            print(f"  Orphans: {orphan_count}")
-        finally:
-            conn.close()
+    if rt.is_sqlite_index:
+        # Notes, links and orphans (no incoming or outgoing links) in one query
+        counts = rt.index.counts()
+
+        print("\nCounts:")
+        print(f"  Notes: {counts['notes']}")
+        print(f"  Links: {counts['links']}")
+        print(f"  Orphans: {counts['orphans']}")
 
     # Recommendations
     if issues:
@@ -838,6 +845,13 @@ def cmd_doctor(args: argparse.Namespace, rt: Any) -> int:
         return 0
 
 
+def cmd_locate(args: argparse.Namespace, rt: Any) -> int:
+    """Get precise location of a note or anchor."""
+    from .locate import cmd_locate as locate
+
+    return locate(args, rt)
+
+
 def cmd_watch(args: argparse.Namespace, rt: Any) -> int:
     """Watch vault for changes and incrementally reindex."""
     from .watch import watch_vault
@@ -1042,10 +1056,11 @@ def cmd_import_rollback(args: argparse.Namespace, rt: Any) -> int:
 
 def cmd_migrate_links(args: argparse.Namespace, rt: Any) -> int:
     """Migrate wiki/MD links to ID-based format."""
-    from .adapters.sqlite_index import SQLiteIndex
-    from .import_migrate.migrate import apply_migration, migrate_file_links
+    from concurrent.futures import ThreadPoolExecutor
 
-    if not isinstance(rt.index, SQLiteIndex):
+    from .import_migrate.migrate import apply_migration, iter_migration_batches
+
+    if not rt.is_sqlite_index:
         print("Error: Migrate requires SQLiteIndex", file=sys.stderr)
         return 1
 
@@ -1056,42 +1071,55 @@ def cmd_migrate_links(args: argparse.Namespace, rt: Any) -> int:
 
     vault_path = rt.vault.storage.root
 
-    # Ensure index is up to date
+    # Ensure index is up to date; only changed notes are reparsed unless --full
     if not args.quiet:
         print("Updating index...")
-    rt.index.rebuild()
+    rt.index.rebuild(full=args.full)
 
     # Migrate all files in vault
-    total_files = 0
     total_changes = 0
     total_errors = 0
 
-    for note_id in rt.vault.list_ids():
-        file_path = vault_path / f"{note_id}.md"
-        if not file_path.exists():
-            continue
-
-        total_files += 1
-
-        result = migrate_file_links(
-            file_path=file_path,
-            vault_path=vault_path,
-            index=rt.index,
-            from_format=args.from_format,
-            resolver_mode=args.resolver,
-            prefer=args.prefer,
-        )
-
-        if result.errors:
-            total_errors += len(result.errors)
-            if not args.quiet:
-                print(f"\n{file_path}:")
-                for error in result.errors:
-                    print(f"  ! {error}")
+    # Snapshot the ids: files are rewritten in place while we iterate
+    file_paths = [
+        file_path
+        for note_id in list(rt.vault.list_ids())
+        if (file_path := vault_path / f"{note_id}.md").exists()
+    ]
+    total_files = len(file_paths)
+
+    # Each batch resolves its links with a few index queries (in worker
+    # processes for large vaults); its rewritten files are independent, so
+    # they're written concurrently
+    batches = iter_migration_batches(
+        file_paths,
+        vault_path=vault_path,
+        index=rt.index,
+        from_format=args.from_format,
+        resolver_mode=args.resolver,
+        prefer=args.prefer,
+    )
+    with ThreadPoolExecutor(max_workers=min(16, os.cpu_count() or 1)) as pool:
+        for results in batches:
+            changed = []
+            for result in results:
+                if result.errors:
+                    total_errors += len(result.errors)
+                    if not args.quiet:
+                        print(f"\n{result.path}:")
+                        for error in result.errors:
+                            print(f"  ! {error}")
+
+                if result.changes > 0:
+                    total_changes += result.changes
+                    if args.dry_run:
+                        # Diffs print in file order, after the file's errors
+                        apply_migration(result, dry_run=True)
+                    else:
+                        changed.append(result)
 
-        if result.changes > 0:
-            total_changes += result.changes
-            apply_migration(result, dry_run=args.dry_run)
+            # Consuming the results re-raises the first failed write
+            list(pool.map(apply_migration, changed))
 
     # Print summary
     if not args.quiet:
@@ -1105,15 +1133,16 @@ def cmd_migrate_links(args: argparse.Namespace, rt: Any) -> int:
 
 def cmd_audit_links(args: argparse.Namespace, rt: Any) -> int:
     """Audit vault for link integrity."""
-    from .adapters.sqlite_index import SQLiteIndex
+    import json
+
     from .import_migrate.audit import audit_vault
 
-    if not isinstance(rt.index, SQLiteIndex):
+    if not rt.is_sqlite_index:
         print("Error: Audit requires SQLiteIndex", file=sys.stderr)
         return 1
 
-    # Ensure index is up to date
-    rt.index.rebuild()
+    # Ensure index is up to date; only changed notes are reparsed unless --full
+    rt.index.rebuild(full=args.full)
 
     # Run audit
     report = audit_vault(rt.vault, rt.index, strict=args.strict)
@@ -1243,6 +1272,7 @@ def cmd_verify_assets(args: argparse.Namespace, rt: Any) -> int:
         assets_dir=assets_dir,
         compute_hashes=args.hashes,
         write_sidecars=args.write_sidecars,
+        algorithm=args.algorithm,
     )
 
     # Output report
@@ -1264,48 +1294,25 @@ def cmd_fix(args: argparse.Namespace, rt: Any) -> int:
     return 0
 
 
-def main() -> None:
-    """Main CLI entry point."""
-    parser = argparse.ArgumentParser(prog="hypo", description="Hypomnemata CLI")
-    parser.add_argument(
-        "--version",
-        action="store_true",
-        help="Show version information",
-    )
-    parser.add_argument(
-        "--config",
-        type=Path,
-        default=None,
-        help="Path to config file (default: search cwd/hypo.toml, vault/hypo.toml)",
-    )
-    parser.add_argument(
-        "--vault",
-        type=Path,
-        default=None,
-        help="Path to vault directory (overrides config)",
-    )
-    parser.add_argument(
-        "--db",
-        type=Path,
-        default=None,
-        help="Path to SQLite index DB (overrides config)",
-    )
-    parser.add_argument("-q", "--quiet", action="store_true", help="Minimize output")
-    parser.add_argument("--json", action="store_true", help="Machine-readable output")
-
-    subparsers = parser.add_subparsers(dest="cmd", required=False)
-
-    # id command
+def _add_id_parser(subparsers: Any) -> None:
+    """Register the id command."""
     subparsers.add_parser("id", help="Print a new random ID")
 
-    # reindex command
+
+def _add_reindex_parser(subparsers: Any) -> None:
+    """Register the reindex command."""
     parser_reindex = subparsers.add_parser("reindex", help="Build or repair SQLite index")
     parser_reindex.add_argument("--full", action="store_true", help="Force full rebuild")
     parser_reindex.add_argument(
         "--hash", action="store_true", help="Use SHA256 hash for change detection"
     )
+    parser_reindex.add_argument(
+        "--vacuum", action="store_true", help="VACUUM the database after a --full rebuild"
+    )
+
 
-    # new command
+def _add_new_parser(subparsers: Any) -> None:
+    """Register the new command."""
     parser_new = subparsers.add_parser("new", help="Create a new note")
     parser_new.add_argument(
         "--meta",
@@ -1320,15 +1327,21 @@ def main() -> None:
         help="Open in $EDITOR after creation",
     )
 
-    # open command
+
+def _add_open_parser(subparsers: Any) -> None:
+    """Register the open command."""
     parser_open = subparsers.add_parser("open", help="Print raw Markdown to stdout")
     parser_open.add_argument("id", help="Note ID")
 
-    # edit command
+
+def _add_edit_parser(subparsers: Any) -> None:
+    """Register the edit command."""
     parser_edit = subparsers.add_parser("edit", help="Open in $EDITOR")
     parser_edit.add_argument("id", help="Note ID")
 
-    # ls command
+
+def _add_ls_parser(subparsers: Any) -> None:
+    """Register the ls command."""
     parser_ls = subparsers.add_parser("ls", help="List notes with filters")
     parser_ls.add_argument("--grep", help="Filter by content pattern")
     parser_ls.add_argument("--orphans", action="store_true", help="Show notes with no links")
@@ -1340,7 +1353,9 @@ def main() -> None:
     )
     parser_ls.add_argument("--format", choices=["json"], help="Output format (json)")
 
-    # find command
+
+def _add_find_parser(subparsers: Any) -> None:
+    """Register the find command."""
     parser_find = subparsers.add_parser("find", help="Full-text search")
     parser_find.add_argument("query", help="Search query")
     parser_find.add_argument("--limit", type=int, default=50, help="Maximum results (default: 50)")
@@ -1350,33 +1365,45 @@ def main() -> None:
     parser_find.add_argument("--aliases", action="store_true", help="Include alias matches")
     parser_find.add_argument("--fields", help="Comma-separated fields to display (e.g., id,title)")
 
-    # resolve command
+
+def _add_resolve_parser(subparsers: Any) -> None:
+    """Register the resolve command."""
     parser_resolve = subparsers.add_parser("resolve", help="Resolve text to note ID")
     parser_resolve.add_argument("text", help="Text to resolve (alias or title)")
 
-    # doctor command
+
+def _add_doctor_parser(subparsers: Any) -> None:
+    """Register the doctor command."""
     parser_doctor = subparsers.add_parser("doctor", help="Run diagnostics on vault and index")
     parser_doctor.add_argument(
         "--versions", action="store_true", help="Show version information for dependencies"
     )
 
-    # backrefs command
+
+def _add_backrefs_parser(subparsers: Any) -> None:
+    """Register the backrefs command."""
     parser_backrefs = subparsers.add_parser("backrefs", help="Show incoming links with context")
     parser_backrefs.add_argument("id", help="Note ID")
     parser_backrefs.add_argument(
         "--context", type=int, default=2, help="Context lines around link (default: 2)"
     )
 
-    # graph command
+
+def _add_graph_parser(subparsers: Any) -> None:
+    """Register the graph command."""
     parser_graph = subparsers.add_parser("graph", help="Export graph data")
     parser_graph.add_argument(
         "--dot", action="store_true", help="Output in DOT format for Graphviz"
     )
 
-    # lint command
+
+def _add_lint_parser(subparsers: Any) -> None:
+    """Register the lint command."""
     subparsers.add_parser("lint", help="Validate links and frontmatter")
 
-    # export command
+
+def _add_export_parser(subparsers: Any) -> None:
+    """Register the export command."""
     parser_export = subparsers.add_parser("export", help="Export vault")
     export_sub = parser_export.add_subparsers(dest="export_type", required=True)
     parser_quartz = export_sub.add_parser("quartz", help="Export to Quartz format")
@@ -1387,12 +1414,16 @@ def main() -> None:
         help="Copy assets from this directory to output/assets/",
     )
 
-    # rm command
+
+def _add_rm_parser(subparsers: Any) -> None:
+    """Register the rm command."""
     parser_rm = subparsers.add_parser("rm", help="Delete/trash a note")
     parser_rm.add_argument("id", help="Note ID")
     parser_rm.add_argument("--yes", action="store_true", help="Skip confirmation")
 
-    # yank command
+
+def _add_yank_parser(subparsers: Any) -> None:
+    """Register the yank command."""
     parser_yank = subparsers.add_parser("yank", help="Print a slice of a note")
     parser_yank.add_argument("ref", help="Note reference: <id> or <id>#<anchor>")
     parser_yank.add_argument(
@@ -1402,7 +1433,9 @@ def main() -> None:
         "--context", type=int, default=0, help="Include N lines before/after (default: 0)"
     )
 
-    # meta command
+
+def _add_meta_parser(subparsers: Any) -> None:
+    """Register the meta command."""
     parser_meta = subparsers.add_parser("meta", help="Manage note metadata")
     meta_sub = parser_meta.add_subparsers(dest="meta_cmd", required=True)
 
@@ -1421,7 +1454,9 @@ def main() -> None:
     parser_meta_show = meta_sub.add_parser("show", help="Pretty-print frontmatter")
     parser_meta_show.add_argument("id", help="Note ID")
 
-    # watch command
+
+def _add_watch_parser(subparsers: Any) -> None:
+    """Register the watch command."""
     parser_watch = subparsers.add_parser("watch", help="Watch vault for changes")
     parser_watch.add_argument(
         "--debounce-ms",
@@ -1430,7 +1465,9 @@ def main() -> None:
         help="Debounce window in milliseconds (default: 150)",
     )
 
-    # locate command
+
+def _add_locate_parser(subparsers: Any) -> None:
+    """Register the locate command."""
     parser_locate = subparsers.add_parser("locate", help="Get precise location of note or anchor")
     parser_locate.add_argument("ref", help="Note reference: <id> or <id>#<anchor>")
     parser_locate.add_argument(
@@ -1440,7 +1477,9 @@ def main() -> None:
         "--context", type=int, default=0, help="Context lines (reserved for future use)"
     )
 
-    # serve command
+
+def _add_serve_parser(subparsers: Any) -> None:
+    """Register the serve command."""
     parser_serve = subparsers.add_parser("serve", help="Start local JSON API server")
     parser_serve.add_argument(
         "--host", default="127.0.0.1", help="Host to bind to (default: 127.0.0.1)"
@@ -1456,7 +1495,9 @@ def main() -> None:
         "--openapi", action="store_true", help="Enable OpenAPI docs at /docs (default: false)"
     )
 
-    # fmt command
+
+def _add_fmt_parser(subparsers: Any) -> None:
+    """Register the fmt command."""
     parser_fmt = subparsers.add_parser("fmt", help="Format notes")
     parser_fmt.add_argument(
         "--frontmatter",
@@ -1506,26 +1547,38 @@ def main() -> None:
         help="Only process files that differ",
     )
 
-    # verify-assets command
+
+def _add_verify_assets_parser(subparsers: Any) -> None:
+    """Register the verify-assets command."""
     parser_verify = subparsers.add_parser("verify-assets", help="Verify asset integrity")
     parser_verify.add_argument("--assets-dir", help="Assets directory (default: vault/assets/)")
     parser_verify.add_argument(
-        "--hashes", action="store_true", help="Compute SHA256 hashes for assets"
+        "--hashes", action="store_true", help="Compute hashes for assets"
     )
     parser_verify.add_argument(
         "--write-sidecars",
         dest="write_sidecars",
         action="store_true",
-        help="Write .sha256 sidecar files",
+        help="Write .sha256 (or .blake3) sidecar files",
+    )
+    parser_verify.add_argument(
+        "--algorithm",
+        choices=["sha256", "blake3"],
+        default="sha256",
+        help="Hash algorithm (blake3 needs the blake3 package; default: sha256)",
     )
 
-    # fix command
+
+def _add_fix_parser(subparsers: Any) -> None:
+    """Register the fix command."""
     parser_fix = subparsers.add_parser("fix", help="Apply targeted autofixes")
     parser_fix.add_argument(
         "--dry-run", dest="dry_run", action="store_true", help="Show changes without writing"
     )
 
-    # import command
+
+def _add_import_parser(subparsers: Any) -> None:
+    """Register the import command."""
     parser_import = subparsers.add_parser("import", help="Import Markdown notes")
     import_sub = parser_import.add_subparsers(dest="import_cmd", required=True)
 
@@ -1588,7 +1641,9 @@ def main() -> None:
         "--confirm", action="store_true", help="Required to proceed (unless dry-run)"
     )
 
-    # migrate command
+
+def _add_migrate_parser(subparsers: Any) -> None:
+    """Register the migrate command."""
     parser_migrate = subparsers.add_parser("migrate", help="Migrate links")
     migrate_sub = parser_migrate.add_subparsers(dest="migrate_cmd", required=True)
 
@@ -1619,8 +1674,13 @@ def main() -> None:
         default="alias",
         help="Preference when both match (default: alias)",
     )
+    parser_migrate_links.add_argument(
+        "--full", action="store_true", help="Fully rebuild the index before migrating"
+    )
+
 
-    # audit command
+def _add_audit_parser(subparsers: Any) -> None:
+    """Register the audit command."""
     parser_audit = subparsers.add_parser("audit", help="Audit vault integrity")
     audit_sub = parser_audit.add_subparsers(dest="audit_cmd", required=True)
 
@@ -1629,7 +1689,99 @@ def main() -> None:
     parser_audit_links.add_argument(
         "--strict", action="store_true", help="Treat un-migrated links as errors"
     )
+    parser_audit_links.add_argument(
+        "--full", action="store_true", help="Fully rebuild the index before auditing"
+    )
+
+
+_SUBPARSERS: dict[str, Callable[[Any], None]] = {
+    "id": _add_id_parser,
+    "reindex": _add_reindex_parser,
+    "new": _add_new_parser,
+    "open": _add_open_parser,
+    "edit": _add_edit_parser,
+    "ls": _add_ls_parser,
+    "find": _add_find_parser,
+    "resolve": _add_resolve_parser,
+    "doctor": _add_doctor_parser,
+    "backrefs": _add_backrefs_parser,
+    "graph": _add_graph_parser,
+    "lint": _add_lint_parser,
+    "export": _add_export_parser,
+    "rm": _add_rm_parser,
+    "yank": _add_yank_parser,
+    "meta": _add_meta_parser,
+    "watch": _add_watch_parser,
+    "locate": _add_locate_parser,
+    "serve": _add_serve_parser,
+    "fmt": _add_fmt_parser,
+    "verify-assets": _add_verify_assets_parser,
+    "fix": _add_fix_parser,
+    "import": _add_import_parser,
+    "migrate": _add_migrate_parser,
+    "audit": _add_audit_parser,
+}
+
+# Global options that consume the following token
+_GLOBAL_VALUE_OPTIONS = frozenset({"--config", "--vault", "--db"})
+
+
+def _sniff_subcommand(argv: list[str]) -> str | None:
+    """Return the subcommand named in ``argv``, or None if there isn't a known one."""
+    skip = False
+    for token in argv:
+        if skip:
+            skip = False
+        elif token in _GLOBAL_VALUE_OPTIONS:
+            skip = True
+        elif not token.startswith("-"):
+            return token if token in _SUBPARSERS else None
+    return None
+
+
+def _build_parser(cmd: str | None = None) -> argparse.ArgumentParser:
+    """Build the CLI parser, registering only ``cmd``'s subparser when it is known."""
+    parser = argparse.ArgumentParser(prog="hypo", description="Hypomnemata CLI")
+    parser.add_argument(
+        "--version",
+        action="store_true",
+        help="Show version information",
+    )
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=None,
+        help="Path to config file (default: search cwd/hypo.toml, vault/hypo.toml)",
+    )
+    parser.add_argument(
+        "--vault",
+        type=Path,
+        default=None,
+        help="Path to vault directory (overrides config)",
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=None,
+        help="Path to SQLite index DB (overrides config)",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Minimize output")
+    parser.add_argument("--json", action="store_true", help="Machine-readable output")
+
+    subparsers = parser.add_subparsers(dest="cmd", required=False)
+    if cmd is not None:
+        _SUBPARSERS[cmd](subparsers)
+    else:
+        for register in _SUBPARSERS.values():
+            register(subparsers)
+    return parser
 
+
+def main() -> None:
+    """Main CLI entry point."""
+    # Only the named subcommand's arguments are built; --help and unknown
+    # commands fall back to the full parser so listings and errors are unchanged
+    parser = _build_parser(_sniff_subcommand(sys.argv[1:]))
     args = parser.parse_args()
 
     # Handle --version flag (doesn't require runtime)
@@ -1641,12 +1793,22 @@ def main() -> None:
         parser.print_help()
         sys.exit(1)
 
+    # Handle id without building the runtime
+    if args.cmd == "id":
+        sys.exit(cmd_id(args))
+
     # Build runtime
+    from .adapters.sqlite_index import SQLiteIndex
+    from .runtime import build_runtime
+
     rt = build_runtime(
         vault_path=args.vault,
         db_path=args.db,
         config_path=args.config,
     )
+    # Handlers share the index's cached connection; close it once on exit
+    if isinstance(rt.index, SQLiteIndex):
+        atexit.register(rt.index.close)
 
     # Dispatch to command handlers
     handlers = {
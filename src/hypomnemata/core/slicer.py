@@ -104,3 +104,25 @@ def slice_by_anchor(note: Note, anchor: Anchor | None) -> tuple[int, int]:
     
     # Unknown anchor kind
     return (0, 0)
+
+
+def strip_fence(text: str) -> str:
+    """
+    Strip the outer fence lines from a slice that opens with a code fence.
+    
+    The opening line is dropped along with the last later line that is just
+    a closing fence, and anything after it. Text that doesn't open with a
+    fence, or has no closing fence line, is returned unchanged.
+    """
+    first_nl = text.find("\n")
+    if first_nl == -1 or not text[:first_nl].strip().startswith("```"):
+        return text
+    # Walk back through "```" occurrences; the last one is normally the fence
+    end = len(text)
+    while (fence := text.rfind("```", first_nl + 1, end)) != -1:
+        line_start = text.rfind("\n", 0, fence) + 1
+        line_end = text.find("\n", fence)
+        if text[line_start:line_end if line_end != -1 else len(text)].strip() == "```":
+            return text[first_nl + 1:line_start]
+        end = line_start
+    return text
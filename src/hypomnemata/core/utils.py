@@ -2,8 +2,23 @@
 
 import re
 import unicodedata
+from functools import cache, lru_cache
 
+# En dash (–), em dash (—) and minus sign (−) all become a plain hyphen
+_DASHES = str.maketrans({"\u2013": "-", "\u2014": "-", "\u2212": "-"})
 
+
+@cache
+def _punct_re() -> re.Pattern[str]:
+    return re.compile(r"[^\w\s-]")
+
+
+@cache
+def _sep_re() -> re.Pattern[str]:
+    return re.compile(r"[\s-]+")
+
+
+@lru_cache(maxsize=4096)
 def slugify(text: str) -> str:
     """
     Convert text to a URL-safe slug.
@@ -20,28 +35,19 @@ def slugify(text: str) -> str:
         >>> slugify("Riemann–Christoffel symbols")
         'riemann-christoffel-symbols'
     """
-    # Lowercase
-    text = text.lower()
-    
-    # Replace various dash-like characters with regular hyphen
-    # En dash (–), em dash (—), and other dashes
-    text = text.replace('–', '-').replace('—', '-').replace('−', '-')
-    
-    # Unicode normalize (NFKD) and drop combining marks
-    text = unicodedata.normalize('NFKD', text)
-    text = ''.join(c for c in text if not unicodedata.combining(c))
-    
+    text = text.lower().translate(_DASHES)
+
+    # Unicode normalize (NFKD) and drop combining marks; ASCII is unchanged
+    # by both, so skip them
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+
     # Remove punctuation except spaces and hyphens
-    # Keep alphanumeric, spaces, and hyphens
-    text = re.sub(r'[^\w\s-]', '', text)
-    
-    # Convert whitespace to single `-`
-    text = re.sub(r'\s+', '-', text)
-    
-    # Collapse multiple `-` to single
-    text = re.sub(r'-+', '-', text)
-    
+    text = _punct_re().sub("", text)
+
+    # Runs of whitespace and hyphens become a single `-`
+    text = _sep_re().sub("-", text)
+
     # Strip leading/trailing `-`
-    text = text.strip('-')
-    
-    return text
+    return text.strip("-")
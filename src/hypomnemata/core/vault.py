@@ -1,17 +1,66 @@
+import copy
+import threading
+from collections import OrderedDict
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
 from .meta import MetaBag
-from .model import Note, NoteId
+from .model import Block, Link, Note, NoteBody, NoteId, Transclusion
 from .ports import NoteCodec, ParserStrategy, StorageStrategy
 
+# A parsed body as the parse cache keeps it: tuples of the raw text, blocks,
+# links and transclusions, sharing nothing mutable with any caller's NoteBody
+_FrozenBody = tuple[str, tuple[Block, ...], tuple[Link, ...], tuple[Transclusion, ...]]
+
+
+def _freeze(body: NoteBody) -> _FrozenBody:
+    return (
+        body.raw,
+        tuple(copy.copy(block) for block in body.blocks),
+        tuple(body.links),  # Links are frozen, so they can be shared
+        tuple(copy.copy(t) for t in body.transclusions),
+    )
+
+
+def _thaw(frozen: _FrozenBody) -> NoteBody:
+    raw, blocks, links, transclusions = frozen
+    return NoteBody(
+        raw=raw,
+        blocks=[copy.copy(block) for block in blocks],
+        links=list(links),
+        transclusions=[copy.copy(t) for t in transclusions],
+    )
+
 
 class Vault:
     def __init__(
-        self, storage: StorageStrategy, parser: ParserStrategy, codec: NoteCodec
+        self,
+        storage: StorageStrategy,
+        parser: ParserStrategy,
+        codec: NoteCodec,
+        parse_cache_size: int = 1024,
     ):
         self.storage = storage
         self.parser = parser
         self.codec = codec
+        # (id, body text) -> parsed body. Keyed on content, so an edited note
+        # simply misses; the key string is the body's own ``raw``. Every get()
+        # returns a fresh NoteBody, so callers may mutate theirs freely.
+        self._parse_cache: OrderedDict[tuple[NoteId, str], _FrozenBody] = OrderedDict()
+        self._parse_cache_size = parse_cache_size
+        self._parse_lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Pickled for worker processes; the parse cache stays behind
+        state = self.__dict__.copy()
+        state["_parse_cache"] = OrderedDict()
+        del state["_parse_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._parse_lock = threading.Lock()
 
     def get(self, id: NoteId) -> Note | None:
         raw = self.storage.read_raw(id)
@@ -19,9 +68,33 @@ class Vault:
             return None
         meta_partial, body_text = self.codec.decode_file(raw, id)
         meta = MetaBag(meta_partial)
-        body = self.parser.parse(body_text, id)
+        body = self._parse(id, body_text)
         return Note(id=id, meta=meta, body=body)
 
+    def get_many(self, ids: Iterable[NoteId]) -> dict[NoteId, Note | None]:
+        # Load each distinct id once, on a thread pool so file reads overlap
+        unique = list(dict.fromkeys(ids))
+        if len(unique) <= 1:
+            return {id: self.get(id) for id in unique}
+        with ThreadPoolExecutor(max_workers=min(16, len(unique))) as ex:
+            return dict(zip(unique, ex.map(self.get, unique), strict=True))
+
+    def _parse(self, id: NoteId, body_text: str) -> NoteBody:
+        key = (id, body_text)
+        with self._parse_lock:
+            frozen = self._parse_cache.get(key)
+            if frozen is not None:
+                self._parse_cache.move_to_end(key)
+                return _thaw(frozen)
+        body = self.parser.parse(body_text, id)
+        if self._parse_cache_size > 0:
+            frozen = _freeze(body)
+            with self._parse_lock:
+                self._parse_cache[key] = frozen
+                if len(self._parse_cache) > self._parse_cache_size:
+                    self._parse_cache.popitem(last=False)
+        return body
+
     def put(self, note: Note) -> None:
         contents = self.codec.encode_file(note)
         self.storage.write_raw(note.id, contents)
@@ -1,17 +1,27 @@
-import json
-import re
+import os
 import shutil
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+from ..adapters.markdown_parser import _link_re
 from ..adapters.sqlite_index import SQLiteIndex
-from ..core.model import Anchor
+from ..core.model import Anchor, Note
 from ..core.ports import ExportAdapter
 from ..core.slicer import slice_by_anchor
 from ..core.vault import Vault
+from ..jsonio import dumps_bytes
 
-LINK = re.compile(r"\[\[(.*?)\]\]")
-TRANS = re.compile(r"!\[\[(.*?)\]\]")
+
+def _write_file(path: str, data: bytes) -> None:
+    """Write ``data`` to ``path`` with raw descriptors (no text-layer setup)."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
 
 
 class QuartzAdapter(ExportAdapter):
@@ -32,6 +42,7 @@ class QuartzAdapter(ExportAdapter):
     def export_all(self, out_dir: str | None = None) -> None:
         out = self.out if out_dir is None else Path(out_dir)
         out.mkdir(parents=True, exist_ok=True)
+        out_str = os.fspath(out)
 
         # Get title lookup if we have SQLiteIndex
         title_map = {}
@@ -48,71 +59,103 @@ class QuartzAdapter(ExportAdapter):
             finally:
                 conn.close()
 
-        graph: dict[str, list[dict[str, Any]]] = {"nodes": [], "edges": []}
+        # Notes are read-only during export; memoize loads so notes that are
+        # transcluded from many places are read and parsed once.
+        @lru_cache(maxsize=512)
+        def get_note(note_id: str) -> Note | None:
+            return self.vault.get(note_id)
+
+        def link_sub(spec: str) -> str:
+            core = spec.split("|")[0].split("#")[0]
+            title = spec.split("|")[-1] if "|" in spec else core
+            return f"[{title}](/{core}/)"
+
+        # slice-based transclusion
+        def trans_sub(spec: str) -> str:
+            core = spec.split("|")[0]
+            
+            # Parse target id and anchor
+            anchor = None
+            if "#^" in core:
+                target_id, label = core.split("#^", 1)
+                anchor = Anchor(kind="block", value=label.strip())
+            elif "#" in core:
+                target_id, slug = core.split("#", 1)
+                anchor = Anchor(kind="heading", value=slug.strip())
+            else:
+                target_id = core
+            
+            target_id = target_id.strip()
+            
+            # Get target note
+            t = get_note(target_id)
+            if not t:
+                return f"> **Hypo:** missing note `{target_id}`\n"
+            
+            # Get slice
+            start, end = slice_by_anchor(t, anchor)
+            
+            if start == end and anchor:
+                # Anchor not found
+                anchor_repr = f"^{anchor.value}" if anchor.kind == "block" else anchor.value
+                return f"> **Hypo:** missing anchor `{target_id}#{anchor_repr}`\n"
+            
+            # Links inside the embedded slice are rewritten too, but nested
+            # transclusions are not expanded.
+            return _link_re().sub(lambda m: link_sub(m.group(1)), t.body.raw[start:end])
+
+        def rewrite(raw: str) -> str:
+            # Every embed starts with the literal "[[", which the regex engine
+            # can search for directly; a "!" just before it marks a
+            # transclusion and is replaced along with the link.
+            parts: list[str] = []
+            pos = 0
+            for m in _link_re().finditer(raw):
+                start, end = m.span()
+                if start and raw[start - 1] == "!":
+                    parts.append(raw[pos : start - 1])
+                    parts.append(trans_sub(m.group(1)))
+                else:
+                    parts.append(raw[pos:start])
+                    parts.append(link_sub(m.group(1)))
+                pos = end
+            if not parts:
+                return raw
+            parts.append(raw[pos:])
+            return "".join(parts)
+
+        # Flat (id, title) / (source, target) tuples; the JSON dicts are only
+        # built once, when graph.json is written.
+        nodes: list[tuple[str, str]] = []
+        edges: list[tuple[str, str]] = []
         for nid in self.vault.list_ids():
-            note = self.vault.get(nid)
+            note = get_note(nid)
             if not note:
                 continue
-            md = note.body.raw
-
-            # slice-based transclusion (must be done before link substitution)
-            def trans_sub(m: re.Match[str]) -> str:
-                spec = m.group(1)
-                core = spec.split("|")[0]
-                
-                # Parse target id and anchor
-                anchor = None
-                if "#^" in core:
-                    target_id, label = core.split("#^", 1)
-                    anchor = Anchor(kind="block", value=label.strip())
-                elif "#" in core:
-                    target_id, slug = core.split("#", 1)
-                    anchor = Anchor(kind="heading", value=slug.strip())
-                else:
-                    target_id = core
-                
-                target_id = target_id.strip()
-                
-                # Get target note
-                t = self.vault.get(target_id)
-                if not t:
-                    return f"> **Hypo:** missing note `{target_id}`\n"
-                
-                # Get slice
-                start, end = slice_by_anchor(t, anchor)
-                
-                if start == end and anchor:
-                    # Anchor not found
-                    anchor_repr = f"^{anchor.value}" if anchor.kind == "block" else anchor.value
-                    return f"> **Hypo:** missing anchor `{target_id}#{anchor_repr}`\n"
-                
-                return t.body.raw[start:end]
-
-            md2 = TRANS.sub(trans_sub, md)
-
-            def link_sub(m: re.Match[str]) -> str:
-                spec = m.group(1)
-                core = spec.split("|")[0].split("#")[0]
-                title = spec.split("|")[-1] if "|" in spec else core
-                return f"[{title}](/{core}/)"
-
-            md2 = LINK.sub(link_sub, md2)
+
+            # Transclusions and links in one pass
+            md2 = rewrite(note.body.raw)
             
             # Add title as H1 if available and not already present
             title = title_map.get(nid, "")
             if title and not md2.startswith("#"):
                 md2 = f"# {title}\n\n{md2}"
 
-            (out / nid).mkdir(exist_ok=True)
-            (out / nid / "index.md").write_text(md2, encoding="utf-8")
+            note_dir = os.path.join(out_str, nid)
+            try:
+                os.mkdir(note_dir)
+            except FileExistsError:
+                pass
+            _write_file(os.path.join(note_dir, "index.md"), md2.encode("utf-8"))
 
-            graph["nodes"].append({"id": nid, "title": title})
-            for link in note.body.links:
-                graph["edges"].append({"source": nid, "target": link.target.id})
+            nodes.append((nid, title))
+            edges.extend([(nid, link.target.id) for link in note.body.links])
 
-        (out / "graph.json").write_text(
-            json.dumps(graph, indent=2), encoding="utf-8"
-        )
+        graph = {
+            "nodes": [{"id": n, "title": t} for n, t in nodes],
+            "edges": [{"source": src, "target": dst} for src, dst in edges],
+        }
+        (out / "graph.json").write_bytes(dumps_bytes(graph, indent=True))
         
         # Copy assets if requested
         if self.assets_dir and self.assets_dir.exists():
@@ -1,9 +1,9 @@
 """ID generation strategies for import."""
 
 import hashlib
-import secrets
 from pathlib import Path
 
+from ..adapters.idgen import RandomPool
 from ..core.utils import slugify
 
 
@@ -12,10 +12,11 @@ class RandomIdGenerator:
 
     def __init__(self, nbytes: int = 6):
         self.nbytes = nbytes
+        self._pool = RandomPool()
 
     def generate(self, source_path: str, content: str | None = None) -> str:
         """Generate a random hex ID (ignores source_path and content)."""
-        return secrets.token_hex(self.nbytes)
+        return self._pool.take(self.nbytes).hex()
 
 
 class HashIdGenerator:
@@ -1,10 +1,21 @@
 """Link migration: convert wiki/MD links to ID-based links."""
 
+import os
+import pickle
 import re
-from dataclasses import dataclass
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from ..adapters.sqlite_index import SQLiteIndex
+from ..core.vault import Vault
+
+# Files migrated together: one batched index lookup, and one worker task
+_BATCH_SIZE = 256
+
+# Files needed before migration runs in worker processes; below this,
+# starting the workers costs more than it saves
+_PARALLEL_MIN_FILES = 2000
 
 
 @dataclass
@@ -18,43 +29,33 @@ class LinkMigrationResult:
     errors: list[str]
 
 
-def resolve_target(
-    text: str,
-    index: SQLiteIndex,
-    resolver_mode: str = "both",
-    prefer: str = "alias",
-) -> str | None:
+# Link patterns, compiled once and shared by every file. The wiki pattern
+# starts at "[[" so re can scan for that literal prefix; a transclusion's "!"
+# lies outside the match and is kept as is by the substitution.
+_WIKI_LINK_RE = re.compile(r'\[\[([^\]]+)\]\]')
+_MD_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+
+
+@dataclass
+class TargetLookup:
     """
-    Resolve text to note ID via index.
-    
-    Args:
-        text: Text to resolve (title or alias)
-        index: SQLite index
-        resolver_mode: "title", "alias", or "both"
-        prefer: "title" or "alias" (when both match)
+    Index matches for a set of link targets, fetched up front.
     
-    Returns:
-        Note ID if found, None if not found or ambiguous
+    ``lookup_targets`` fills it with one query per kind of match, so the
+    links of a file (or of a batch of files) resolve by dict lookups rather
+    than a query per link.
     """
-    conn = index._conn()
-    try:
-        # Check aliases
-        alias_ids: list[str] = []
-        if resolver_mode in ("alias", "both"):
-            alias_rows = conn.execute(
-                "SELECT note_id FROM kv WHERE key = 'core/alias' AND value = ?",
-                (text,)
-            ).fetchall()
-            alias_ids = [str(row[0]) for row in alias_rows]
-        
-        # Check titles
-        title_ids: list[str] = []
-        if resolver_mode in ("title", "both"):
-            title_rows = conn.execute(
-                "SELECT id FROM notes WHERE title = ?",
-                (text,)
-            ).fetchall()
-            title_ids = [str(row[0]) for row in title_rows]
+    
+    aliases: dict[str, list[str]] = field(default_factory=dict)
+    titles: dict[str, list[str]] = field(default_factory=dict)
+    ids: set[str] = field(default_factory=set)
+    
+    def resolve(
+        self, text: str, resolver_mode: str = "both", prefer: str = "alias"
+    ) -> str | None:
+        """Resolve text to a note ID; None if not found or ambiguous."""
+        alias_ids = self.aliases.get(text, []) if resolver_mode in ("alias", "both") else []
+        title_ids = self.titles.get(text, []) if resolver_mode in ("title", "both") else []
         
         # Determine result
         if len(alias_ids) == 1 and not title_ids:
@@ -71,8 +72,84 @@ def resolve_target(
             return None  # Not found
         else:
             return None  # Ambiguous (multiple matches)
-    finally:
-        conn.close()
+
+
+def lookup_targets(
+    index: SQLiteIndex,
+    texts: Iterable[str] = (),
+    note_ids: Iterable[str] = (),
+    resolver_mode: str = "both",
+) -> TargetLookup:
+    """
+    Fetch the alias and title matches for texts, and which note_ids exist.
+    
+    Args:
+        index: SQLite index
+        texts: Link targets to resolve (titles or aliases)
+        note_ids: Note IDs to check for existence
+        resolver_mode: "title", "alias", or "both"
+    
+    Returns:
+        TargetLookup for the given targets
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    lookup = TargetLookup()
+    if resolver_mode in ("alias", "both"):
+        lookup.aliases = index.ids_by_alias(unique_texts)
+    if resolver_mode in ("title", "both"):
+        lookup.titles = index.ids_by_title(unique_texts)
+    lookup.ids = set(index.titles(list(dict.fromkeys(note_ids))))
+    return lookup
+
+
+def resolve_target(
+    text: str,
+    index: SQLiteIndex,
+    resolver_mode: str = "both",
+    prefer: str = "alias",
+) -> str | None:
+    """
+    Resolve text to note ID via index.
+    
+    Args:
+        text: Text to resolve (title or alias)
+        index: SQLite index
+        resolver_mode: "title", "alias", or "both"
+        prefer: "title" or "alias" (when both match)
+    
+    Returns:
+        Note ID if found, None if not found or ambiguous
+    """
+    lookup = lookup_targets(index, [text], resolver_mode=resolver_mode)
+    return lookup.resolve(text, resolver_mode, prefer)
+
+
+def _split_wiki_inner(inner: str) -> tuple[str, str | None, str | None]:
+    """Split the inside of [[...]] into (target, anchor, display text)."""
+    display_text = None
+    anchor = None
+    
+    # Check for display text: [[Title|Display]]
+    if '|' in inner:
+        target_part, display_text = inner.split('|', 1)
+    else:
+        target_part = inner
+    
+    # Check for anchor: Title#Anchor
+    if '#' in target_part:
+        title_part, anchor = target_part.split('#', 1)
+    else:
+        title_part = target_part
+    
+    return title_part, anchor, display_text
+
+
+def _wiki_targets(content: str) -> list[str]:
+    """Targets of the wiki links in content, as migrate_wiki_links resolves them."""
+    return [
+        _split_wiki_inner(match.group(1))[0].strip()
+        for match in _WIKI_LINK_RE.finditer(content)
+    ]
 
 
 def migrate_wiki_links(
@@ -80,6 +157,7 @@ def migrate_wiki_links(
     index: SQLiteIndex,
     resolver_mode: str = "both",
     prefer: str = "alias",
+    lookup: TargetLookup | None = None,
 ) -> tuple[str, list[str]]:
     """
     Migrate Obsidian-style wiki links to ID-based format.
@@ -91,37 +169,24 @@ def migrate_wiki_links(
     - ![[Title]] -> ![[id]]
     - ![[Title#^label]] -> ![[id#^label]]
     
+    Targets are fetched from the index in one pass unless a ``lookup``
+    already covering them is passed.
+    
     Returns:
         Tuple of (migrated_content, errors)
     """
     errors: list[str] = []
-    
-    # Pattern for wiki links: [[...]]
-    # Matches: [[Title]], [[Title|Display]], [[Title#Anchor]]
-    wiki_pattern = re.compile(r'(!?)\[\[([^\]]+?)\]\]')
+    if lookup is None:
+        lookup = lookup_targets(index, _wiki_targets(content), resolver_mode=resolver_mode)
     
     def replace_wiki_link(match: re.Match[str]) -> str:
-        transclude = match.group(1)  # ! if transclusion
-        inner = match.group(2)  # Content inside [[...]]
+        inner = match.group(1)  # Content inside [[...]]
         
         # Parse inner: could be "Title", "Title|Display", "Title#Anchor", etc.
-        display_text = None
-        anchor = None
-        
-        # Check for display text: [[Title|Display]]
-        if '|' in inner:
-            target_part, display_text = inner.split('|', 1)
-        else:
-            target_part = inner
-        
-        # Check for anchor: Title#Anchor
-        if '#' in target_part:
-            title_part, anchor = target_part.split('#', 1)
-        else:
-            title_part = target_part
+        title_part, anchor, display_text = _split_wiki_inner(inner)
         
         # Resolve title to ID
-        note_id = resolve_target(title_part.strip(), index, resolver_mode, prefer)
+        note_id = lookup.resolve(title_part.strip(), resolver_mode, prefer)
         
         if note_id is None:
             errors.append(f"Could not resolve: '{title_part.strip()}'")
@@ -134,12 +199,55 @@ def migrate_wiki_links(
         if display_text:
             new_inner += f"|{display_text}"
         
-        return f"{transclude}[[{new_inner}]]"
+        return f"[[{new_inner}]]"
     
-    migrated = wiki_pattern.sub(replace_wiki_link, content)
+    migrated = _WIKI_LINK_RE.sub(replace_wiki_link, content)
     return migrated, errors
 
 
+def _md_target(
+    link_path: str, vault_path: Path, current_file_path: Path
+) -> tuple[str, str | None, str] | None:
+    """
+    Note ID, anchor and path part a Markdown link points at.
+    
+    None for external links and links to anything but a .md file.
+    """
+    # Skip external links (http://, https://, etc.)
+    if link_path.startswith(('http://', 'https://', 'mailto:', 'ftp://')):
+        return None
+    
+    # Parse path and anchor
+    anchor = None
+    if '#' in link_path:
+        path_part, anchor = link_path.split('#', 1)
+    else:
+        path_part = link_path
+    
+    # Resolve relative path to absolute
+    if path_part.startswith('/'):
+        # Absolute from vault root
+        target_path = vault_path / path_part.lstrip('/')
+    else:
+        # Relative to current file
+        target_path = (current_file_path.parent / path_part).resolve()
+    
+    # Extract note ID from target path (assuming <id>.md format)
+    if target_path.suffix != '.md':
+        return None
+    return target_path.stem, anchor, path_part
+
+
+def _md_target_ids(content: str, vault_path: Path, current_file_path: Path) -> list[str]:
+    """Note IDs of the Markdown links in content, as migrate_md_links checks them."""
+    ids = []
+    for match in _MD_LINK_RE.finditer(content):
+        target = _md_target(match.group(2), vault_path, current_file_path)
+        if target is not None:
+            ids.append(target[0])
+    return ids
+
+
 def migrate_md_links(
     content: str,
     index: SQLiteIndex,
@@ -147,6 +255,7 @@ def migrate_md_links(
     current_file_path: Path,
     resolver_mode: str = "both",
     prefer: str = "alias",
+    lookup: TargetLookup | None = None,
 ) -> tuple[str, list[str]]:
     """
     Migrate Markdown-style links to ID-based format.
@@ -155,83 +264,60 @@ def migrate_md_links(
     - [Text](path/to/file.md) -> [Text](id)
     - [Text](path/to/file.md#heading) -> [Text](id#heading)
     
+    Linked IDs are checked against the index in one pass unless a ``lookup``
+    already covering them is passed.
+    
     Returns:
         Tuple of (migrated_content, errors)
     """
     errors: list[str] = []
-    
-    # Pattern for markdown links: [text](path)
-    md_pattern = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+    if lookup is None:
+        lookup = lookup_targets(
+            index, note_ids=_md_target_ids(content, vault_path, current_file_path)
+        )
     
     def replace_md_link(match: re.Match[str]) -> str:
         link_text = match.group(1)
-        link_path = match.group(2)
+        target = _md_target(match.group(2), vault_path, current_file_path)
         
-        # Skip external links (http://, https://, etc.)
-        if link_path.startswith(('http://', 'https://', 'mailto:', 'ftp://')):
+        # External or not a .md file, keep original
+        if target is None:
             return match.group(0)
+        note_id, anchor, path_part = target
         
-        # Parse path and anchor
-        anchor = None
-        if '#' in link_path:
-            path_part, anchor = link_path.split('#', 1)
-        else:
-            path_part = link_path
-        
-        # Resolve relative path to absolute
-        if path_part.startswith('/'):
-            # Absolute from vault root
-            target_path = vault_path / path_part.lstrip('/')
-        else:
-            # Relative to current file
-            target_path = (current_file_path.parent / path_part).resolve()
+        # Verify ID exists in index
+        if note_id not in lookup.ids:
+            errors.append(f"Note ID not found: {note_id} (from path: {path_part})")
+            return match.group(0)
         
-        # Extract note ID from target path (assuming <id>.md format)
-        if target_path.suffix == '.md':
-            # Try to extract ID from filename
-            note_id = target_path.stem
-            
-            # Verify ID exists in index
-            conn = index._conn()
-            try:
-                row = conn.execute(
-                    "SELECT id FROM notes WHERE id = ?",
-                    (note_id,)
-                ).fetchone()
-                
-                if row is None:
-                    errors.append(f"Note ID not found: {note_id} (from path: {path_part})")
-                    return match.group(0)
-            finally:
-                conn.close()
-            
-            # Reconstruct link with ID
-            new_path = note_id
-            if anchor:
-                new_path += f"#{anchor}"
-            
-            return f"[{link_text}]({new_path})"
+        # Reconstruct link with ID
+        new_path = note_id
+        if anchor:
+            new_path += f"#{anchor}"
         
-        # Not a .md file, keep original
-        return match.group(0)
+        return f"[{link_text}]({new_path})"
     
-    migrated = md_pattern.sub(replace_md_link, content)
+    migrated = _MD_LINK_RE.sub(replace_md_link, content)
     return migrated, errors
 
 
-def migrate_file_links(
-    file_path: Path,
+def migrate_files_links(
+    file_paths: list[Path],
     vault_path: Path,
     index: SQLiteIndex,
     from_format: str = "mixed",
     resolver_mode: str = "both",
     prefer: str = "alias",
-) -> LinkMigrationResult:
+) -> list[LinkMigrationResult]:
     """
-    Migrate all links in a file.
+    Migrate all links in a batch of files.
+    
+    The link targets of the whole batch are fetched from the index together:
+    one lookup for the wiki links, then one for the Markdown links of the
+    wiki-migrated text, instead of a query per link.
     
     Args:
-        file_path: Path to file
+        file_paths: Paths to files
         vault_path: Vault root path
         index: SQLite index
         from_format: "wiki", "md", or "mixed"
@@ -239,36 +325,157 @@ def migrate_file_links(
         prefer: "title" or "alias"
     
     Returns:
-        LinkMigrationResult
+        One LinkMigrationResult per file, in order
     """
-    content = file_path.read_text(encoding='utf-8')
-    original = content
-    all_errors: list[str] = []
+    originals = [file_path.read_text(encoding='utf-8') for file_path in file_paths]
+    contents = list(originals)
+    all_errors: list[list[str]] = [[] for _ in file_paths]
     
     # Migrate wiki links
     if from_format in ("wiki", "mixed"):
-        content, wiki_errors = migrate_wiki_links(content, index, resolver_mode, prefer)
-        all_errors.extend(wiki_errors)
+        lookup = lookup_targets(
+            index,
+            (target for content in contents for target in _wiki_targets(content)),
+            resolver_mode=resolver_mode,
+        )
+        for i, content in enumerate(contents):
+            contents[i], wiki_errors = migrate_wiki_links(
+                content, index, resolver_mode, prefer, lookup=lookup
+            )
+            all_errors[i].extend(wiki_errors)
     
     # Migrate MD links
     if from_format in ("md", "mixed"):
-        content, md_errors = migrate_md_links(
-            content, index, vault_path, file_path, resolver_mode, prefer
+        lookup = lookup_targets(
+            index,
+            note_ids=(
+                note_id
+                for file_path, content in zip(file_paths, contents, strict=True)
+                for note_id in _md_target_ids(content, vault_path, file_path)
+            ),
         )
-        all_errors.extend(md_errors)
+        for i, (file_path, content) in enumerate(zip(file_paths, contents, strict=True)):
+            contents[i], md_errors = migrate_md_links(
+                content, index, vault_path, file_path, resolver_mode, prefer, lookup=lookup
+            )
+            all_errors[i].extend(md_errors)
     
-    # Count changes (simple heuristic: compare content)
-    changes = 1 if content != original else 0
+    return [
+        LinkMigrationResult(
+            path=str(file_path),
+            original=original,
+            migrated=content,
+            # Count changes (simple heuristic: compare content)
+            changes=1 if content != original else 0,
+            errors=errors,
+        )
+        for file_path, original, content, errors in zip(
+            file_paths, originals, contents, all_errors, strict=True
+        )
+    ]
+
+
+def migrate_file_links(
+    file_path: Path,
+    vault_path: Path,
+    index: SQLiteIndex,
+    from_format: str = "mixed",
+    resolver_mode: str = "both",
+    prefer: str = "alias",
+) -> LinkMigrationResult:
+    """
+    Migrate all links in a file.
     
-    return LinkMigrationResult(
-        path=str(file_path),
-        original=original,
-        migrated=content,
-        changes=changes,
-        errors=all_errors,
+    Args:
+        file_path: Path to file
+        vault_path: Vault root path
+        index: SQLite index
+        from_format: "wiki", "md", or "mixed"
+        resolver_mode: "title", "alias", or "both"
+        prefer: "title" or "alias"
+    
+    Returns:
+        LinkMigrationResult
+    """
+    return migrate_files_links(
+        [file_path], vault_path, index, from_format, resolver_mode, prefer
+    )[0]
+
+
+_worker_index: SQLiteIndex | None = None
+
+
+def _init_worker(db_path: Path, vault_path: Path, vault: Vault) -> None:
+    global _worker_index
+    _worker_index = SQLiteIndex(db_path=db_path, vault_path=vault_path, vault=vault)
+
+
+def _migrate_in_worker(
+    job: tuple[list[Path], Path, str, str, str],
+) -> list[LinkMigrationResult]:
+    assert _worker_index is not None
+    file_paths, vault_path, from_format, resolver_mode, prefer = job
+    return migrate_files_links(
+        file_paths, vault_path, _worker_index, from_format, resolver_mode, prefer
     )
 
 
+def iter_migration_batches(
+    file_paths: list[Path],
+    vault_path: Path,
+    index: SQLiteIndex,
+    from_format: str = "mixed",
+    resolver_mode: str = "both",
+    prefer: str = "alias",
+) -> Iterator[list[LinkMigrationResult]]:
+    """
+    Migrate files in batches, yielding each batch's results in order.
+    
+    Large runs are migrated in worker processes, each reading the index
+    through its own connection. Nothing is written, so the caller stays the
+    only writer of the files.
+    
+    Args:
+        file_paths: Paths to files
+        vault_path: Vault root path
+        index: SQLite index
+        from_format: "wiki", "md", or "mixed"
+        resolver_mode: "title", "alias", or "both"
+        prefer: "title" or "alias"
+    
+    Yields:
+        One list of LinkMigrationResult per batch of files
+    """
+    batches = [
+        file_paths[i:i + _BATCH_SIZE] for i in range(0, len(file_paths), _BATCH_SIZE)
+    ]
+    if len(file_paths) >= _PARALLEL_MIN_FILES and (os.cpu_count() or 1) > 1:
+        try:
+            pickle.dumps(index.vault)
+        except Exception:
+            # Custom storage/parser/codec that can't be sent to a worker
+            pass
+        else:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            
+            # spawn, not fork: the index may be running a writer thread
+            with ProcessPoolExecutor(
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(index.db_path, index.vault_path, index.vault),
+            ) as pool:
+                jobs = [
+                    (batch, vault_path, from_format, resolver_mode, prefer) for batch in batches
+                ]
+                yield from pool.map(_migrate_in_worker, jobs)
+            return
+    for batch in batches:
+        yield migrate_files_links(
+            batch, vault_path, index, from_format, resolver_mode, prefer
+        )
+
+
 def apply_migration(
     result: LinkMigrationResult,
     dry_run: bool = False,
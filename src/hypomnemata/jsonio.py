@@ -0,0 +1,42 @@
+"""JSON serialization helpers, using orjson when it is installed."""
+
+import json
+from collections.abc import Iterable
+from typing import Any, BinaryIO
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize ``obj`` to UTF-8 encoded JSON.
+
+    With ``indent`` the layout matches ``json.dumps(obj, indent=2)``; non-ASCII
+    text is emitted as UTF-8 rather than ``\\u`` escapes either way.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def write_array(rows: Iterable[Any], fp: BinaryIO) -> None:
+    """
+    Write ``rows`` to ``fp`` as an indented JSON array, encoding one row at a time.
+
+    The bytes match ``dumps_bytes(list(rows), indent=True)`` without holding the
+    list or its full encoding in memory.
+    """
+    first = True
+    for row in rows:
+        fp.write(b"[\n  " if first else b",\n  ")
+        # Encoded strings never contain a raw newline, so this only re-indents
+        fp.write(dumps_bytes(row, indent=True).replace(b"\n", b"\n  "))
+        first = False
+    fp.write(b"[]" if first else b"\n]")
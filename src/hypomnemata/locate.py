@@ -2,6 +2,8 @@
 
 import json
 import sys
+from bisect import bisect_right
+from itertools import accumulate
 from typing import Any
 
 from .core.model import Anchor, Note
@@ -31,6 +33,32 @@ def char_offset_to_line(text: str, offset: int) -> int:
     return line
 
 
+class LineIndex:
+    """
+    Line table for one text, for answering many offset queries against it.
+    
+    Lines are split with ``str.splitlines`` once; each query is then a binary
+    search rather than a re-split of the text.
+    """
+    
+    def __init__(self, text: str) -> None:
+        self.lines = text.splitlines()
+        # starts[i] is the offset line i begins at; the last entry is len(text)
+        self.starts = list(accumulate(map(len, text.splitlines(keepends=True)), initial=0))
+    
+    def context(self, offset: int, context: int) -> list[str]:
+        """
+        Lines around ``offset``, as ``text[:offset].splitlines()`` would place it.
+        
+        Returns the ``context`` lines before the end of ``text[:offset]`` and
+        the ``context`` lines after it.
+        """
+        idx = bisect_right(self.starts, offset) - 1
+        # Lines in text[:offset]: a partial current line counts as one
+        before = idx if offset == self.starts[idx] else idx + 1
+        return self.lines[max(0, before - context):before + context]
+
+
 def locate_note(
     note: Note,
     anchor: Anchor | None,
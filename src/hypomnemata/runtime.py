@@ -1,6 +1,6 @@
 """Runtime wiring helper for CLI applications."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from .adapters.fs_storage import FsStorage
@@ -22,6 +22,11 @@ class Runtime:
     resolver: DefaultResolver
     idgen: HexId
     config: HypoConfig
+    # Checked once here so CLI handlers can test a flag instead of the type
+    is_sqlite_index: bool = field(init=False)
+    
+    def __post_init__(self) -> None:
+        self.is_sqlite_index = isinstance(self.index, SQLiteIndex)
 
 
 def build_runtime(
@@ -91,6 +91,20 @@ class DebounceHandler(FileSystemEventHandler):  # type: ignore[misc]
             self.deleted.add(note_id)
             self.last_event_time = time.time()
 
+    def on_moved(self, event: FileSystemEvent) -> None:
+        """Handle file rename (including atomic temp-file replaces)."""
+        if event.is_directory:
+            return
+
+        src_id = self._extract_id(Path(str(event.src_path)))
+        dest_id = self._extract_id(Path(str(event.dest_path)))
+        if src_id and src_id != dest_id:
+            self.deleted.add(src_id)
+            self.last_event_time = time.time()
+        if dest_id:
+            self.modified.add(dest_id)
+            self.last_event_time = time.time()
+
     def check_and_flush(self) -> None:
         """Check if debounce period has elapsed and flush if so."""
         if not (self.added or self.modified or self.deleted):
@@ -240,6 +254,8 @@ def watch_vault(
         handler.flush()
         observer.stop()
         observer.join()
+        if isinstance(index, SQLiteIndex):
+            index.close()
 
     if not quiet and not json_output:
         print("Watch stopped", flush=True)
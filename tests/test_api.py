@@ -68,7 +68,7 @@ def test_health_endpoint(runtime):
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "ok"
-    assert data["schema_version"] == "2"
+    assert data["schema_version"] == "5"
 
 
 @pytest.mark.skipif(not FASTAPI_AVAILABLE, reason="fastapi not installed")
@@ -82,6 +82,10 @@ def test_auth_required(runtime):
     response = client.get("/health")
     assert response.status_code == 401
     
+    # A wrong token is rejected
+    response = client.get("/health", headers={"Authorization": f"Bearer {token}x"})
+    assert response.status_code == 401
+    
     # With token should work
     response = client.get("/health", headers={"Authorization": f"Bearer {token}"})
     assert response.status_code == 200
@@ -197,6 +201,12 @@ def test_search_endpoint(runtime):
     data = response.json()
     assert len(data) >= 1
     assert any(item["id"] == "note1" for item in data)
+    
+    response = client.get("/search?q=python&snippets=true")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": "note1", "title": "First", "snippet": "# First\n\n<b>Python</b> code here."}
+    ]
 
 
 @pytest.mark.skipif(not FASTAPI_AVAILABLE, reason="fastapi not installed")
@@ -259,3 +269,71 @@ def test_graph_endpoint(runtime):
     assert "edges" in data
     assert len(data["nodes"]) >= 2
     assert len(data["edges"]) >= 1
+
+
+@pytest.mark.skipif(not FASTAPI_AVAILABLE, reason="fastapi not installed")
+def test_etag_not_modified(runtime):
+    """Test /notes and /graph answer If-None-Match with 304 until data changes."""
+    note = Note(
+        id="test123",
+        meta=MetaBag({"title": "Test"}),
+        body=runtime.vault.parser.parse("# Test\n\nContent.", "test123")
+    )
+    runtime.vault.put(note)
+    runtime.index.rebuild(full=True)
+    
+    app = create_app(runtime, token=None)
+    client = TestClient(app)
+    
+    response = client.get("/notes/test123")
+    etag = response.headers["etag"]
+    response = client.get("/notes/test123", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    
+    graph_etag = client.get("/graph").headers["etag"]
+    assert client.get("/graph", headers={"If-None-Match": graph_etag}).status_code == 304
+    
+    # Edit the note: both the note and (after reindexing) the graph change
+    note = Note(
+        id="test123",
+        meta=MetaBag({"title": "Test"}),
+        body=runtime.vault.parser.parse("# Test\n\nEdited, see [[other]].", "test123")
+    )
+    runtime.vault.put(note)
+    runtime.index.rebuild()
+    response = client.get("/notes/test123", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert client.get("/graph", headers={"If-None-Match": graph_etag}).status_code == 200
+
+
+@pytest.mark.skipif(not FASTAPI_AVAILABLE, reason="fastapi not installed")
+def test_graph_gzip(runtime):
+    """Test /graph is gzipped for clients that accept it, plain otherwise."""
+    note = Note(
+        id="note1",
+        meta=MetaBag({"title": "First"}),
+        body=runtime.vault.parser.parse("# First\n\nSee [[note2]].", "note1")
+    )
+    runtime.vault.put(note)
+    runtime.index.rebuild(full=True)
+    
+    app = create_app(runtime, token=None)
+    client = TestClient(app)
+    
+    plain = client.get("/graph", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    expected = {
+        "nodes": [{"id": "note1", "title": "First"}],
+        "edges": [{"source": "note1", "target": "note2"}],
+    }
+    assert plain.json() == expected
+    
+    for accept in ("gzip", "br, gzip;q=0.5"):
+        response = client.get("/graph", headers={"Accept-Encoding": accept})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json() == expected  # httpx decompresses transparently
+    
+    refused = client.get("/graph", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
@@ -1,5 +1,6 @@
 """Tests for asset scanner."""
 
+import re
 from pathlib import Path
 
 from hypomnemata.assets.scanner import scan_asset_refs
@@ -91,3 +92,120 @@ def test_scan_asset_refs_relative_paths():
     refs = scan_asset_refs("note1", text, vault_root)
     
     assert len(refs) == 3
+
+
+def test_scan_asset_refs_single_pass_order():
+    """Test refs come back in document order, images not doubled as links."""
+    text = (
+        '<img src="assets/a.svg"> [doc](files/b.pdf) ![pic](assets/c.png) '
+        '[section](#anchor) [note](other)'
+    )
+    vault_root = Path("/tmp/vault")
+    
+    refs = scan_asset_refs("note1", text, vault_root)
+    
+    assert [(ref.ref_type, ref.asset_path) for ref in refs] == [
+        ("html", "assets/a.svg"),
+        ("file", "files/b.pdf"),
+        ("image", "assets/c.png"),
+    ]
+    assert text[refs[2].range_start:refs[2].range_end] == "![pic](assets/c.png)"
+
+
+def test_scan_asset_refs_nested_refs():
+    """Test refs inside other refs, e.g. a linked image, are all reported."""
+    vault_root = Path("/tmp/vault")
+    
+    refs = scan_asset_refs("note1", "[![alt](img.png)](note.md)", vault_root)
+    assert [
+        (ref.ref_type, ref.asset_path, ref.range_start, ref.range_end) for ref in refs
+    ] == [
+        ("file", "img.png", 0, 16),
+        ("image", "img.png", 1, 16),
+    ]
+    
+    refs = scan_asset_refs("note1", '[logo](<img src="a.svg">.png)', vault_root)
+    assert [(ref.ref_type, ref.asset_path) for ref in refs] == [
+        ("file", '<img src="a.svg">.png'),
+        ("html", "a.svg"),
+    ]
+
+
+class _FakeHyperscanDb:
+    """Reports every (start, end) byte range where an alternative matches."""
+    
+    patterns = [
+        re.compile(rb'(?=(!\[[^\]]*\]\([^)]+\)))'),
+        re.compile(rb'(?=(\[[^\]]+\]\([^)]+\)))'),
+        re.compile(rb'(?=(<img[^>]+src=["\'][^"\']+["\'][^>]*>))', re.IGNORECASE),
+    ]
+    
+    def scan(self, buf, match_event_handler):
+        for i, pattern in enumerate(self.patterns):
+            for m in pattern.finditer(buf):
+                match_event_handler(i, m.start(1), m.end(1), 0, None)
+
+
+def test_scan_asset_refs_hyperscan_path_matches_python(monkeypatch):
+    """Test the Hyperscan candidate path returns the same refs as finditer."""
+    from hypomnemata.assets import scanner
+    
+    text = (
+        "Café — ![ünï](assets/a.png) [x ![b](assets/b.png)](files/c.pdf)\n"
+        '<IMG SRC="assets/d.svg"> [e](files/e.pdf) ![f](https://x/f.png) [[wiki]]'
+    )
+    vault_root = Path("/tmp/vault")
+    
+    monkeypatch.setattr(scanner, "_HS_DATABASE", None)
+    expected = scan_asset_refs("note1", text, vault_root)
+    monkeypatch.setattr(scanner, "_HS_DATABASE", _FakeHyperscanDb())
+    refs = scan_asset_refs("note1", text, vault_root)
+    
+    assert len(refs) == 5
+    assert refs == expected
+
+
+def test_scan_asset_refs_resolves_shared_path_once():
+    """Test a path referenced from many notes is resolved once."""
+    from hypomnemata.assets.scanner import _resolve_asset_path_cached, clear_resolve_cache
+    
+    clear_resolve_cache()
+    vault_root = Path("/tmp/vault")
+    
+    refs = [
+        ref
+        for i in range(3)
+        for ref in scan_asset_refs(f"note{i}", "![logo](assets/logo.png)", vault_root)
+    ]
+    
+    assert len({ref.resolved_path for ref in refs}) == 1
+    info = _resolve_asset_path_cached.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+
+def test_asset_ref_is_slotted_and_hashable():
+    """Test AssetRef has no per-instance dict and survives pickling."""
+    import pickle
+    
+    ref = scan_asset_refs("note1", "![a](assets/a.png)", Path("/tmp/vault"))[0]
+    
+    assert not hasattr(ref, "__dict__")
+    assert pickle.loads(pickle.dumps(ref)) == ref
+    assert len({ref, pickle.loads(pickle.dumps(ref))}) == 1
+
+
+def test_scan_asset_refs_html_img_any_case():
+    """Test HTML img tags match regardless of tag and attribute case."""
+    text = '<IMG SRC="assets/a.png"> <Img Src=\'assets/b.png\'> <img src="assets/c.png">'
+    
+    refs = scan_asset_refs("note1", text, Path("/tmp/vault"))
+    
+    assert [ref.asset_path for ref in refs] == ["assets/a.png", "assets/b.png", "assets/c.png"]
+    assert {ref.ref_type for ref in refs} == {"html"}
+
+
+def test_scan_asset_refs_prose_without_refs():
+    """Test notes without "](" or an img tag come back empty."""
+    text = "Plain prose with [brackets] and (parens) and <b>tags</b>."
+    
+    assert scan_asset_refs("note1", text, Path("/tmp/vault")) == []
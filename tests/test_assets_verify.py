@@ -0,0 +1,166 @@
+"""Tests for asset verification."""
+
+from pathlib import Path
+
+from hypomnemata.assets import verify
+from hypomnemata.assets.verify import verify_assets
+
+
+def _make_vault(tmp_path: Path) -> Path:
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    (assets / "used.png").write_bytes(b"png")
+    (assets / "unused.png").write_bytes(b"unused")
+    return tmp_path
+
+
+def test_verify_assets_missing_and_dangling(tmp_path):
+    """Test missing references and unreferenced asset files are reported."""
+    vault_root = _make_vault(tmp_path)
+    notes = {
+        "note1": "![used](assets/used.png)",
+        "note2": "![gone](assets/gone.png)",
+    }
+    
+    report = verify_assets(vault_root, notes)
+    
+    assert report.total_refs == 2
+    assert [ref.note_id for ref in report.missing_refs] == ["note2"]
+    assert [f.name for f in report.dangling_files] == ["unused.png"]
+
+
+def test_verify_assets_parallel_scan_keeps_note_order(tmp_path, monkeypatch):
+    """Test scanning sharded across processes returns refs in note order."""
+    monkeypatch.setattr(verify, "_PARALLEL_MIN_NOTES", 2)
+    monkeypatch.setattr(verify.os, "cpu_count", lambda: 2)
+    vault_root = _make_vault(tmp_path)
+    notes = {f"note{i}": f"![n{i}](assets/missing{i}.png)" for i in range(5)}
+    
+    report = verify_assets(vault_root, notes)
+    
+    assert report.total_refs == 5
+    assert [ref.note_id for ref in report.missing_refs] == [f"note{i}" for i in range(5)]
+
+
+def test_verify_assets_hashes_each_file_once(tmp_path):
+    """Test hashes and sidecars are produced once per referenced file."""
+    import hashlib
+    
+    vault_root = _make_vault(tmp_path)
+    notes = {
+        "note1": "![a](assets/used.png) ![b](assets/used.png)",
+        "note2": "[again](assets/used.png)",
+    }
+    
+    report = verify_assets(vault_root, notes, compute_hashes=True, write_sidecars=True)
+    
+    used = (vault_root / "assets" / "used.png").resolve()
+    digest = hashlib.sha256(b"png").hexdigest()
+    assert report.file_hashes == {used: digest}
+    sidecar = (vault_root / "assets" / "used.png.sha256").read_text().splitlines()
+    assert sidecar[0] == digest
+    assert [f.name for f in report.dangling_files] == ["unused.png"]
+
+
+def test_compute_file_hash_matches_hashlib(tmp_path):
+    """Test mapped and empty files hash like hashlib over their bytes."""
+    import hashlib
+    
+    data = bytes(range(256)) * 5000
+    (tmp_path / "big.bin").write_bytes(data)
+    (tmp_path / "empty.bin").write_bytes(b"")
+    
+    assert verify.compute_file_hash(tmp_path / "big.bin") == hashlib.sha256(data).hexdigest()
+    assert verify.compute_file_hash(tmp_path / "empty.bin") == hashlib.sha256().hexdigest()
+
+
+def test_verify_assets_reuses_fresh_sidecar(tmp_path, monkeypatch):
+    """Test an up-to-date sidecar is trusted and a stale one is rewritten."""
+    import os
+    
+    vault_root = _make_vault(tmp_path)
+    notes = {"note1": "![a](assets/used.png)"}
+    used = (vault_root / "assets" / "used.png").resolve()
+    first = verify_assets(vault_root, notes, compute_hashes=True, write_sidecars=True)
+    
+    def fail(*args):
+        raise AssertionError("rehashed an unchanged file")
+    
+    with monkeypatch.context() as m:
+        m.setattr(verify, "compute_file_hash", fail)
+        again = verify_assets(vault_root, notes, compute_hashes=True)
+    assert again.file_hashes == first.file_hashes
+    
+    used.write_bytes(b"changed")
+    st = used.stat()
+    os.utime(used, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    changed = verify_assets(vault_root, notes, compute_hashes=True, write_sidecars=True)
+    assert changed.file_hashes[used] != first.file_hashes[used]
+    sidecar = used.with_name("used.png.sha256").read_text().splitlines()
+    assert sidecar[0] == changed.file_hashes[used]
+
+
+def test_verify_assets_checks_refs_outside_assets_dir(tmp_path):
+    """Test refs outside the assets directory are still checked on disk."""
+    vault_root = _make_vault(tmp_path)
+    (vault_root / "local.png").write_bytes(b"local")
+    (vault_root / "assets" / "sub").mkdir()
+    (vault_root / "assets" / "sub" / "deep.png").write_bytes(b"deep")
+    notes = {
+        "note1": "![a](./local.png) ![b](./nowhere.png) ![c](sub/deep.png)",
+    }
+    
+    report = verify_assets(vault_root, notes)
+    
+    assert [ref.asset_path for ref in report.missing_refs] == ["./nowhere.png"]
+    assert sorted(f.name for f in report.dangling_files) == ["unused.png", "used.png"]
+
+
+def test_verify_assets_matches_symlinked_asset(tmp_path):
+    """Test an asset reached through a symlink counts as referenced."""
+    vault_root = _make_vault(tmp_path)
+    (vault_root / "assets" / "alias.png").symlink_to(vault_root / "assets" / "unused.png")
+    notes = {"note1": "![a](assets/used.png) ![b](assets/alias.png)"}
+    
+    report = verify_assets(vault_root, notes)
+    
+    assert report.missing_refs == []
+    assert report.dangling_files == []
+
+
+def test_format_report_json(tmp_path):
+    """Test the JSON report lists missing refs, dangling files and hashes."""
+    import json
+    
+    vault_root = _make_vault(tmp_path)
+    notes = {"note1": "![a](assets/used.png) ![b](assets/gone.png)"}
+    report = verify_assets(vault_root, notes, compute_hashes=True)
+    
+    data = json.loads(verify.format_report(report, json_output=True))
+    
+    assert data["total_refs"] == 2
+    assert data["missing_refs"] == [
+        {"note_id": "note1", "asset_path": "assets/gone.png", "ref_type": "image"}
+    ]
+    assert data["dangling_files"] == [str(vault_root / "assets" / "unused.png")]
+    assert list(data["hashes"]) == [str((vault_root / "assets" / "used.png").resolve())]
+
+
+def test_walk_assets_matches_rglob(tmp_path):
+    """Test the scandir walk lists what rglob does, with resolved paths."""
+    vault_root = _make_vault(tmp_path)
+    assets = vault_root / "assets"
+    (assets / "sub" / "deeper").mkdir(parents=True)
+    (assets / "sub" / "deeper" / "x.png").write_bytes(b"x")
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "y.png").write_bytes(b"y")
+    (assets / "linked").symlink_to(outside)
+    (assets / "link.png").symlink_to(assets / "used.png")
+    
+    walked = {path: (resolved, is_file) for path, resolved, is_file in verify._walk_assets(assets)}
+    
+    assert set(walked) == set(assets.rglob("*"))
+    for path, (resolved, is_file) in walked.items():
+        assert resolved == path.resolve()
+        assert is_file == path.is_file()
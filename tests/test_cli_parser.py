@@ -0,0 +1,29 @@
+"""Tests for CLI argument parsing."""
+
+from hypomnemata.cli import _build_parser, _sniff_subcommand
+
+
+def test_sniff_subcommand():
+    """Test that the subcommand is found past global options and their values."""
+    assert _sniff_subcommand(["ls"]) == "ls"
+    assert _sniff_subcommand(["--vault", "ls", "find", "x"]) == "find"
+    assert _sniff_subcommand(["--db=index.db", "-q", "verify-assets"]) == "verify-assets"
+    assert _sniff_subcommand(["--help"]) is None
+    assert _sniff_subcommand(["nope", "ls"]) is None
+
+
+def test_sniffed_parser_matches_full_parser():
+    """Test that the single-command parser parses the same as the full one."""
+    argv = ["--vault", "v", "--json", "meta", "get", "abc", "--keys", "a", "b"]
+    sniffed = _build_parser(_sniff_subcommand(argv)).parse_args(argv)
+    full = _build_parser().parse_args(argv)
+
+    assert vars(sniffed) == vars(full)
+
+
+def test_links_commands_accept_full():
+    """Test that migrate links and audit links take --full, defaulting to incremental."""
+    for argv in (["migrate", "links", "--dry-run"], ["audit", "links"]):
+        parser = _build_parser(argv[0])
+        assert parser.parse_args(argv).full is False
+        assert parser.parse_args([*argv, "--full"]).full is True
@@ -0,0 +1,41 @@
+"""Tests for YAML frontmatter decoding and encoding."""
+
+from hypomnemata.adapters.yaml_codec import MarkdownNoteCodec, YamlFrontmatter
+from hypomnemata.core.meta import MetaBag
+from hypomnemata.core.model import Note, NoteBody
+
+
+def test_decode_without_frontmatter():
+    """Test text without frontmatter is returned unchanged."""
+    fm = YamlFrontmatter()
+
+    assert fm.decode("# Title\n\nBody.\n") == ({}, "# Title\n\nBody.\n")
+    assert fm.decode("") == ({}, "")
+    assert fm.decode("--- not yaml\n") == ({}, "--- not yaml\n")
+
+
+def test_decode_allows_leading_whitespace():
+    """Test frontmatter after leading blank lines is still found."""
+    fm = YamlFrontmatter()
+
+    meta, body = fm.decode("\n  \n---\nid: abc\n---\nBody\n")
+
+    assert meta == {"id": "abc"}
+    assert body == "Body\n"
+
+
+def test_roundtrip_preserves_meta_and_body():
+    """Test encode_file output decodes back to the same note."""
+    codec = MarkdownNoteCodec(YamlFrontmatter())
+    note = Note(
+        id="abc1234",
+        meta=MetaBag({"core/title": "Tëst", "core/aliases": ["One", "Two"]}),
+        body=NoteBody(raw="# Tëst\n\nText.\n"),
+    )
+
+    text = codec.encode_file(note)
+    meta, body = codec.decode_file(text, "abc1234")
+
+    assert text.startswith("---\ncore/title: Tëst\n")
+    assert meta == {"core/title": "Tëst", "core/aliases": ["One", "Two"], "id": "abc1234"}
+    assert body == note.body.raw
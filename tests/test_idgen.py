@@ -0,0 +1,74 @@
+"""Tests for random ID generation."""
+
+import re
+import subprocess
+import sys
+
+from hypomnemata.adapters.idgen import HexId, RandomPool
+from hypomnemata.import_migrate.id_strategies import RandomIdGenerator
+
+
+def test_hex_id_format():
+    """Test HexId produces 7 lowercase hex characters."""
+    idgen = HexId(nbytes=6)
+    for _ in range(100):
+        assert re.fullmatch(r"[0-9a-f]{7}", idgen.new_id())
+
+
+def test_random_pool_refills():
+    """Test the pool hands out consecutive slices and refills when exhausted."""
+    pool = RandomPool(size=16)
+
+    chunks = [pool.take(6) for _ in range(10)]
+
+    assert all(len(c) == 6 for c in chunks)
+    # Slices handed out from one buffer never overlap
+    assert chunks[0] != chunks[1]
+
+
+def test_random_pool_threads_get_distinct_bytes():
+    """Test concurrent callers are never handed the same slice."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    pool = RandomPool(size=64)
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        chunks = list(ex.map(lambda _: pool.take(8), range(4000)))
+
+    assert len(set(chunks)) == len(chunks)
+
+
+def test_random_pool_large_request():
+    """Test requests larger than the buffer are served directly."""
+    pool = RandomPool(size=8)
+
+    assert len(pool.take(32)) == 32
+
+
+def test_random_id_generator_length():
+    """Test import random IDs use nbytes * 2 hex characters."""
+    gen = RandomIdGenerator(nbytes=6)
+
+    ids = {gen.generate("a.md") for _ in range(50)}
+
+    assert len(ids) == 50
+    assert all(re.fullmatch(r"[0-9a-f]{12}", i) for i in ids)
+
+
+def test_id_command_skips_runtime(tmp_path):
+    """Test hypo id prints an id without building the vault runtime."""
+    code = (
+        "import sys\n"
+        "from hypomnemata.cli import main\n"
+        f"sys.argv = ['hypo', '--vault', {str(tmp_path)!r}, 'id']\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print('hypomnemata.runtime' in sys.modules)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    new_id, loaded = result.stdout.split()
+    assert re.fullmatch(r"[0-9a-f]{7}", new_id)
+    assert loaded == "False"
@@ -0,0 +1,119 @@
+"""Tests for the in-memory index."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from hypomnemata.adapters.fs_storage import FsStorage
+from hypomnemata.adapters.markdown_parser import MarkdownParser
+from hypomnemata.adapters.resolver_index import DefaultResolver, InMemoryIndex
+from hypomnemata.adapters.yaml_codec import MarkdownNoteCodec, YamlFrontmatter
+from hypomnemata.core.model import Anchor, LinkTarget
+from hypomnemata.core.vault import Vault
+
+
+@pytest.fixture
+def vault():
+    """Create a temporary vault with a few notes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        vault_path = Path(tmpdir)
+        (vault_path / "aaa.md").write_text("# A\n\nLinks to [[bbb]]. Needle.\n")
+        (vault_path / "bbb.md").write_text("# B\n\nNEEDLE here too.\n")
+        (vault_path / "ccc.md").write_text("# C\n\nNothing.\n")
+        (vault_path / "notes.txt").write_text("needle, but not a note\n")
+
+        yield Vault(FsStorage(vault_path), MarkdownParser(), MarkdownNoteCodec(YamlFrontmatter()))
+
+
+def test_search_is_case_insensitive(vault):
+    """Test substring search ignores case and non-note files."""
+    index = InMemoryIndex(vault)
+
+    assert sorted(index.search("needle")) == ["aaa", "bbb"]
+
+
+def test_search_stops_at_limit(vault):
+    """Test search stops loading notes once the limit is reached."""
+    index = InMemoryIndex(vault)
+    loaded = []
+    original_get = vault.get
+
+    def counting_get(nid):
+        loaded.append(nid)
+        return original_get(nid)
+
+    vault.get = counting_get
+
+    hits = index.search("#", limit=1)
+
+    assert len(hits) == 1
+    assert loaded == hits
+
+
+def test_rebuild_links(vault):
+    """Test rebuild populates outgoing and incoming links."""
+    index = InMemoryIndex(vault)
+    index.rebuild()
+
+    assert [link.target.id for link in index.links_out("aaa")] == ["bbb"]
+    assert [link.source for link in index.links_in("bbb")] == ["aaa"]
+    assert index.links_in("ccc") == []
+
+
+def test_search_after_rebuild_uses_cached_bodies(vault):
+    """Test search after rebuild does not reload notes from the vault."""
+    index = InMemoryIndex(vault)
+    index.rebuild()
+
+    def failing_get(nid):
+        raise AssertionError(f"unexpected load of {nid}")
+
+    vault.get = failing_get
+
+    assert sorted(index.search("NeEdLe")) == ["aaa", "bbb"]
+    assert index.search("needle", limit=1) in (["aaa"], ["bbb"])
+
+
+def test_resolver_anchor_ok_reads_each_note_once(vault):
+    """Test anchor lookups for the same note share one load."""
+    (Path(vault.storage.root) / "ddd.md").write_text("# Intro ^lbl\n\nText\n\n## Sub Part\n")
+    resolver = DefaultResolver(vault)
+    loaded = []
+    original_get = vault.get
+
+    def counting_get(nid):
+        loaded.append(nid)
+        return original_get(nid)
+
+    vault.get = counting_get
+
+    assert resolver.anchor_ok(LinkTarget("ddd", Anchor("block", "lbl")))
+    assert resolver.anchor_ok(LinkTarget("ddd", Anchor("heading", "sub-part")))
+    assert not resolver.anchor_ok(LinkTarget("ddd", Anchor("block", "nope")))
+    assert not resolver.anchor_ok(LinkTarget("ddd", Anchor("heading", "lbl")))
+    assert not resolver.anchor_ok(LinkTarget("zzz", Anchor("block", "lbl")))
+    assert loaded == ["ddd", "zzz"]
+
+
+def test_resolver_exists_shares_anchor_load(vault):
+    """Test exists() and anchor_ok() for a target load it once between them."""
+    resolver = DefaultResolver(vault)
+    loaded = []
+    original_get = vault.get
+
+    def counting_get(nid):
+        loaded.append(nid)
+        return original_get(nid)
+
+    vault.get = counting_get
+
+    for _ in range(3):
+        assert resolver.exists(LinkTarget("aaa"))
+        assert not resolver.exists(LinkTarget("zzz"))
+    assert not resolver.anchor_ok(LinkTarget("aaa", Anchor("block", "nope")))
+    assert loaded == ["aaa", "zzz"]
+
+    resolver.invalidate("aaa")
+    assert resolver.exists(LinkTarget("aaa"))
+    assert loaded == ["aaa", "zzz", "aaa"]
@@ -0,0 +1,53 @@
+"""Tests for JSON serialization helpers."""
+
+import io
+import json
+
+import pytest
+
+from hypomnemata import jsonio
+
+SAMPLE = {
+    "nodes": [{"id": "abc", "title": "Riemann–Christoffel"}, {"id": "def", "title": ""}],
+    "edges": [],
+    "count": 2,
+}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_bytes_indent_matches_stdlib(monkeypatch, use_orjson):
+    """Test indented output has the json.dumps(indent=2) layout."""
+    if use_orjson and not jsonio.ORJSON_AVAILABLE:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(jsonio, "ORJSON_AVAILABLE", use_orjson)
+
+    data = jsonio.dumps_bytes(SAMPLE, indent=True)
+
+    assert data.decode("utf-8") == json.dumps(SAMPLE, indent=2, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_bytes_compact(monkeypatch, use_orjson):
+    """Test compact output round-trips and has no whitespace separators."""
+    if use_orjson and not jsonio.ORJSON_AVAILABLE:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(jsonio, "ORJSON_AVAILABLE", use_orjson)
+
+    data = jsonio.dumps_bytes(SAMPLE)
+
+    assert json.loads(data) == SAMPLE
+    assert b", " not in data and b": " not in data
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize("rows", [[], SAMPLE["nodes"], [SAMPLE, [1, [2]], "x"]])
+def test_write_array_matches_dumps_bytes(monkeypatch, use_orjson, rows):
+    """Test the streamed array has the same bytes as encoding the whole list."""
+    if use_orjson and not jsonio.ORJSON_AVAILABLE:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(jsonio, "ORJSON_AVAILABLE", use_orjson)
+    buf = io.BytesIO()
+
+    jsonio.write_array(iter(rows), buf)
+
+    assert buf.getvalue() == jsonio.dumps_bytes(rows, indent=True)
@@ -2,7 +2,7 @@
 
 from hypomnemata.adapters.markdown_parser import MarkdownParser
 from hypomnemata.core.model import Note
-from hypomnemata.core.slicer import find_label, slice_block
+from hypomnemata.core.slicer import find_label, slice_block, strip_fence
 
 
 def test_find_label_on_heading():
@@ -176,3 +176,32 @@ No labels here.
     
     block = find_label(note, "nonexistent")
     assert block is None
+
+
+def _strip_fence_by_lines(text):
+    """The list-based fence stripping strip_fence replaced."""
+    lines = text.splitlines(keepends=True)
+    if len(lines) >= 2 and lines[0].strip().startswith("```"):
+        for i in range(len(lines) - 1, 0, -1):
+            if lines[i].strip() == "```":
+                return "".join(lines[1:i])
+    return text
+
+
+def test_strip_fence_matches_line_scan():
+    """Test strip_fence agrees with scanning the slice line by line."""
+    texts = [
+        "```python\ndef hello():\n    pass\n```\n",
+        "```python\ndef hello():\n    pass\n```",
+        "```\ncode\n  ```  \ntrailing\n",
+        "```\nno closing fence\n",
+        "```\nx = '```'\n```\n",
+        "```\n``````\n",
+        "```py\n",
+        "```\n```",
+        "\n```\ncode\n```\n",
+        "plain text\n```\n",
+        "```\r\ncode\r\n```\r\n",
+    ]
+    for text in texts:
+        assert strip_fence(text) == _strip_fence_by_lines(text), text
@@ -0,0 +1,66 @@
+"""Tests for link extraction in MarkdownParser."""
+
+from hypomnemata.adapters.markdown_parser import MarkdownParser
+
+
+def test_links_with_anchors_and_titles():
+    """Test links are parsed with ids, anchors and ranges."""
+    text = "See [[abc]] and [[def#^lbl]].\nAlso [[ghi#Some-heading|Title]].\n"
+    body = MarkdownParser().parse(text, "src")
+
+    assert [link.target.id for link in body.links] == ["abc", "def", "ghi"]
+    assert body.links[0].source == "src"
+    assert body.links[1].target.anchor.kind == "block"
+    assert body.links[1].target.anchor.value == "lbl"
+    assert body.links[2].target.anchor.kind == "heading"
+    assert body.links[2].target.anchor.value == "Some-heading"
+
+    for link in body.links:
+        assert text[link.range.start : link.range.end].startswith("[[")
+        assert text[link.range.start : link.range.end].endswith("]]")
+
+
+def test_links_in_headings_and_fences():
+    """Test links are found on heading and fence lines alike."""
+    text = "# Heading [[aaa]]\n\n```\n[[bbb]]\n```\n"
+    body = MarkdownParser().parse(text, "src")
+
+    assert [link.target.id for link in body.links] == ["aaa", "bbb"]
+    assert [block.kind for block in body.blocks] == ["heading", "fence"]
+
+
+def test_links_do_not_span_lines():
+    """Test an unclosed link does not pair with brackets on a later line."""
+    text = "[[open\nclose]] and [[ok]]\n"
+    body = MarkdownParser().parse(text, "src")
+
+    assert [link.target.id for link in body.links] == ["ok"]
+
+
+def test_links_with_crlf_line_endings():
+    """Test offsets and headings with CRLF line endings."""
+    text = "# Title ^top\r\n\r\nText [[abc]]\r\n"
+    body = MarkdownParser().parse(text, "src")
+
+    assert len(body.blocks) == 1
+    assert body.blocks[0].heading_text == "Title ^top"
+    assert body.blocks[0].label.name == "top"
+    assert body.blocks[0].range.end == len("# Title ^top\r\n")
+    link = body.links[0]
+    assert text[link.range.start : link.range.end] == "[[abc]]"
+
+
+def test_block_offsets_without_trailing_newline():
+    """Test block ranges end at EOF when the last line has no newline."""
+    parser = MarkdownParser()
+
+    heading = parser.parse("intro\n# Last", "src").blocks
+    assert [(b.kind, b.range.start, b.range.end) for b in heading] == [("heading", 6, 12)]
+
+    fence = parser.parse("```py\nx\n```", "src").blocks
+    assert [(b.kind, b.range.start, b.range.end) for b in fence] == [("fence", 0, 11)]
+
+    # An unclosed fence swallows later headings and yields no block
+    body = parser.parse("```\nopen [[a]]\n# not heading", "src")
+    assert body.blocks == []
+    assert [link.target.id for link in body.links] == ["a"]
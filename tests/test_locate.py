@@ -0,0 +1,26 @@
+"""Tests for locate helpers."""
+
+from hypomnemata.locate import LineIndex
+
+
+def _context_by_splitting(text, offset, context):
+    lines = text[:offset].splitlines()
+    return text.splitlines()[max(0, len(lines) - context):len(lines) + context]
+
+
+def test_line_index_context_matches_splitlines():
+    """Test LineIndex.context agrees with re-splitting the text at every offset."""
+    texts = [
+        "",
+        "one line",
+        "a\nb\nc",
+        "a\nb\nc\n",
+        "\n\nfirst\r\nsecond\n\nthird [[x]] end\nlast",
+    ]
+    for text in texts:
+        index = LineIndex(text)
+        for offset in range(len(text) + 1):
+            for context in (0, 1, 2):
+                assert index.context(offset, context) == _context_by_splitting(
+                    text, offset, context
+                ), (text, offset, context)
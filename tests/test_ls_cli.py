@@ -0,0 +1,56 @@
+"""Tests for hypo ls CLI command."""
+
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+
+def test_ls_titles_include_unindexed_notes():
+    """Test ls pairs titles by id and keeps notes the index hasn't seen yet."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        vault = Path(tmpdir)
+        (vault / "b2.md").write_text("# Beta\n")
+        (vault / "a1.md").write_text("# Alpha\n")
+        subprocess.run(["hypo", "-q", "--vault", str(vault), "reindex"], check=True)
+        (vault / "a0.md").write_text("# Not indexed\n")
+
+        result = subprocess.run(
+            ["hypo", "--vault", str(vault), "ls", "--format", "json"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        assert json.loads(result.stdout) == [
+            {"id": "a0", "title": ""},
+            {"id": "a1", "title": "Alpha"},
+            {"id": "b2", "title": "Beta"},
+        ]
+
+        result = subprocess.run(
+            ["hypo", "--vault", str(vault), "ls", "--with-titles"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.stdout == "a0\t\na1\tAlpha\nb2\tBeta\n"
+
+
+def test_ls_grep_is_literal_and_case_insensitive():
+    """Test --grep matches note bodies as a literal, case-insensitive substring."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        vault = Path(tmpdir)
+        (vault / "a1.md").write_text("# A\n\nSee [[b2]] (maybe).\n")
+        (vault / "b2.md").write_text("---\ntitle: maybe\n---\n# B\n\nMAYBE.\n")
+        (vault / "c3.md").write_text("# C\n\nNothing.\n")
+
+        def grep(pattern):
+            result = subprocess.run(
+                ["hypo", "--vault", str(vault), "ls", "--grep", pattern],
+                capture_output=True,
+                text=True,
+            )
+            return result.stdout.split()
+
+        assert grep("maybe") == ["a1", "b2"]
+        assert grep("(maybe)") == ["a1"]
+        assert grep("title") == []
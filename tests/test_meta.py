@@ -86,3 +86,20 @@ core/title: Custom Title
         assert note2 is not None
         assert "title" in note2.meta
         assert "core/title" not in note2.meta
+
+
+def test_meta_set_value_coercion():
+    """Test meta set parses JSON, booleans and numbers and keeps other strings."""
+    from hypomnemata.cli import _coerce_meta_value
+
+    assert _coerce_meta_value('{"a": [1]}') == {"a": [1]}
+    assert _coerce_meta_value("[oops") == "[oops"
+    assert _coerce_meta_value("TRUE") is True
+    assert _coerce_meta_value("false") is False
+    assert _coerce_meta_value("-42") == -42
+    assert _coerce_meta_value("3.") == 3.0
+    assert _coerce_meta_value(".5e2") == 50.0
+    assert _coerce_meta_value("1e5") == "1e5"
+    assert _coerce_meta_value("1.2.3") == "1.2.3"
+    assert _coerce_meta_value("draft") == "draft"
+    assert _coerce_meta_value("") == ""
@@ -12,7 +12,14 @@ from hypomnemata.adapters.yaml_codec import MarkdownNoteCodec, YamlFrontmatter
 from hypomnemata.core.meta import MetaBag
 from hypomnemata.core.model import Note
 from hypomnemata.core.vault import Vault
-from hypomnemata.import_migrate.migrate import migrate_wiki_links, resolve_target
+from hypomnemata.import_migrate import migrate
+from hypomnemata.import_migrate.migrate import (
+    iter_migration_batches,
+    migrate_file_links,
+    migrate_files_links,
+    migrate_wiki_links,
+    resolve_target,
+)
 
 
 @pytest.fixture
@@ -279,3 +286,49 @@ def test_migrate_wiki_links_prefer_title(temp_vault):
     
     assert "[[title_id]]" in migrated
     assert len(errors) == 0
+
+
+def test_migrate_files_links_batch(temp_vault):
+    """Test a batch migrates each file as migrate_file_links would on its own."""
+    vault, index, vault_path = temp_vault
+    
+    (vault_path / "aaa111.md").write_text(
+        "---\ncore/title: First\ncore/aliases: [Uno]\n---\n# First\n\n"
+        "[[Second#Part|see]] [two](bbb222.md) [gone](ccc333.md)\n"
+    )
+    (vault_path / "bbb222.md").write_text(
+        "---\ncore/title: Second\n---\n# Second\n\n![[Uno]] [[Missing]] [web](https://x.org/a.md)\n"
+    )
+    index.rebuild()
+    paths = [vault_path / "aaa111.md", vault_path / "bbb222.md"]
+    
+    results = migrate_files_links(paths, vault_path, index)
+    
+    assert [r.path for r in results] == [str(p) for p in paths]
+    assert results[0].migrated.endswith("[[bbb222#Part|see]] [two](bbb222) [gone](ccc333.md)\n")
+    assert results[0].errors == ["Note ID not found: ccc333 (from path: ccc333.md)"]
+    assert results[1].migrated.endswith("![[aaa111]] [[Missing]] [web](https://x.org/a.md)\n")
+    assert results[1].errors == ["Could not resolve: 'Missing'"]
+    assert results == [migrate_file_links(p, vault_path, index) for p in paths]
+
+
+def test_iter_migration_batches_in_workers(temp_vault, monkeypatch):
+    """Test worker processes yield the same batches as migrating in-process."""
+    vault, index, vault_path = temp_vault
+    for i in range(5):
+        (vault_path / f"note{i}.md").write_text(
+            f"---\ncore/title: Note {i}\n---\n# Note {i}\n\n"
+            f"[[Note {(i + 1) % 5}]] [x](note{i}.md)\n"
+        )
+    index.rebuild()
+    paths = sorted(vault_path.glob("*.md"))
+    monkeypatch.setattr(migrate, "_BATCH_SIZE", 2)
+    
+    serial = list(iter_migration_batches(paths, vault_path, index))
+    monkeypatch.setattr(migrate, "_PARALLEL_MIN_FILES", 1)
+    monkeypatch.setattr(migrate.os, "cpu_count", lambda: 2)
+    parallel = list(iter_migration_batches(paths, vault_path, index))
+    
+    assert [len(batch) for batch in serial] == [2, 2, 1]
+    assert parallel == serial
+    assert serial[0][0].migrated.endswith("[[note1]] [x](note0)\n")
@@ -256,3 +256,32 @@ After transclusion.
         
         # Should have error message with anchor
         assert "> **Hypo:** missing anchor `target123#^missing`" in exported
+
+
+def test_quartz_transclusion_reads_each_note_once():
+    """Test repeated transclusions of one note don't re-read it from storage."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        vault_dir = Path(tmpdir) / "vault"
+        vault_dir.mkdir()
+        
+        (vault_dir / "hub123.md").write_text("# Hub\n\nShared text. ^shared\n")
+        (vault_dir / "aaa111.md").write_text("![[hub123]]\n\n![[hub123]]\n")
+        (vault_dir / "bbb222.md").write_text("![[hub123]]\n")
+        
+        storage = FsStorage(vault_dir)
+        reads: list[str] = []
+        original_read = storage.read_raw
+        
+        def counting_read(note_id: str) -> str | None:
+            reads.append(note_id)
+            return original_read(note_id)
+        
+        storage.read_raw = counting_read  # type: ignore[method-assign]
+        vault = Vault(storage, MarkdownParser(), MarkdownNoteCodec(YamlFrontmatter()))
+        
+        out_dir = Path(tmpdir) / "out"
+        QuartzAdapter(vault, out_dir).export_all()
+        
+        assert reads.count("hub123") == 1
+        exported = (out_dir / "aaa111" / "index.md").read_text()
+        assert exported.count("Shared text.") == 2
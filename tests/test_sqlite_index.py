@@ -171,6 +171,22 @@ def test_fts_snippets(temp_vault):
     assert "<b>Gamma</b>" in snippet or "<b>gamma</b>" in snippet.lower()
 
 
+def test_search_with_snippets(temp_vault):
+    """Test search returns ids and the same snippets as snippet()."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("# One\n\nDelta waves.\n")
+    (vault_path / "note2.md").write_text("# Two\n\nDelta and delta again.\n")
+    (vault_path / "note3.md").write_text("# Three\n\nNothing here.\n")
+    index.rebuild(full=True)
+
+    hits = index.search_with_snippets("delta")
+
+    assert [nid for nid, _ in hits] == index.search("delta")
+    for nid, snippet in hits:
+        assert snippet == index.snippet(nid, "delta")
+        assert "<b>" in snippet
+
+
 def test_backrefs(temp_vault):
     """Test backlinks/backreferences functionality."""
     vault, index, vault_path = temp_vault
@@ -329,6 +345,17 @@ def test_graph_data(temp_vault):
     assert edge["target"] == "note2"
 
 
+def test_iter_edges(temp_vault):
+    """Test edges are yielded deduplicated and ordered by source then target."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "b.md").write_text("# B\n\n[[c]] [[a]] [[c]]\n")
+    (vault_path / "a.md").write_text("# A\n\n[[b]]\n")
+    (vault_path / "c.md").write_text("# C\n")
+    index.rebuild(full=True)
+
+    assert list(index.iter_edges()) == [("a", "b"), ("b", "a"), ("b", "c")]
+
+
 def test_title_extraction(temp_vault):
     """Test title extraction heuristics."""
     vault, index, vault_path = temp_vault
@@ -400,3 +427,412 @@ def test_hash_based_change_detection(temp_vault):
     # With hash, it should still see the file as dirty due to mtime
     # but this tests that hash computation works
     assert counts2["scanned"] == 1
+
+
+def test_rebuild_commits_in_batches(temp_vault, monkeypatch):
+    """Test rebuild spanning several write batches indexes every note."""
+    from hypomnemata.adapters import sqlite_index
+
+    monkeypatch.setattr(sqlite_index, "_BATCH_SIZE", 2)
+    vault, index, vault_path = temp_vault
+
+    for i in range(5):
+        (vault_path / f"note{i}.md").write_text(f"# Note {i}\n\nSee [[note{(i + 1) % 5}]].\n")
+
+    counts = index.rebuild(full=True)
+
+    assert counts["inserted"] == 5
+    assert counts["failed"] == 0
+    for i in range(5):
+        assert [link.source for link in index.links_in(f"note{i}")] == [f"note{(i - 1) % 5}"]
+
+
+def test_reads_reuse_one_connection(temp_vault):
+    """Test read methods share a cached connection until close()."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("# One\n\nSee [[note2]].\n")
+    (vault_path / "note2.md").write_text("# Two\n")
+    index.rebuild(full=True)
+
+    conn = index._get_conn()
+    assert index.links_out("note1")[0].target.id == "note2"
+    assert index.search("one") == ["note1"]
+    assert index._get_conn() is conn
+
+    index.close()
+    assert index._cached_conn is None
+    assert index.orphans() == []
+    assert index._get_conn() is not conn
+
+
+def test_hash_detects_same_size_edit(temp_vault):
+    """Test hash mode catches an edit that keeps mtime and size."""
+    import hashlib
+    import os
+
+    vault, index, vault_path = temp_vault
+    file_path = vault_path / "note1.md"
+    file_path.write_text("# Alpha\n")
+    index.rebuild(full=True, use_hash=True)
+
+    st = file_path.stat()
+    file_path.write_text("# Omega\n")
+    os.utime(file_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    counts = index.rebuild(full=False, use_hash=True)
+
+    assert counts["dirty"] == 1
+    assert counts["updated"] == 1
+    row = index._get_conn().execute(
+        "SELECT hash, title FROM notes WHERE id = 'note1'"
+    ).fetchone()
+    assert row == (hashlib.sha256(b"# Omega\n").hexdigest(), "Omega")
+
+
+def test_full_rebuild_vacuum_is_opt_in(temp_vault):
+    """Test new indexes use incremental auto-vacuum and VACUUM only on request."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("# One\n")
+
+    index.rebuild(full=True)
+    conn = index._get_conn()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
+    assert conn.execute("PRAGMA page_size").fetchone()[0] == 8192
+
+    counts = index.rebuild(full=True, vacuum=True)
+    assert counts["updated"] == 1
+    assert index.search("one") == ["note1"]
+
+
+def test_rebuild_truncates_wal(temp_vault):
+    """Test the WAL is checkpointed and truncated once a rebuild finishes."""
+    vault, index, vault_path = temp_vault
+    for i in range(20):
+        (vault_path / f"note{i}.md").write_text(f"# Note {i}\n\n" + "text " * 200)
+
+    index.rebuild(full=True)
+
+    wal = Path(f"{index.db_path}-wal")
+    assert not wal.exists() or wal.stat().st_size == 0
+    conn = index._get_conn()
+    assert conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] > 0
+
+
+def test_submit_updates_runs_on_writer_thread(temp_vault):
+    """Test queued updates are written in the background and flushed by close()."""
+    import threading
+
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("# One\n")
+    index.rebuild(full=True)
+
+    (vault_path / "note2.md").write_text("# Two\n\nSee [[note1]].\n")
+    (vault_path / "note3.md").write_text("# Three\n")
+    first = index.submit_updates({"note2"}, set())
+    second = index.submit_updates({"note3"}, {"note1"})
+
+    assert first.result(timeout=5) == {"updated": 0, "inserted": 1, "removed": 0}
+    assert second.result(timeout=5) == {"updated": 0, "inserted": 1, "removed": 1}
+    assert index._writer is not None
+    assert index._writer is not threading.current_thread()
+
+    # Readers on the caller's connection see the committed writes
+    assert [link.source for link in index.links_in("note1")] == ["note2"]
+    assert sorted(index.search("two OR three")) == ["note2", "note3"]
+
+    index.submit_updates(set(), {"note3"})
+    index.close()
+    assert index._writer is None
+
+
+def test_update_notes_replaces_corrupt_database(temp_vault, capsys):
+    """Test an update on a corrupt DB backs it up and writes a fresh index."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("# One\n")
+    index.db_path.write_bytes(b"not a database" * 100)
+
+    assert index.update_notes({"note1"}, set()) == {"updated": 0, "inserted": 1, "removed": 0}
+    assert "Corrupt DB backed up" in capsys.readouterr().out
+    assert list(index.db_path.parent.glob("*.bad-*.sqlite"))
+    assert index.search("one") == ["note1"]
+    index.close()
+    assert index.search("three") == []
+
+
+def test_failed_update_commits_nothing(temp_vault, monkeypatch):
+    """Test an update that fails partway leaves none of its notes written."""
+    import hypomnemata.adapters.sqlite_index as sqlite_index
+
+    vault, index, vault_path = temp_vault
+    index.rebuild(full=True)
+    for i in range(4):
+        (vault_path / f"note{i}.md").write_text(f"# Note {i}\n")
+
+    monkeypatch.setattr(sqlite_index, "_BATCH_SIZE", 2)
+    index_note = index._index_note
+    calls = []
+
+    def flaky_index_note(note_id, use_hash, conn):
+        calls.append(note_id)
+        if len(calls) == 3:
+            raise RuntimeError("boom")
+        return index_note(note_id, use_hash, conn)
+
+    monkeypatch.setattr(index, "_index_note", flaky_index_note)
+    with pytest.raises(RuntimeError, match="boom"):
+        index.update_notes({f"note{i}" for i in range(4)}, set())
+
+    assert index._get_conn().execute("SELECT COUNT(*) FROM notes").fetchone()[0] == 0
+    index.close()
+
+
+def test_removed_note_cascades(temp_vault):
+    """Test removing a note deletes its blocks, links, aliases and FTS row."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("# One\n")
+    (vault_path / "note2.md").write_text(
+        "---\ncore/aliases: [Second]\n---\n# Two\n\nSee [[note1]].\n"
+    )
+    index.rebuild(full=True)
+    assert [link.source for link in index.links_in("note1")] == ["note2"]
+
+    (vault_path / "note2.md").unlink()
+    assert index.rebuild(full=False)["removed"] == 1
+
+    conn = index._conn()
+    try:
+        for table, col in (("blocks", "note_id"), ("links", "src"), ("kv", "note_id")):
+            count = conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE {col} = 'note2'"
+            ).fetchone()[0]
+            assert count == 0, table
+        assert conn.execute("SELECT COUNT(*) FROM fts").fetchone()[0] == 1
+    finally:
+        conn.close()
+    assert index.links_in("note1") == []
+
+
+def _create_v2_db(db_path):
+    """Write an index in the v2 layout: no notes.body, fts keyed by an id column."""
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        INSERT INTO meta VALUES ('schema_version', '2');
+        CREATE TABLE notes (
+            id TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size_bytes INTEGER NOT NULL,
+            hash TEXT, title TEXT, has_math INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE blocks (
+            note_id TEXT NOT NULL, kind TEXT NOT NULL, start INTEGER NOT NULL,
+            end INTEGER NOT NULL, level INTEGER, slug TEXT, label TEXT,
+            PRIMARY KEY (note_id, start)
+        );
+        CREATE TABLE links (
+            src TEXT NOT NULL, dst TEXT NOT NULL, start INTEGER NOT NULL,
+            end INTEGER NOT NULL, rel TEXT, anchor_kind TEXT, anchor_value TEXT,
+            PRIMARY KEY (src, start)
+        );
+        CREATE TABLE kv (note_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT);
+        CREATE VIRTUAL TABLE fts USING fts5(id UNINDEXED, body, title);
+        INSERT INTO notes VALUES ('note1', 1, 10, NULL, 'One', 0);
+        INSERT INTO fts VALUES ('note1', 'apples and pears', 'One');
+        INSERT INTO notes VALUES ('note2', 1, 10, NULL, 'Two', 0);
+        INSERT INTO fts VALUES ('note2', 'nothing here', 'Two');
+        INSERT INTO kv VALUES ('note2', 'core/alias', 'Orchard');
+        INSERT INTO links VALUES ('gone', 'note1', 0, 9, NULL, NULL, NULL);
+    """)
+    conn.commit()
+    conn.close()
+
+
+def test_migrates_v2_database(temp_vault):
+    """Test a v2 index keeps its notes and search and loses orphaned rows."""
+    vault, index, vault_path = temp_vault
+    _create_v2_db(index.db_path)
+
+    index._ensure_schema()
+
+    assert index.search("apples") == ["note1"]
+    assert index.snippet("note1", "apples") == "<b>apples</b> and pears"
+    assert index.links_in("note1") == []
+    version = index._get_conn().execute(
+        "SELECT value FROM meta WHERE key = 'schema_version'"
+    ).fetchone()
+    assert version == ("5",)
+
+
+def test_queries_migrate_old_database_on_first_use(temp_vault):
+    """Test read queries upgrade an old index without an explicit rebuild."""
+    vault, index, vault_path = temp_vault
+    _create_v2_db(index.db_path)
+
+    assert index.search("apples") == ["note1"]
+    assert index.search_with_aliases("orchard") == ["note2"]
+    assert index.match_aliases("orch") == [("note2", "Orchard")]
+
+
+def test_bulk_removal(temp_vault):
+    """Test many removed notes are deleted together, including their links."""
+    vault, index, vault_path = temp_vault
+    for i in range(6):
+        (vault_path / f"note{i}.md").write_text(f"# N{i}\n\nSee [[note0]].\n")
+    index.rebuild(full=True)
+
+    for i in (1, 2, 3):
+        (vault_path / f"note{i}.md").unlink()
+    assert index.rebuild(full=False)["removed"] == 3
+    assert sorted(link.source for link in index.links_in("note0")) == [
+        "note0", "note4", "note5"
+    ]
+
+    counts = index.update_notes(set(), {"note4", "note5"})
+    assert counts["removed"] == 2
+    assert [link.source for link in index.links_in("note0")] == ["note0"]
+    assert index.search("N4 OR N5") == []
+
+
+def test_rebuild_parses_in_worker_processes(temp_vault, monkeypatch):
+    """Test a rebuild parsed in worker processes matches a serial one."""
+    from hypomnemata.adapters import sqlite_index
+
+    monkeypatch.setattr(sqlite_index, "_PARALLEL_MIN_NOTES", 1)
+    monkeypatch.setattr(sqlite_index.os, "cpu_count", lambda: 2)
+    vault, index, vault_path = temp_vault
+
+    for i in range(4):
+        (vault_path / f"note{i}.md").write_text(
+            f"---\ncore/aliases: [alias{i}]\n---\n# Note {i}\n\nSee [[note{(i + 1) % 4}]].\n"
+        )
+
+    counts = index.rebuild(full=True, use_hash=True)
+
+    assert counts["inserted"] == 4
+    assert counts["failed"] == 0
+    assert index.search("Note 2") == ["note2"]
+    assert [link.source for link in index.links_in("note0")] == ["note3"]
+
+
+def test_titles_batches_lookups(temp_vault, monkeypatch):
+    """Test titles() maps ids to titles across several IN chunks."""
+    from hypomnemata.adapters import sqlite_index
+
+    monkeypatch.setattr(sqlite_index, "_IN_CHUNK", 2)
+    vault, index, vault_path = temp_vault
+    for i in range(5):
+        (vault_path / f"note{i}.md").write_text(f"# Title {i}\n")
+    index.rebuild(full=True)
+
+    titles = index.titles(["note4", "missing", "note0", "note2"])
+
+    assert titles == {"note4": "Title 4", "note0": "Title 0", "note2": "Title 2"}
+
+
+def test_search_with_aliases(temp_vault):
+    """Test alias matches follow FTS hits without repeating them."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("---\ncore/aliases: [Orbit]\n---\n# One\n\nOrbit.\n")
+    (vault_path / "note2.md").write_text("---\ncore/aliases: [Orbital, Orbits]\n---\n# Two\n")
+    (vault_path / "note3.md").write_text("# Three\n\nOrbit orbit orbit.\n")
+    index.rebuild(full=True)
+
+    results = index.search_with_aliases("orbit")
+
+    assert results[:2] == index.search("orbit")
+    assert results[2:] == ["note2"]
+
+
+def test_match_titles_and_aliases(temp_vault):
+    """Test title/alias candidates match token prefixes and drop removed notes."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("---\ncore/aliases: [Primary Note]\n---\n# Alpha\n")
+    (vault_path / "note2.md").write_text("---\ncore/aliases: [Primer]\n---\n# Alphabet\n")
+    index.rebuild(full=True)
+
+    assert sorted(index.match_titles("alph")) == [("note1", "Alpha"), ("note2", "Alphabet")]
+    assert sorted(index.match_aliases("prim")) == [("note1", "Primary Note"), ("note2", "Primer")]
+    assert index.match_aliases('"') == []
+
+    (vault_path / "note2.md").unlink()
+    index.rebuild()
+
+    assert index.match_aliases("prim") == [("note1", "Primary Note")]
+
+
+def test_migrates_v3_database(temp_vault):
+    """Test a v3 index gets a stable kv rowid and its aliases indexed."""
+    import sqlite3
+
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("---\ncore/aliases: [Orbit]\n---\n# One\n")
+    index.rebuild(full=True)
+    index.close()
+    conn = sqlite3.connect(index.db_path)
+    conn.executescript("""
+        DROP TRIGGER kv_ai;
+        DROP TRIGGER kv_ad;
+        DROP TABLE alias_fts;
+        CREATE TABLE old_kv AS SELECT note_id, key, value FROM kv;
+        DROP TABLE kv;
+        ALTER TABLE old_kv RENAME TO kv;
+        UPDATE meta SET value = '3' WHERE key = 'schema_version';
+    """)
+    conn.close()
+
+    index._ensure_schema()
+
+    assert index.match_aliases("orb") == [("note1", "Orbit")]
+    version = index._get_conn().execute(
+        "SELECT value FROM meta WHERE key = 'schema_version'"
+    ).fetchone()
+    assert version == ("5",)
+
+
+def test_counts(temp_vault):
+    """Test counts agree with the notes, links and orphans queries."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("# One\n\nSee [[note2]] and [[note2]].\n")
+    (vault_path / "note2.md").write_text("# Two\n")
+    (vault_path / "note3.md").write_text("# Three\n")
+    (vault_path / "note4.md").write_text("# Four\n\nSee [[note4]].\n")
+    index.rebuild(full=True)
+
+    assert index.orphans() == ["note3"]
+    assert index.counts() == {"notes": 4, "links": 3, "orphans": 1}
+
+
+def test_full_rebuild_restores_secondary_indexes(temp_vault):
+    """Test a full rebuild recreates the indexes it drops for its inserts."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text("# One\n\nSee [[note2]].\n")
+    (vault_path / "note2.md").write_text("---\ncore/aliases: [two]\n---\n# Two\n")
+    index.rebuild()
+    
+    def index_names():
+        rows = index._get_conn().execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        return {row[0] for row in rows}
+    
+    before = index_names()
+    counts = index.rebuild(full=True)
+    
+    assert counts["updated"] == 2
+    assert index_names() == before
+    assert {"links_dst_idx", "kv_key_value_idx"} <= before
+    assert [link.source for link in index.links_in("note2")] == ["note1"]
+    assert index.match_aliases("two") == [("note2", "two")]
+
+
+def test_link_problems_and_id_mismatches(temp_vault):
+    """Test dead links, unknown anchors and frontmatter id mismatches from SQL."""
+    vault, index, vault_path = temp_vault
+    (vault_path / "note1.md").write_text(
+        "---\nid: other\n---\n# One\n\n## Part\n\n"
+        "[[note2]] [[gone]] [[note2#nope]] [[note1#part]]\n"
+    )
+    (vault_path / "note2.md").write_text("---\nid: note2\n---\n# Two\n")
+    index.rebuild(full=True)
+
+    problems = [(src, dst, problem) for src, _, _, dst, problem in index.link_problems()]
+    assert problems == [("note1", "gone", "dead"), ("note1", "note2", "anchor")]
+    assert index.id_mismatches() == [("note1", "other")]
@@ -0,0 +1,27 @@
+"""Tests for transclusion extraction in MarkdownParser."""
+
+from hypomnemata.adapters.markdown_parser import MarkdownParser
+
+
+def test_transclusion_is_also_a_link():
+    """Test ![[...]] yields both a transclusion and a link."""
+    text = "Intro\n\n![[abc#^lbl]]\n"
+    body = MarkdownParser().parse(text, "src")
+
+    assert len(body.transclusions) == 1
+    trans = body.transclusions[0]
+    assert trans.target.id == "abc"
+    assert trans.target.anchor.value == "lbl"
+    assert text[trans.range.start : trans.range.end] == "![[abc#^lbl]]"
+
+    assert [link.target.id for link in body.links] == ["abc"]
+    assert body.links[0].range.start == trans.range.start + 1
+
+
+def test_plain_links_are_not_transclusions():
+    """Test only links prefixed with ! are transclusions."""
+    text = "[[aaa]] ![[bbb]] [[ccc]]![[ddd]]"
+    body = MarkdownParser().parse(text, "src")
+
+    assert [t.target.id for t in body.transclusions] == ["bbb", "ddd"]
+    assert [link.target.id for link in body.links] == ["aaa", "bbb", "ccc", "ddd"]
@@ -0,0 +1,99 @@
+"""Tests for Vault note loading."""
+
+import copy
+import tempfile
+from pathlib import Path
+
+from hypomnemata.adapters.fs_storage import FsStorage
+from hypomnemata.adapters.markdown_parser import MarkdownParser
+from hypomnemata.adapters.yaml_codec import MarkdownNoteCodec, YamlFrontmatter
+from hypomnemata.core.vault import Vault
+
+
+class CountingParser(MarkdownParser):
+    def __init__(self):
+        self.calls = 0
+
+    def parse(self, text, id):
+        self.calls += 1
+        return super().parse(text, id)
+
+
+def test_get_reuses_parse_for_unchanged_content():
+    """Test unchanged notes are parsed once and edits are picked up."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        vault_path = Path(tmpdir)
+        (vault_path / "aaa.md").write_text("# A\n\n[[bbb]]\n")
+        parser = CountingParser()
+        vault = Vault(FsStorage(vault_path), parser, MarkdownNoteCodec(YamlFrontmatter()))
+
+        first = vault.get("aaa")
+        second = vault.get("aaa")
+        assert parser.calls == 1
+        assert first.body == second.body
+
+        (vault_path / "aaa.md").write_text("# A\n\n[[ccc]]\n")
+        third = vault.get("aaa")
+        assert parser.calls == 2
+        assert [link.target.id for link in third.body.links] == ["ccc"]
+
+
+def test_cached_body_is_not_shared():
+    """Test mutating one loaded body does not leak into later loads."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        vault_path = Path(tmpdir)
+        (vault_path / "aaa.md").write_text("# A\n\n[[bbb]] ![[ccc]]\n")
+        parser = CountingParser()
+        vault = Vault(FsStorage(vault_path), parser, MarkdownNoteCodec(YamlFrontmatter()))
+
+        first = vault.get("aaa")
+        expected = copy.deepcopy(first.body)
+        first.body.links.clear()
+        first.body.blocks[0].heading_text = "changed"
+        first.body.transclusions[0].range = None
+
+        assert vault.get("aaa").body == expected
+        assert parser.calls == 1
+
+
+def test_parse_cache_is_bounded():
+    """Test the parse cache evicts the least recently used body."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        vault_path = Path(tmpdir)
+        for nid in ("aaa", "bbb", "ccc"):
+            (vault_path / f"{nid}.md").write_text(f"# {nid}\n")
+        parser = CountingParser()
+        vault = Vault(
+            FsStorage(vault_path),
+            parser,
+            MarkdownNoteCodec(YamlFrontmatter()),
+            parse_cache_size=2,
+        )
+
+        vault.get("aaa")
+        vault.get("bbb")
+        vault.get("aaa")
+        vault.get("ccc")  # evicts bbb
+        assert parser.calls == 3
+
+        vault.get("aaa")
+        assert parser.calls == 3
+        vault.get("bbb")
+        assert parser.calls == 4
+
+
+def test_get_many_loads_each_id_once():
+    """Test get_many returns notes by id, in first-seen order, missing as None."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        vault_path = Path(tmpdir)
+        for nid in ("aaa", "bbb"):
+            (vault_path / f"{nid}.md").write_text(f"# {nid}\n")
+        parser = CountingParser()
+        vault = Vault(FsStorage(vault_path), parser, MarkdownNoteCodec(YamlFrontmatter()))
+
+        notes = vault.get_many(["bbb", "aaa", "bbb", "zzz"])
+
+        assert list(notes) == ["bbb", "aaa", "zzz"]
+        assert notes["aaa"].body.raw == "# aaa\n"
+        assert notes["zzz"] is None
+        assert parser.calls == 2
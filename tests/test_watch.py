@@ -252,3 +252,24 @@ def test_watch_debounce():
         assert "note1" in changed
         assert "note2" in changed
         assert len(deleted) == 0
+
+
+@pytest.mark.skipif(not WATCHDOG_AVAILABLE, reason="watchdog not installed")
+def test_watch_atomic_replace_counts_as_modified(temp_vault):
+    """Test that renaming a temp file over a note marks the note as changed."""
+    from watchdog.events import FileMovedEvent
+
+    from hypomnemata.watch import DebounceHandler
+    
+    vault, index, vault_path = temp_vault
+    handler = DebounceHandler(vault_path, None, debounce_ms=50)
+    
+    handler.on_moved(
+        FileMovedEvent(str(vault_path / "note1.md.tmp"), str(vault_path / "note1.md"))
+    )
+    handler.on_moved(
+        FileMovedEvent(str(vault_path / "old.md"), str(vault_path / "new.md"))
+    )
+    
+    assert handler.modified == {"note1", "new"}
+    assert handler.deleted == {"old"}
@@ -196,3 +196,28 @@ More lines
         assert "## Target" in result.stdout
         assert "Target content" in result.stdout
         assert "Line after" in result.stdout
+
+
+def test_yank_context_uses_slice_offset():
+    """Test --context is taken around the slice, not an earlier identical line."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        vault = Path(tmpdir)
+        note_path = vault / "test1234.md"
+        note_path.write_text("""# Test
+
+```md
+## Target
+```
+
+## Target
+Target content
+""")
+
+        result = subprocess.run(
+            ["hypo", "--vault", str(vault), "yank", "test1234#target", "--context", "1"],
+            capture_output=True,
+            text=True,
+        )
+
+        assert result.returncode == 0
+        assert result.stdout == "\n## Target\nTarget content\n"